@@ -0,0 +1,56 @@
+# benchmarks/bench_annotate.py
+"""Image decode throughput of the auto-labeler: full vs reduced JPEG decode, serial vs process pool
+
+Every mode produces the same letterboxed imgsz x imgsz input. Model time
+is left out; it is the same whichever way the images are decoded.
+Run from the repository root:
+    python -m benchmarks.bench_annotate --workers 1 2 4
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from model_train.annotate import RAW_DIR, IMAGE_EXTENSIONS, decode_image
+from utils.buffers import letterbox_into
+
+
+def decode_full(path, imgsz=640):
+    image = cv2.imread(path)
+    return letterbox_into(image, np.empty((imgsz, imgsz, 3), dtype=np.uint8)), image.shape[:2]
+
+
+def run(decode, paths, imgsz, workers=None):
+    start = time.perf_counter()
+    if workers is None:
+        for path in paths:
+            decode(path, imgsz)
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            list(pool.map(decode, paths, [imgsz] * len(paths)))
+    return len(paths) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--raw", default=RAW_DIR)
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--workers", type=int, nargs="+", default=[os.cpu_count()])
+    parser.add_argument("--repeat", type=int, default=4, help="Pass over the folder this many times")
+    args = parser.parse_args()
+
+    paths = sorted(os.path.join(args.raw, name) for name in os.listdir(args.raw)
+                   if name.lower().endswith(IMAGE_EXTENSIONS)) * args.repeat
+    print(f"{len(paths)} images")
+    print(f"{'decode':>8} {'workers':>8} {'images / s':>11}")
+    for name, decode in (("full", decode_full), ("reduced", decode_image)):
+        print(f"{name:>8} {'serial':>8} {run(decode, paths, args.imgsz):>11.1f}")
+        for workers in args.workers:
+            print(f"{name:>8} {workers:>8} {run(decode, paths, args.imgsz, workers):>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# benchmarks/bench_backends.py
+"""Latency, FPS and mAP delta of each inference backend on CPU
+
+Run from the repository root:
+    python -m benchmarks.bench_backends --weights runs/detect/train/weights/best.pt
+"""
+import argparse
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+from model_train.export import BACKENDS, CALIBRATION_DIR, load_model
+
+
+def load_images(image_dir, limit):
+    names = sorted(os.listdir(image_dir))[:limit]
+    images = [cv2.imread(os.path.join(image_dir, n)) for n in names]
+    return [image for image in images if image is not None]
+
+
+def bench_backend(weights, backend, images, imgsz, data, warmup=3):
+    model = load_model(weights, backend, imgsz)
+    for image in images[:warmup]:
+        model(image, imgsz=imgsz, device="cpu", verbose=False)
+
+    timings = []
+    for image in images:
+        start = time.perf_counter()
+        model(image, imgsz=imgsz, device="cpu", verbose=False)
+        timings.append(time.perf_counter() - start)
+
+    metrics = model.val(data=data, imgsz=imgsz, batch=1, device="cpu", plots=False, verbose=False)
+    latency = np.median(timings) * 1000
+    return {
+        "latency_ms": round(float(latency), 2),
+        "p95_ms": round(float(np.percentile(timings, 95) * 1000), 2),
+        "fps": round(1000 / latency, 1),
+        "map50": round(float(metrics.box.map50), 4),
+        "map50_95": round(float(metrics.box.map), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--weights", default="runs/detect/train/weights/best.pt")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument("--images", default=CALIBRATION_DIR)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--output", help="Write the results as JSON")
+    args = parser.parse_args()
+
+    from model_train.train import resolve_data_config
+
+    images = load_images(args.images, args.limit)
+    data = resolve_data_config()
+    results = {}
+    for backend in args.backends:
+        try:
+            results[backend] = bench_backend(args.weights, backend, images, args.imgsz, data)
+        except Exception as e:
+            print(f"Skipping {backend}: {e}")
+
+    # mAP delta is relative to the PyTorch model when it was benchmarked
+    reference = results.get("pytorch")
+    print(f"{'backend':>14} {'ms':>8} {'p95':>8} {'fps':>7} {'mAP50-95':>9} {'delta':>8}")
+    for backend, row in results.items():
+        row["map_delta"] = round(row["map50_95"] - reference["map50_95"], 4) if reference else None
+        delta = f"{row['map_delta']:+.4f}" if reference else "n/a"
+        print(f"{backend:>14} {row['latency_ms']:>8.2f} {row['p95_ms']:>8.2f} {row['fps']:>7.1f} "
+              f"{row['map50_95']:>9.4f} {delta:>8}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# benchmarks/bench_drawing.py
+"""Per-frame draw time of Visualizer.draw_detections at 10/100/500 objects
+
+Compares the cached label path against rendering every label on every frame.
+Run from the repository root:
+    python -m benchmarks.bench_drawing
+"""
+import time
+
+import numpy as np
+
+from utils.detections import Detections
+from utils.tracking import ObjectTracker
+from utils.visualization import Visualizer
+from benchmarks.bench_matching import random_boxes
+
+
+def make_scene(num_objects, frames, seed=0):
+    """Tracker with warmed-up trails plus a frame's worth of tracked detections"""
+    rng = np.random.default_rng(seed)
+    tracker = ObjectTracker()
+    boxes = random_boxes(rng, num_objects)
+    for step in range(frames):
+        tracker.update_boxes(boxes + step)
+
+    data = np.zeros((num_objects, 6), dtype=np.float32)
+    data[:, :4] = boxes + frames
+    data[:, 4] = rng.uniform(0.5, 1.0, num_objects)
+    data[:, 5] = rng.integers(0, 2, num_objects)
+    detections = Detections(data, {0: "Black Mouse", 1: "SSD Card"})
+    detections.track_ids = tracker.update_boxes(detections.xyxy)
+    return tracker, detections
+
+
+def bench(num_objects, label_cache_size, frames=30):
+    tracker, detections = make_scene(num_objects, frames=40)
+    visualizer = Visualizer(tracker, label_cache_size=label_cache_size)
+    frame = np.zeros((640, 640, 3), dtype=np.uint8)
+
+    timings = []
+    for _ in range(frames):
+        start = time.perf_counter()
+        visualizer.draw_detections(frame, detections)
+        timings.append(time.perf_counter() - start)
+    return np.median(timings) * 1000
+
+
+def main():
+    print(f"{'objects':>8} {'uncached ms':>12} {'cached ms':>10} {'speedup':>8}")
+    for num_objects in (10, 100, 500):
+        uncached = bench(num_objects, label_cache_size=0)
+        cached = bench(num_objects, label_cache_size=1024)
+        print(f"{num_objects:>8} {uncached:>12.3f} {cached:>10.3f} {uncached / cached:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# benchmarks/bench_frames.py
+"""Per-stage allocations and time of the GUI frame path, before and after pooling
+
+The old path resized (distorting) and converted BGR->RGB->BGR with a new
+array each time; the pooled path letterboxes once into a reused buffer and
+stays BGR. Bytes are the peak traced by tracemalloc inside each stage after
+warm-up, so a stage that allocates no frames reports a few KB at most.
+Run from the repository root:
+    python -m benchmarks.bench_frames
+"""
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from utils.buffers import FramePool, letterbox_into
+from utils.keyframe import KeyframeScheduler
+from utils.visualization import Visualizer
+from benchmarks.bench_drawing import make_scene
+
+FRAME_SIZE = (640, 640)
+
+
+def legacy_stages(camera_frame, keyframe, annotate):
+    """The frame path before buffer pooling"""
+    frame = {}
+
+    def capture():
+        frame["image"] = cv2.resize(camera_frame.copy(), FRAME_SIZE)
+
+    def convert():
+        frame["image"] = cv2.cvtColor(frame["image"], cv2.COLOR_BGR2RGB)
+
+    def record():
+        cv2.cvtColor(frame["image"], cv2.COLOR_RGB2BGR)
+
+    return [
+        ("capture", capture),
+        ("keyframe", lambda: keyframe(frame["image"])),
+        ("convert", convert),
+        ("annotate", lambda: annotate(frame["image"])),
+        ("record", record),
+    ], ()
+
+
+def pooled_stages(camera_frame, keyframe, annotate):
+    pool = FramePool((FRAME_SIZE[1], FRAME_SIZE[0], 3), name="capture")
+    record_pool = FramePool(pool.shape, name="recorder")
+    raw = np.empty_like(camera_frame)
+    frame = {}
+
+    def capture():
+        np.copyto(raw, camera_frame)  # cv2.VideoCapture.read(raw) reuses its buffer the same way
+        frame["image"] = letterbox_into(raw, pool.acquire())
+
+    def record():
+        record_pool.release(record_pool.copy(frame["image"]))
+
+    def release():
+        pool.release(frame["image"])
+
+    return [
+        ("capture", capture),
+        ("keyframe", lambda: keyframe(frame["image"])),
+        ("annotate", lambda: annotate(frame["image"])),
+        ("record", record),
+        ("release", release),
+    ], (pool, record_pool)
+
+
+def run(stages, frames=100, warmup=10):
+    """Median time and peak traced bytes per stage"""
+    timings = {name: [] for name, _ in stages}
+    peaks = {name: 0 for name, _ in stages}
+    tracemalloc.start()
+    for index in range(warmup + frames):
+        for name, stage in stages:
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            start = time.perf_counter()
+            stage()
+            elapsed = time.perf_counter() - start
+            if index >= warmup:
+                timings[name].append(elapsed)
+                peaks[name] = max(peaks[name], tracemalloc.get_traced_memory()[1] - base)
+    tracemalloc.stop()
+    return {name: (np.median(timings[name]) * 1000, peaks[name]) for name, _ in stages}
+
+
+def main():
+    camera_frame = np.random.default_rng(0).integers(0, 255, (720, 1280, 3), dtype=np.uint8)
+    tracker, detections = make_scene(50, frames=40)
+    visualizer = Visualizer(tracker)
+    scheduler = KeyframeScheduler(motion_threshold=10)
+
+    def keyframe(image):
+        scheduler.should_detect(image)
+
+    def annotate(image):
+        visualizer.draw_detections(image, detections)
+
+    pools = ()
+    for title, make_stages in (("legacy", legacy_stages), ("pooled", pooled_stages)):
+        stages, pools = make_stages(camera_frame, keyframe, annotate)
+        print(f"{title}\n{'stage':>10} {'ms':>8} {'peak KB':>10}")
+        for name, (ms, peak) in run(stages).items():
+            print(f"{name:>10} {ms:>8.3f} {peak / 1024:>10.1f}")
+    for pool in pools:
+        print(f"{pool.name} pool: {pool.get_stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+# benchmarks/bench_matching.py
+"""Per-frame matching time of ObjectTracker.match_tracks for 10/100/1000 boxes
+
+Run from the repository root:
+    python -m benchmarks.bench_matching
+"""
+import time
+import numpy as np
+
+from utils.tracking import ObjectTracker
+
+
+def random_boxes(rng, n, size=640):
+    xy = rng.uniform(0, size - 60, (n, 2))
+    wh = rng.uniform(10, 60, (n, 2))
+    return np.hstack([xy, xy + wh]).astype(np.float32)
+
+
+def bench(num_boxes, cost="iou", frames=20, seed=0):
+    rng = np.random.default_rng(seed)
+    tracker = ObjectTracker(cost=cost)
+    boxes = random_boxes(rng, num_boxes)
+    tracker.update_boxes(boxes)
+
+    timings = []
+    for _ in range(frames):
+        # Jitter every box a little, as between two consecutive frames
+        detections = boxes + rng.normal(0, 2, boxes.shape).astype(np.float32)
+        start = time.perf_counter()
+        tracker.match_tracks(detections)
+        timings.append(time.perf_counter() - start)
+    return np.median(timings) * 1000
+
+
+def main():
+    print(f"{'boxes':>6} {'cost':>7} {'ms/frame':>10}")
+    for cost in ("iou", "giou", "center"):
+        for num_boxes in (10, 100, 1000):
+            frames = 5 if num_boxes >= 1000 else 20
+            print(f"{num_boxes:>6} {cost:>7} {bench(num_boxes, cost, frames):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
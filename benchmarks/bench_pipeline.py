@@ -0,0 +1,175 @@
+# benchmarks/bench_pipeline.py
+"""End-to-end latency of the detect -> track -> draw loop on recorded clips and images
+
+Replays each source through the same steps as the GUI pipeline, without the
+GUI, and reports p50/p95/p99 per stage, throughput and peak RSS. With
+--baseline the run fails when a stage's p95 regresses past --threshold.
+Run from the repository root:
+    python -m benchmarks.bench_pipeline data/Experiment clip.mp4 --output bench.json
+    python -m benchmarks.bench_pipeline data/Experiment --baseline bench.json
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import psutil
+
+from model_train.export import BACKENDS, load_model
+from utils.buffers import FramePool, letterbox_into
+from utils.detections import Detections
+from utils.headless import iter_frames
+from utils.keyframe import KeyframeScheduler
+from utils.recording import OpenCVWriter
+from utils.stats import DetectionStats
+from utils.tracking import ObjectTracker
+from utils.visualization import Visualizer
+
+STAGES = ("capture", "preprocess", "inference", "tracking", "drawing", "stats", "encode")
+FRAME_SIZE = (640, 640)
+
+
+def bench_source(model, source, timings, detect_interval=1, max_frames=None, process=None):
+    """Run one source, appending per-frame seconds to timings[stage]; returns frames and peak RSS"""
+    tracker = ObjectTracker()
+    visualizer = Visualizer(tracker)
+    stats = DetectionStats()
+    scheduler = KeyframeScheduler(detect_interval)
+    pool = FramePool((FRAME_SIZE[1], FRAME_SIZE[0], 3), name="capture")
+    peak_rss = 0
+    frames = 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        writer = OpenCVWriter(os.path.join(tmp, "bench.mp4"), 30.0, FRAME_SIZE)
+        source_frames = iter_frames(source)
+        while max_frames is None or frames < max_frames:
+            t0 = time.perf_counter()
+            item = next(source_frames, None)
+            if item is None:
+                break
+            t1 = time.perf_counter()
+            frame = letterbox_into(item[1], pool.acquire())
+            keyframe = scheduler.should_detect(frame)
+            t2 = time.perf_counter()
+            detections = Detections.from_results(model(frame, verbose=False)) if keyframe else None
+            t3 = time.perf_counter()
+            if detections is not None:
+                tracker.update(detections)
+            else:
+                tracks = tracker.predict()
+            t4 = time.perf_counter()
+            if detections is not None:
+                visualizer.draw_detections(frame, detections)
+            else:
+                visualizer.draw_tracks(frame, tracks)
+            t5 = time.perf_counter()
+            stats.update(detections if detections is not None else Detections())
+            t6 = time.perf_counter()
+            writer.write(frame)
+            t7 = time.perf_counter()
+            pool.release(frame)
+
+            marks = (t0, t1, t2, t3, t4, t5, t6, t7)
+            for stage, start, end in zip(STAGES, marks, marks[1:]):
+                timings[stage].append(end - start)
+            if process is not None:
+                peak_rss = max(peak_rss, process.memory_info().rss)
+            frames += 1
+        writer.release()
+    return frames, peak_rss
+
+
+def summarize(timings, frames, elapsed, peak_rss):
+    stages = {}
+    for stage in STAGES:
+        ms = np.asarray(timings[stage]) * 1000
+        stages[stage] = {
+            "p50_ms": round(float(np.percentile(ms, 50)), 3),
+            "p95_ms": round(float(np.percentile(ms, 95)), 3),
+            "p99_ms": round(float(np.percentile(ms, 99)), 3),
+            "mean_ms": round(float(ms.mean()), 3),
+        }
+    return {
+        "frames": frames,
+        "throughput_fps": round(frames / elapsed, 2) if elapsed > 0 else 0.0,
+        "peak_rss_mb": round(peak_rss / 1e6, 1),
+        "stages": stages,
+    }
+
+
+def compare(result, baseline, threshold, min_delta_ms):
+    """Regressions against a baseline: p95 per stage, plus throughput"""
+    failures = []
+    for stage, row in result["stages"].items():
+        reference = baseline.get("stages", {}).get(stage)
+        if reference is None:
+            continue
+        limit = max(reference["p95_ms"] * (1 + threshold), reference["p95_ms"] + min_delta_ms)
+        if row["p95_ms"] > limit:
+            failures.append(f"{stage}: p95 {row['p95_ms']:.3f} ms > {limit:.3f} ms (baseline {reference['p95_ms']:.3f})")
+    reference_fps = baseline.get("throughput_fps")
+    if reference_fps and result["throughput_fps"] < reference_fps / (1 + threshold):
+        failures.append(f"throughput: {result['throughput_fps']:.1f} FPS < baseline {reference_fps:.1f}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("sources", nargs="*", default=["data/Experiment"], help="Video files or image folders")
+    parser.add_argument("--weights", default="runs/detect/train/weights/best.pt")
+    parser.add_argument("--backend", default="pytorch", choices=BACKENDS)
+    parser.add_argument("--detect-interval", type=int, default=1)
+    parser.add_argument("--max-frames", type=int, help="Frames per source")
+    parser.add_argument("--warmup", type=int, default=3, help="Model calls before timing")
+    parser.add_argument("--output", help="Write the results as JSON")
+    parser.add_argument("--baseline", help="JSON from an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative p95 regression")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5, help="Ignore regressions smaller than this")
+    args = parser.parse_args()
+
+    model = load_model(args.weights, args.backend)
+    warmup_frame = np.zeros((FRAME_SIZE[1], FRAME_SIZE[0], 3), dtype=np.uint8)
+    for _ in range(args.warmup):
+        model(warmup_frame, verbose=False)
+
+    process = psutil.Process()
+    timings = {stage: [] for stage in STAGES}
+    frames = 0
+    peak_rss = 0
+    start = time.perf_counter()
+    for source in args.sources:
+        source_frames, source_rss = bench_source(
+            model, source, timings, args.detect_interval, args.max_frames, process
+        )
+        frames += source_frames
+        peak_rss = max(peak_rss, source_rss)
+    if frames == 0:
+        print("No frames read from the sources")
+        sys.exit(1)
+    result = summarize(timings, frames, time.perf_counter() - start, peak_rss)
+    result.update(sources=args.sources, backend=args.backend, detect_interval=args.detect_interval)
+
+    print(f"{'stage':>11} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for stage, row in result["stages"].items():
+        print(f"{stage:>11} {row['p50_ms']:>8.3f} {row['p95_ms']:>8.3f} {row['p99_ms']:>8.3f}")
+    print(f"{frames} frames, {result['throughput_fps']:.1f} FPS, peak RSS {result['peak_rss_mb']:.1f} MB")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures = compare(result, json.load(f), args.threshold, args.min_delta_ms)
+        for failure in failures:
+            print(f"REGRESSION {failure}")
+        if failures:
+            sys.exit(1)
+        print("No regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
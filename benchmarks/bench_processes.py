@@ -0,0 +1,124 @@
+# benchmarks/bench_processes.py
+"""Throughput of the threaded pipeline vs one process per stage as cores are added
+
+Both modes run capture -> inference -> tracking/drawing over the same
+source. The run is pinned to the first N cores with sched_setaffinity
+(inherited by the worker processes); threads share one GIL however many
+cores they get, the processes do not. Model load and worker start-up are
+excluded: throughput is measured from the first finished frame.
+Run from the repository root:
+    python -m benchmarks.bench_processes clip.mp4 --cores 1 2 4
+"""
+import argparse
+import os
+import threading
+import time
+
+from model_train.export import BACKENDS, load_model
+from utils.buffers import FramePool, letterbox_into
+from utils.detections import Detections
+from utils.headless import iter_frames
+from utils.multiprocess import ProcessPipeline
+from utils.pipeline import Pipeline, BLOCK
+from utils.stats import DetectionStats
+from utils.tracking import ObjectTracker
+from utils.visualization import Visualizer
+
+FRAME_SIZE = (640, 640)
+
+
+def throughput(finish_times):
+    """Frames per second between the first and last finished frame"""
+    if len(finish_times) < 2:
+        return 0.0
+    return (len(finish_times) - 1) / (finish_times[-1] - finish_times[0])
+
+
+def run_threads(model, source, max_frames=None):
+    tracker = ObjectTracker()
+    visualizer = Visualizer(tracker)
+    stats = DetectionStats()
+    pool = FramePool((FRAME_SIZE[1], FRAME_SIZE[0], 3), name="capture")
+    source_frames = iter_frames(source)
+    exhausted = threading.Event()
+    captured = [0]
+    finish_times = []
+
+    def capture():
+        item = next(source_frames, None) if max_frames is None or captured[0] < max_frames else None
+        if item is None:
+            exhausted.set()
+            time.sleep(0.01)
+            return None
+        captured[0] += 1
+        return letterbox_into(item[1], pool.acquire())
+
+    def inference(frame):
+        return frame, Detections.from_results(model(frame, verbose=False))
+
+    def render(item):
+        frame, detections = item
+        tracker.update(detections)
+        visualizer.draw_detections(frame, detections)
+        stats.update(detections)
+        pool.release(frame)
+        finish_times.append(time.perf_counter())
+
+    pipeline = Pipeline(queue_size=4, queue_policy=BLOCK)
+    pipeline.add_stage("capture", capture)
+    pipeline.add_stage("inference", inference)
+    pipeline.add_stage("render", render)
+    pipeline.start()
+    while not (exhausted.is_set() and len(finish_times) == captured[0]):
+        time.sleep(0.01)
+    pipeline.stop()
+    return len(finish_times), throughput(finish_times)
+
+
+def run_processes(weights, backend, source, max_frames=None):
+    pipeline = ProcessPipeline(source, load_model, (weights, backend), frame_size=FRAME_SIZE,
+                               drop_frames=False).start()
+    finish_times = []
+    try:
+        while not pipeline.finished and (max_frames is None or len(finish_times) < max_frames):
+            item = pipeline.get(timeout=0.5)
+            if item is None:
+                continue
+            pipeline.release(item[0])
+            finish_times.append(time.perf_counter())
+    finally:
+        pipeline.stop()
+    return len(finish_times), throughput(finish_times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", help="Video file or image folder")
+    parser.add_argument("--weights", default="runs/detect/train/weights/best.pt")
+    parser.add_argument("--backend", default="pytorch", choices=BACKENDS)
+    parser.add_argument("--cores", type=int, nargs="+", help="Core counts to pin the run to (default: all)")
+    parser.add_argument("--max-frames", type=int)
+    args = parser.parse_args()
+
+    if hasattr(os, "sched_setaffinity"):
+        available = sorted(os.sched_getaffinity(0))
+        core_counts = [n for n in (args.cores or [len(available)]) if n <= len(available)]
+    else:
+        print("CPU pinning is not available on this platform, using every core")
+        available, core_counts = None, [os.cpu_count()]
+
+    model = load_model(args.weights, args.backend)
+    print(f"{'cores':>5} {'threads FPS':>12} {'processes FPS':>14} {'speedup':>8}")
+    for cores in core_counts:
+        if available is not None:
+            os.sched_setaffinity(0, available[:cores])
+        _, thread_fps = run_threads(model, args.source, args.max_frames)
+        _, process_fps = run_processes(args.weights, args.backend, args.source, args.max_frames)
+        speedup = process_fps / thread_fps if thread_fps else 0.0
+        print(f"{cores:>5} {thread_fps:>12.1f} {process_fps:>14.1f} {speedup:>7.2f}x")
+    if available is not None:
+        os.sched_setaffinity(0, available)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# benchmarks/bench_reid.py
+"""ID switches and per-frame tracker time with and without appearance re-ID
+
+The synthetic scene has ground truth: colored objects cross an occluding
+band and come out on a different lane, so motion alone cannot carry their
+IDs across; an ID switch is counted whenever an object's track ID changes.
+Recorded clips (run through the detector) have no ground truth, so they
+report unique IDs created and IDs recovered by re-ID instead.
+Run from the repository root:
+    python -m benchmarks.bench_reid
+    python -m benchmarks.bench_reid clip.mp4 --weights runs/detect/train/weights/best.pt
+"""
+import argparse
+import time
+
+import numpy as np
+
+from utils.detections import Detections
+from utils.headless import iter_frames
+from utils.matching import linear_assignment
+from utils.reid import ReIDGallery
+from utils.tracking import ObjectTracker
+
+FRAME_SIZE = 640
+OCCLUDER = (260, 380)  # x range of the band that hides objects
+OBJECT_SIZE = (40, 80)
+
+
+def synthetic_scene(frames, num_objects, seed=0):
+    """Yield (frame, boxes, object_ids) of two-tone objects crossing an occluder"""
+    rng = np.random.default_rng(seed)
+    background = rng.integers(90, 130, (FRAME_SIZE, FRAME_SIZE, 3), dtype=np.uint8)
+    colors = rng.integers(0, 256, (num_objects, 2, 3), dtype=np.uint8)
+    lanes = np.linspace(40, FRAME_SIZE - 40 - OBJECT_SIZE[1], num_objects)
+    y = lanes.copy()
+    x = rng.uniform(0, FRAME_SIZE, num_objects)
+    speed = rng.uniform(2, 5, num_objects)
+    hidden = np.zeros(num_objects, dtype=bool)
+    width, height = OBJECT_SIZE
+
+    for _ in range(frames):
+        x = (x + speed + width) % (FRAME_SIZE + width) - width
+        centers = x + width / 2
+        now_hidden = (centers > OCCLUDER[0]) & (centers < OCCLUDER[1])
+        # Objects leave the occluder on another lane
+        emerged = hidden & ~now_hidden
+        y[emerged] = np.clip(y[emerged] + rng.choice([-1, 1], emerged.sum()) * rng.uniform(40, 90, emerged.sum()),
+                             0, FRAME_SIZE - height)
+        hidden = now_hidden
+
+        frame = background.copy()
+        visible = np.flatnonzero(~hidden & (x > 0) & (x + width < FRAME_SIZE))
+        boxes = np.stack([x, y, x + width, y + height], axis=1)[visible]
+        for index, (x1, y1, x2, y2) in zip(visible, boxes.astype(int)):
+            frame[y1:(y1 + y2) // 2, x1:x2] = colors[index, 0]
+            frame[(y1 + y2) // 2:y2, x1:x2] = colors[index, 1]
+        frame[:, OCCLUDER[0]:OCCLUDER[1]] = 40
+        boxes = boxes + rng.normal(0, 1.0, boxes.shape)
+        yield frame, boxes, visible
+
+
+def run_synthetic(reid, frames, num_objects):
+    tracker = ObjectTracker(reid=ReIDGallery() if reid else None)
+    last_ids = {}
+    switches = 0
+    seconds = []
+    for frame, boxes, object_ids in synthetic_scene(frames, num_objects):
+        data = np.zeros((len(boxes), 6), dtype=np.float32)
+        data[:, :4] = boxes
+        data[:, 4] = 0.9
+        detections = Detections(data, {0: "object"})
+        start = time.perf_counter()
+        tracker.update(detections, frame)
+        seconds.append(time.perf_counter() - start)
+        for object_id, track_id in zip(object_ids.tolist(), detections.track_ids.tolist()):
+            if track_id < 0:
+                continue
+            if object_id in last_ids and last_ids[object_id] != track_id:
+                switches += 1
+            last_ids[object_id] = track_id
+    return {
+        "id_switches": switches,
+        "unique_ids": tracker.next_id,
+        "recovered": tracker.reid.recovered if tracker.reid else 0,
+        "ms_per_frame": 1000 * float(np.mean(seconds)),
+    }
+
+
+def run_clip(model, source, reid, max_frames=None):
+    tracker = ObjectTracker(reid=ReIDGallery() if reid else None)
+    seen = set()
+    seconds = []
+    for frame_index, frame, _ in iter_frames(source):
+        if max_frames is not None and frame_index >= max_frames:
+            break
+        detections = Detections.from_results(model(frame, verbose=False))
+        start = time.perf_counter()
+        tracker.update(detections, frame)
+        seconds.append(time.perf_counter() - start)
+        seen.update(detections.tracked().track_ids.tolist())
+    return {
+        "id_switches": None,
+        "unique_ids": len(seen),
+        "recovered": tracker.reid.recovered if tracker.reid else 0,
+        "ms_per_frame": 1000 * float(np.mean(seconds)) if seconds else 0.0,
+    }
+
+
+def report(name, rows):
+    for mode, row in rows.items():
+        switches = "-" if row["id_switches"] is None else row["id_switches"]
+        print(f"{name:>24} {mode:>6} {switches:>9} {row['unique_ids']:>10} {row['recovered']:>10} "
+              f"{row['ms_per_frame']:>12.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("sources", nargs="*", help="Recorded clips or image folders to run through the detector")
+    parser.add_argument("--weights", default="runs/detect/train/weights/best.pt")
+    parser.add_argument("--backend", default="pytorch")
+    parser.add_argument("--frames", type=int, default=1000, help="Frames of the synthetic scene")
+    parser.add_argument("--objects", type=int, default=6)
+    parser.add_argument("--max-frames", type=int, help="Frames per recorded clip")
+    args = parser.parse_args()
+
+    # Import the assignment solver before anything is timed
+    linear_assignment(np.zeros((1, 1)), 1.0)
+    print(f"{'source':>24} {'re-ID':>6} {'switches':>9} {'unique IDs':>10} {'recovered':>10} {'ms / frame':>12}")
+    report("synthetic", {
+        "off": run_synthetic(False, args.frames, args.objects),
+        "on": run_synthetic(True, args.frames, args.objects),
+    })
+    if not args.sources:
+        return
+
+    from model_train.export import load_model
+
+    model = load_model(args.weights, args.backend)
+    for source in args.sources:
+        report(source[-24:], {
+            "off": run_clip(model, source, False, args.max_frames),
+            "on": run_clip(model, source, True, args.max_frames),
+        })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# benchmarks/bench_soak.py
+"""Tracker memory over a long run with objects constantly entering and leaving
+
+Run from the repository root (10M frames takes a while, use --frames for a quick check):
+    python -m benchmarks.bench_soak --frames 10000000
+
+Exits with status 1 when RSS grows more than --max-growth-mb after the
+first report (the warm-up), or when the number of live tracks exceeds
+what the scene can produce, so it can gate CI.
+"""
+import argparse
+import math
+import sys
+import time
+
+import numpy as np
+import psutil
+
+from utils.tracking import ObjectTracker
+
+
+def scene(rng, frame_index, num_objects, lifetime):
+    """Boxes of objects that each live for `lifetime` frames before a new one replaces them"""
+    generation = (frame_index + np.arange(num_objects) * lifetime // num_objects) // lifetime
+    offsets = (generation * 7919 + np.arange(num_objects) * 104729) % 560
+    x = offsets + (frame_index % lifetime)
+    y = (np.arange(num_objects) * 37 + generation * 13) % 560
+    boxes = np.stack([x, y, x + 40, y + 40], axis=1).astype(np.float32)
+    jitter = rng.normal(0, 1, boxes.shape).astype(np.float32)
+    return boxes + jitter
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=10_000_000)
+    parser.add_argument("--objects", type=int, default=20)
+    parser.add_argument("--lifetime", type=int, default=60, help="Frames each object stays in view")
+    parser.add_argument("--report-every", type=int, default=100_000)
+    parser.add_argument("--max-growth-mb", type=float, default=5.0, help="Allowed RSS growth after the warm-up")
+    parser.add_argument("--max-live", type=int,
+                        help="Allowed live tracks (default: current objects plus those still waiting to expire)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    process = psutil.Process()
+    tracker = ObjectTracker()
+    start = time.perf_counter()
+    baseline = None
+    # Every object is replaced once per lifetime and its old track lingers max_lost_frames more,
+    # plus one more generation of headroom for tentative tracks
+    max_live = args.max_live or args.objects * (2 + math.ceil((tracker.max_lost_frames + 1) / args.lifetime))
+    peak_live = 0
+    failures = []
+
+    print(f"{'frame':>10} {'ids seen':>10} {'live':>6} {'rss MB':>8} {'growth MB':>10} {'fps':>8}")
+    for frame_index in range(args.frames):
+        tracker.update_boxes(scene(rng, frame_index, args.objects, args.lifetime))
+        peak_live = max(peak_live, len(tracker.slots))
+
+        if (frame_index + 1) % args.report_every == 0:
+            rss = process.memory_info().rss / 1e6
+            baseline = rss if baseline is None else baseline
+            fps = (frame_index + 1) / (time.perf_counter() - start)
+            print(f"{frame_index + 1:>10} {tracker.next_id:>10} {len(tracker.slots):>6} "
+                  f"{rss:>8.1f} {rss - baseline:>10.1f} {fps:>8.0f}")
+
+    if baseline is not None and rss - baseline > args.max_growth_mb:
+        failures.append(f"RSS grew {rss - baseline:.1f} MB after the warm-up (limit {args.max_growth_mb} MB)")
+    if peak_live > max_live:
+        failures.append(f"{peak_live} live tracks at the peak (limit {max_live})")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print(f"OK: at most {peak_live} live tracks (limit {max_live})")
+
+
+if __name__ == "__main__":
+    main()
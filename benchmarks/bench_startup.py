@@ -0,0 +1,92 @@
+# benchmarks/bench_startup.py
+"""Startup cost: module import times, camera probing and model load/warm-up
+
+Imports are timed in fresh interpreters. Camera probing compares the old
+serial loop with the parallel probe and the cached list the GUI now starts
+from. Model load and warm-up are what the GUI's background thread hides.
+Run from the repository root:
+    python -m benchmarks.bench_startup --weights runs/detect/train/weights/best.pt
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from utils.video_stream import Camera
+
+MODULES = ("utils.tracking", "utils.headless", "gui.main")
+
+
+def import_time(module, repeats=3):
+    """Median seconds to import a module in a new interpreter"""
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    timings = []
+    for _ in range(repeats):
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+        if result.returncode != 0:
+            return None
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+    return float(np.median(timings))
+
+
+def serial_probe(max_index=5):
+    """The original probe: open and release each index one after another"""
+    found = []
+    for i in range(max_index):
+        cap = cv2.VideoCapture(i)
+        if cap is not None and cap.isOpened():
+            found.append(str(i))
+            cap.release()
+    return found
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--weights", default="runs/detect/train/weights/best.pt")
+    parser.add_argument("--backend", default="pytorch")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'step':>28} {'ms':>9}")
+    for module in MODULES:
+        seconds = import_time(module, args.repeats)
+        print(f"{'import ' + module:>28} {seconds * 1000:>9.1f}" if seconds is not None
+              else f"{'import ' + module:>28} {'failed':>9}")
+
+    cache_path = os.path.join("runs", "bench_cameras.json")
+    print(f"{'serial camera probe':>28} {timed(serial_probe) * 1000:>9.1f}")
+    print(f"{'parallel camera probe':>28} {timed(Camera.get_available_cameras, cache_path=cache_path) * 1000:>9.1f}")
+    print(f"{'cached camera list':>28} {timed(Camera.cached_cameras, cache_path) * 1000:>9.1f}")
+    if os.path.exists(cache_path):
+        os.remove(cache_path)
+
+    if not os.path.exists(args.weights):
+        print(f"Skipping model load, {args.weights} not found")
+        return
+    from model_train.export import load_model
+
+    start = time.perf_counter()
+    model = load_model(args.weights, args.backend)
+    loaded = time.perf_counter()
+    frame = np.zeros((640, 640, 3), dtype=np.uint8)
+    model(frame, verbose=False)
+    warm = time.perf_counter()
+    model(frame, verbose=False)
+    steady = time.perf_counter()
+    print(f"{'model load':>28} {(loaded - start) * 1000:>9.1f}")
+    print(f"{'first inference (warm-up)':>28} {(warm - loaded) * 1000:>9.1f}")
+    print(f"{'second inference':>28} {(steady - warm) * 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
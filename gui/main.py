@@ -1,67 +1,209 @@
 import customtkinter as ctk
 import cv2
-from PIL import Image, ImageTk
 import threading
 import time
-from ultralytics import YOLO
 import tkinter as tk
 from tkinter import messagebox
 import numpy as np
-from datetime import datetime
 import os
 
 from utils.video_stream import Camera
 from utils.tracking import ObjectTracker
+from utils.matching import linear_assignment
 from utils.visualization import Visualizer
 from utils.stats import DetectionStats
+from utils.detections import Detections
+from utils.pipeline import Pipeline, DROP_OLDEST
+from utils.buffers import FramePool, letterbox_into, letterbox_geometry
+from utils.profiling import profiler, draw_hud
+from utils.keyframe import KeyframeScheduler
+from model_train.export import load_model as load_backend_model
+# Optional features (process mode, tiling, re-ID, latency control, metrics, the
+# event log and recording) import their modules when used, so the window opens sooner
 
 class ObjectDetectionApp:
-    def __init__(self, model_path):
+    def __init__(self, model_path, backend="pytorch", queue_size=2, queue_policy=DROP_OLDEST,
+                 detect_interval=1, motion_threshold=None, uncertainty_threshold=None, metrics_port=None,
+                 display_fps=60, stats_rate=4, record_backend="opencv", record_preset="veryfast",
+                 segment_seconds=None, max_segments=None, event_classes=None, pre_event_seconds=5.0,
+                 tiling=None, events_dir=None, profile_path=None, processes=False, target_fps=None,
+                 target_latency_ms=None, reid=False, metrics_host="127.0.0.1"):
         self.app = ctk.CTk()
         self.app.title("Real-time Object Detection and Tracking")
         self.app.geometry("1200x800")
         self.model_path = model_path
+        self.backend = backend
         
         # Initialize core attributes
         self.camera = None
         self.is_running = False
-        self.video_thread = None
+        self.pipeline = None
+        self.queue_size = queue_size
+        self.queue_policy = queue_policy
         self.frame_size = (640, 640)
+        
+        # With processes, capture, inference and tracking/drawing run in worker
+        # processes over shared memory and the Tk thread only displays frames
+        self.processes = processes
+        self.process_pipeline = None
+        
+        # Frames stay BGR end to end and live in pooled buffers: letterboxed once
+        # at capture, annotated in place, released after display
+        self.frame_pool = FramePool((self.frame_size[1], self.frame_size[0], 3), name="capture")
+        self.raw_frame = None
+        
+        # Tiled mode detects on the full-resolution frame, kept in its own pool
+        self.tiling = tiling
+        self.tiler = None
+        self.full_pool = None
         self.recording = False
-        self.video_writer = None
+        self.recorder = None
+        self.event_recorder = None
+        self.record_options = {
+            "backend": record_backend,
+            "preset": record_preset,
+            "segment_seconds": segment_seconds,
+            "max_segments": max_segments,
+        }
+        self.event_classes = event_classes
+        self.pre_event_seconds = pre_event_seconds
+        self.capture_fps = 30.0
+        self.last_capture_time = None
         
-        # Initialize tracking and visualization
-        self.tracker = ObjectTracker()
+        # The pipeline only fills this single-slot buffer; widgets are updated
+        # from the Tk thread at display_fps, statistics at stats_rate Hz
+        self.frame_lock = threading.Lock()
+        self.latest_frame = None
+        self.frames_rendered = 0
+        self.pipeline_error = None
+        self.render_interval_ms = max(1, int(1000 / display_fps))
+        self.stats_interval = 1.0 / stats_rate
+        self.last_stats_time = 0.0
+        self.last_stats_frames = 0
+        self.widget_text = {}
+        self.photo = None
+        
+        # Initialize tracking and visualization; re-ID recovers IDs after occlusion
+        self.reid = reid
+        gallery = None
+        if reid:
+            from utils.reid import ReIDGallery
+            gallery = ReIDGallery()
+        self.tracker = ObjectTracker(reid=gallery)
         self.visualizer = Visualizer(self.tracker)
         self.stats = DetectionStats()
         
+        # Run the detector on keyframes only, tracks are predicted in between
+        self.scheduler = KeyframeScheduler(detect_interval, motion_threshold, uncertainty_threshold)
+        
+        # Under a latency budget, trade inference size, detector interval and
+        # overlay detail for speed as the measured stage timings demand
+        self.inference_options = {}
+        self.controller = None
+        if target_fps or target_latency_ms:
+            from utils.adaptive import LatencyController, operating_points
+            self.controller = LatencyController(
+                target_fps,
+                target_latency_ms,
+                operating_points(backend),
+                on_change=self.apply_operating_point
+            )
+            self.apply_operating_point(self.controller.point)
+        
+        # Serve statistics over HTTP for monitoring without the GUI
+        self.metrics_server = None
+        if metrics_port:
+            from utils.metrics import MetricsServer
+            self.metrics_server = MetricsServer(metrics_port, metrics_host).start()
+            self.metrics_server.register("camera", self.stats)
+        
+        # Persist tracked detections for later queries
+        self.event_log = None
+        if events_dir:
+            from utils.events import TrackEventLog
+            self.event_log = TrackEventLog(events_dir).start()
+        
         # Create output directory
         self.output_dir = "recordings"
         os.makedirs(self.output_dir, exist_ok=True)
         
-        # Load model
-        try:
-            self.model = self.load_model()
-            if self.model is None:
-                raise Exception("Failed to load model")
-        except Exception as e:
-            messagebox.showerror("Error", f"Error loading model: {e}")
-            self.model = None
+        # Stage timings for the HUD; a trace can be exported from the GUI or with SIGUSR1
+        self.trace_path = profile_path or os.path.join(self.output_dir, "trace.json")
+        self.export_on_close = profile_path is not None
+        profiler.enabled = profile_path is not None
+        profiler.install_signal_handler(self.trace_path)
+        self.hud_stats = {}
+        self.last_hud_time = 0.0
+        
+        # The model loads and the cameras are probed in the background so the
+        # window appears right away; render_tick picks up the results
+        self.model = None
+        self.model_status = "loading"
+        self.model_error = None
+        self.probed_cameras = None
         
         # Setup UI
         self.setup_ui()
         
+        if processes:
+            # The inference worker loads its own copy of the model
+            self.model_status = "ready"
+        else:
+            threading.Thread(target=self.load_model_in_background, daemon=True).start()
+        threading.Thread(target=self.probe_cameras, daemon=True).start()
+        
         # Bind window close event
         self.app.protocol("WM_DELETE_WINDOW", self.on_closing)
     
     def load_model(self):
         try:
-            model = YOLO(self.model_path)  # or your custom model path
+            model = load_backend_model(self.model_path, self.backend)
             return model
         except Exception as e:
             print(f"Error loading model: {e}")
             return None
     
+    def load_model_in_background(self):
+        try:
+            model = self.load_model()
+            if model is None:
+                raise Exception("Failed to load model")
+            
+            # A dummy inference pays for lazy initialisation before the first real frame,
+            # and one assignment imports the tracker's solver before the first keyframe
+            model(np.zeros((self.frame_size[1], self.frame_size[0], 3), dtype=np.uint8), verbose=False)
+            linear_assignment(np.zeros((1, 1)), 1.0)
+            
+            if self.tiling:
+                from utils.tiling import TiledDetector
+                self.tiler = TiledDetector(model, **self.tiling)
+            self.model = model
+            self.model_status = "ready"
+        except Exception as e:
+            self.model_error = e
+            self.model_status = "failed"
+    
+    def probe_cameras(self):
+        self.probed_cameras = Camera.get_available_cameras()
+    
+    def check_background_tasks(self):
+        """Runs on the Tk thread: reflect model loading and camera probing in the UI"""
+        if self.model_status != "loading" and self.loading_bar is not None:
+            self.loading_bar.stop()
+            self.loading_bar.pack_forget()
+            self.loading_bar = None
+            if self.model_status == "failed":
+                messagebox.showerror("Error", f"Error loading model: {self.model_error}")
+                self.status_label.configure(text="Status: Model failed to load", text_color="red")
+            elif not self.is_running:
+                self.status_label.configure(text="Status: Ready", text_color="yellow")
+        
+        if self.probed_cameras is not None:
+            cameras, self.probed_cameras = self.probed_cameras, None
+            self.camera_dropdown.configure(values=cameras)
+            if self.camera_var.get() not in cameras:
+                self.camera_var.set(cameras[0])
+    
     def setup_ui(self):
         # Main frame
         self.main_frame = ctk.CTkFrame(self.app)
@@ -107,6 +249,14 @@ class ObjectDetectionApp:
         )
         self.class_counts_text.pack(pady=5)
         
+        self.operating_point_label = ctk.CTkLabel(
+            self.stats_frame,
+            text="Operating point: fixed",
+            justify="left",
+            wraplength=180
+        )
+        self.operating_point_label.pack(pady=5)
+        
         # Video frame
         self.video_frame = ctk.CTkFrame(self.main_frame)
         self.video_frame.pack(fill="both", expand=True, padx=10, pady=10)
@@ -128,7 +278,7 @@ class ObjectDetectionApp:
         self.camera_var = tk.StringVar(value="0")
         self.camera_dropdown = ctk.CTkOptionMenu(
             self.controls_frame,
-            values=Camera.get_available_cameras(),
+            values=Camera.cached_cameras(),
             variable=self.camera_var
         )
         self.camera_dropdown.pack(side="left", padx=5)
@@ -149,6 +299,21 @@ class ObjectDetectionApp:
         )
         self.record_button.pack(side="left", padx=5)
         
+        # Profiler controls
+        self.profile_button = ctk.CTkButton(
+            self.controls_frame,
+            text="Profiler: On" if profiler.enabled else "Profiler: Off",
+            command=self.toggle_profiler
+        )
+        self.profile_button.pack(side="left", padx=5)
+        
+        self.trace_button = ctk.CTkButton(
+            self.controls_frame,
+            text="Export Trace",
+            command=self.export_trace
+        )
+        self.trace_button.pack(side="left", padx=5)
+        
         # FPS display
         self.fps_label = ctk.CTkLabel(
             self.controls_frame,
@@ -156,37 +321,63 @@ class ObjectDetectionApp:
         )
         self.fps_label.pack(side="right", padx=5)
         
+        # Pipeline stage queue depth and latency
+        self.pipeline_label = ctk.CTkLabel(
+            self.stats_frame,
+            text="Pipeline: idle",
+            justify="left"
+        )
+        self.pipeline_label.pack(pady=5)
+        
         # Status label
         self.status_label = ctk.CTkLabel(
             self.main_frame,
-            text="Status: Ready",
+            text="Status: Loading model...",
             text_color="yellow"
         )
         self.status_label.pack(fill="x", padx=10, pady=5)
+        
+        # Shown until the background model load and warm-up finish
+        self.loading_bar = ctk.CTkProgressBar(self.main_frame, mode="indeterminate")
+        self.loading_bar.pack(fill="x", padx=10, pady=5)
+        self.loading_bar.start()
     
     def toggle_recording(self):
         if not self.recording and self.is_running:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = os.path.join(self.output_dir, f"detection_{timestamp}.mp4")
-            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-            self.video_writer = cv2.VideoWriter(
-                filename,
-                fourcc,
-                30.0,
-                self.frame_size
-            )
+            # Encoding runs on the recorder's own thread at the measured capture rate
+            from utils.recording import Recorder
+            self.recorder = Recorder(
+                self.output_dir,
+                self.frame_size,
+                fps=round(self.capture_fps, 1),
+                **self.record_options
+            ).start()
             self.recording = True
             self.record_button.configure(text="Stop Recording")
             self.status_label.configure(text="Status: Recording", text_color="red")
         else:
-            if self.video_writer:
-                self.video_writer.release()
-                self.video_writer = None
+            recorder, self.recorder = self.recorder, None
+            if recorder:
+                recorder.stop()
             self.recording = False
             self.record_button.configure(text="Start Recording")
             if self.is_running:
                 self.status_label.configure(text="Status: Running", text_color="green")
     
+    def toggle_profiler(self):
+        if not profiler.enabled:
+            profiler.clear()
+        profiler.enabled = not profiler.enabled
+        self.hud_stats = {}
+        self.profile_button.configure(text="Profiler: On" if profiler.enabled else "Profiler: Off")
+    
+    def export_trace(self):
+        try:
+            path = profiler.export_chrome_trace(self.trace_path)
+            self.status_label.configure(text=f"Status: Trace written to {path}", text_color="green")
+        except Exception as e:
+            messagebox.showerror("Error", f"Error exporting trace: {e}")
+    
     def toggle_camera(self):
         if self.is_running:
             self.stop_camera()
@@ -196,21 +387,31 @@ class ObjectDetectionApp:
     def start_camera(self):
         try:
             camera_index = int(self.camera_var.get())
+            if self.processes:
+                # The capture rate and the event recorder follow once the capture process reports its FPS
+                self.start_process_pipeline(camera_index)
+                return
             self.camera = Camera.load_camera(camera_index)
             
             if self.camera:
                 self.video_label.configure(text="")
-                self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, self.frame_size[0])
-                self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, self.frame_size[1])
+                if not self.tiling:
+                    self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, self.frame_size[0])
+                    self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, self.frame_size[1])
                 
                 self.is_running = True
                 self.toggle_button.configure(text="Stop")
                 self.status_label.configure(text="Status: Running", text_color="green")
                 self.record_button.configure(state="normal")
                 
-                self.video_thread = threading.Thread(target=self.update_frame)
-                self.video_thread.daemon = True
-                self.video_thread.start()
+                fps = self.camera.get(cv2.CAP_PROP_FPS)
+                self.capture_fps = fps if fps and fps > 0 else 30.0
+                self.last_capture_time = None
+                
+                self.start_event_recorder()
+                
+                self.pipeline = self.build_pipeline()
+                self.pipeline.start()
                 
         except Exception as e:
             error_msg = f"Error starting camera: {e}"
@@ -224,107 +425,374 @@ class ObjectDetectionApp:
             self.status_label.configure(text="Status: Error", text_color="red")
             self.record_button.configure(state="disabled")
     
+    def apply_operating_point(self, point):
+        # Called from the annotate stage; the next frames pick the new settings up
+        if not self.tiling:
+            self.inference_options = {"imgsz": point["imgsz"]}
+        self.scheduler.interval = point["detect_interval"]
+        self.visualizer.set_detail(point["detail"])
+    
+    def start_event_recorder(self):
+        # Keep the last few seconds in memory and record when a chosen class appears
+        if self.event_classes:
+            from utils.recording import EventRecorder
+            self.event_recorder = EventRecorder(
+                self.event_classes,
+                pre_seconds=self.pre_event_seconds,
+                output_dir=self.output_dir,
+                frame_size=self.frame_size,
+                fps=round(self.capture_fps, 1),
+                **self.record_options
+            )
+    
+    def start_process_pipeline(self, camera_index):
+        from utils.multiprocess import ProcessPipeline
+        self.process_pipeline = ProcessPipeline(
+            str(camera_index),
+            load_backend_model,
+            (self.model_path, self.backend),
+            frame_size=self.frame_size,
+            detect_interval=self.scheduler.interval,
+            motion_threshold=self.scheduler.motion_threshold,
+            uncertainty_threshold=self.scheduler.uncertainty_threshold,
+            reid=self.reid
+        ).start()
+        self.video_label.configure(text="")
+        self.is_running = True
+        self.toggle_button.configure(text="Stop")
+        self.status_label.configure(text="Status: Running", text_color="green")
+        self.record_button.configure(state="normal")
+    
     def stop_camera(self):
         self.is_running = False
+        if self.pipeline is not None:
+            self.pipeline.stop()
+            self.pipeline = None
+        if self.process_pipeline is not None:
+            self.process_pipeline.stop()
+            self.process_pipeline = None
         if self.camera is not None:
             self.camera.release()
             self.camera = None
+        if self.event_recorder is not None:
+            self.event_recorder.stop()
+            self.event_recorder = None
         self.toggle_button.configure(text="Start")
         self.status_label.configure(text="Status: Stopped", text_color="yellow")
         self.record_button.configure(state="disabled")
         if self.recording:
             self.toggle_recording()
     
+    def set_text(self, widget, text):
+        """Configure a label only when its text actually changed"""
+        if self.widget_text.get(widget) != text:
+            self.widget_text[widget] = text
+            widget.configure(text=text)
+    
     def update_statistics(self, stats):
-        self.total_detections_label.configure(
-            text=f"Total Detections: {stats['total_detections']}"
-        )
-        self.avg_conf_label.configure(
-            text=f"Avg Confidence: {stats['avg_confidence']:.1f}%"
-        )
-        self.unique_objects_label.configure(
-            text=f"Unique Objects: {stats['unique_objects']}"
-        )
+        self.set_text(self.total_detections_label, f"Total Detections: {stats['total_detections']}")
+        self.set_text(self.avg_conf_label, f"Avg Confidence: {stats['avg_confidence']:.1f}%")
+        self.set_text(self.unique_objects_label, f"Unique Objects: {stats['unique_objects']}")
         
         class_counts_str = "Class Counts:\n"
         for cls, count in sorted(stats['class_counts'].items()):
             class_counts_str += f"{cls}: {count}\n"
-        self.class_counts_text.delete("1.0", tk.END)
-        self.class_counts_text.insert("1.0", class_counts_str)
+        if self.widget_text.get(self.class_counts_text) != class_counts_str:
+            self.widget_text[self.class_counts_text] = class_counts_str
+            self.class_counts_text.delete("1.0", tk.END)
+            self.class_counts_text.insert("1.0", class_counts_str)
     
-    def draw_detections(self, frame, results):
-        if results and len(results) > 0:
-            # Update tracking and draw detections
-            track_matches = self.tracker.update(results, results[0].boxes)
-            frame = self.visualizer.draw_detections(frame, results, track_matches)
-            
-            # Update statistics
-            self.stats.update(results, track_matches)
-            self.update_statistics(self.stats.get_summary())
+    def draw_detections(self, frame, detections):
+        # Track, draw and count from the same detection array; empty frames still age the tracks
+        with profiler.section("tracking"):
+            self.tracker.update(detections, frame)
+        with profiler.section("drawing"):
+            frame = self.visualizer.draw_detections(frame, detections)
+        
+        # Update statistics
+        with profiler.section("stats"):
+            self.stats.update(detections)
         
         return frame
     
-    def update_frame(self):
-        last_time = time.time()
-        fps_update_interval = 0.1
-        fps_counter = 0
+    def build_pipeline(self):
+        """Capture -> inference -> tracking/annotation -> render/record stages"""
+        pipeline = Pipeline(
+            self.queue_size,
+            self.queue_policy,
+            on_error=self.on_pipeline_error,
+            on_drop=self.release_item
+        )
+        pipeline.add_stage("capture", self.capture_frame)
+        pipeline.add_stage("inference", self.run_inference)
+        pipeline.add_stage("annotate", self.annotate_frame)
+        pipeline.add_stage("render", self.render_frame)
+        return pipeline
+    
+    def release_item(self, item):
+        self.frame_pool.release(item["frame"])
+        if item.get("full") is not None:
+            self.full_pool.release(item["full"])
+    
+    @profiler.timed("capture")
+    def capture_frame(self):
+        ret, frame = self.camera.read(self.raw_frame)
+        if not ret:
+            raise Exception("Failed to grab frame")
+        self.raw_frame = frame
+        
+        # Track the real capture rate for recording timestamps
+        now = time.time()
+        if self.last_capture_time is not None and now > self.last_capture_time:
+            self.capture_fps = 0.95 * self.capture_fps + 0.05 / (now - self.last_capture_time)
+        self.last_capture_time = now
+        
+        item = {"frame": letterbox_into(frame, self.frame_pool.acquire()), "time": now}
+        if self.tiler is not None:
+            if self.full_pool is None or self.full_pool.shape != frame.shape:
+                self.full_pool = FramePool(frame.shape, name="full")
+            item["full"] = self.full_pool.copy(frame)
+        return item
+    
+    def run_inference(self, item):
+        start = time.perf_counter()
+        with profiler.section("keyframe"):
+            item["keyframe"] = self.scheduler.should_detect(item["frame"])
+        item["detections"] = None
+        full = item.pop("full", None)
+        if self.model is not None and item["keyframe"]:
+            with profiler.section("inference"):
+                if full is not None:
+                    # Detect on full-resolution tiles, then map boxes onto the letterboxed display frame
+                    scale, left, top = letterbox_geometry(full.shape, item["frame"].shape)
+                    item["detections"] = self.tiler(full).transform(scale, left, top)
+                else:
+                    item["detections"] = Detections.from_results(
+                        self.model(item["frame"], verbose=False, **self.inference_options)
+                    )
+        if full is not None:
+            self.full_pool.release(full)
+        item["costs"] = {"inference": time.perf_counter() - start}
+        return item
+    
+    def annotate_frame(self, item):
+        start = time.perf_counter()
+        item["classes"] = ()
+        detections = item["detections"]
+        if detections is not None:
+            item["frame"] = self.draw_detections(item["frame"], detections)
+            if self.event_log is not None:
+                self.event_log.append(detections, item["time"], "camera")
+            item["classes"] = {detections.names.get(cls, "") for cls in set(detections.cls.tolist())}
+        elif self.model is not None:
+            with profiler.section("tracking"):
+                tracks = self.tracker.predict()
+            with profiler.section("drawing"):
+                item["frame"] = self.visualizer.draw_tracks(item["frame"], tracks)
+            with profiler.section("stats"):
+                self.stats.update(Detections())
+        if self.model is not None:
+            # The inference stage reads this snapshot instead of the tracker it does not own
+            self.scheduler.observe(self.tracker)
+        
+        if profiler.enabled:
+            # Percentiles are recomputed twice a second, the overlay itself is cheap
+            if item["time"] - self.last_hud_time >= 0.5:
+                self.hud_stats = profiler.get_stats()
+                self.last_hud_time = item["time"]
+            draw_hud(item["frame"], self.hud_stats)
+        
+        if self.controller is not None:
+            item["costs"]["annotate"] = time.perf_counter() - start
+            self.controller.observe(item["costs"])
+        return item
+    
+    def render_frame(self, item):
+        frame = item["frame"]
+        
+        # Record if active; recorders copy the frame and encode on their own threads
+        with profiler.section("record"):
+            recorder = self.recorder
+            if recorder is not None:
+                recorder.write(frame, item["time"])
+            event_recorder = self.event_recorder
+            if event_recorder is not None:
+                event_recorder.write(frame, item["time"], item["classes"])
+        
+        # Hand the frame to the Tk thread, recycling any frame it has not shown yet
+        with self.frame_lock:
+            skipped, self.latest_frame = self.latest_frame, frame
+            self.frames_rendered += 1
+        self.frame_pool.release(skipped)
+    
+    def render_tick(self):
+        """Runs on the Tk thread: show the freshest frame and refresh statistics"""
+        self.check_background_tasks()
         
-        while self.is_running:
+        if self.pipeline_error is not None:
+            stage_name, error = self.pipeline_error
+            self.pipeline_error = None
+            self.stop_camera()
+            self.status_label.configure(text=f"Status: Error - {str(error)}", text_color="red")
+        
+        if self.process_pipeline is not None:
             try:
-                ret, frame = self.camera.read()
-                if not ret:
-                    raise Exception("Failed to grab frame")
-                
-                # Process frame
-                frame = cv2.resize(frame, self.frame_size)
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                
-                # Run detection with tracking
-                if self.model is not None:
-                    results = self.model(frame_rgb, verbose=False)
-                    frame_rgb = self.draw_detections(frame_rgb, results)
-                
-                # Record if active
-                if self.recording and self.video_writer:
-                    self.video_writer.write(cv2.cvtColor(frame_rgb, cv2.COLOR_RGB2BGR))
-                
-                # Update UI
-                self.update_ui(frame_rgb)
-                
-                # Calculate FPS
-                fps_counter += 1
-                current_time = time.time()
-                if current_time - last_time > fps_update_interval:
-                    fps = fps_counter / (current_time - last_time)
-                    self.fps_label.configure(text=f"FPS: {fps:.1f}")
-                    fps_counter = 0
-                    last_time = current_time
-                
-                # Small delay to prevent high CPU usage
-                time.sleep(0.001)
-                
+                self.show_process_frame()
             except Exception as e:
-                print(f"Error in update_frame: {e}")
-                self.stop_camera()
-                self.status_label.configure(text=f"Status: Error - {str(e)}", text_color="red")
+                self.pipeline_error = ("processes", e)
+        
+        with self.frame_lock:
+            frame, self.latest_frame = self.latest_frame, None
+        if frame is not None:
+            with profiler.section("tk_update"):
+                self.update_ui(frame)
+            self.frame_pool.release(frame)
+        
+        current_time = time.time()
+        elapsed = current_time - self.last_stats_time
+        if elapsed >= self.stats_interval:
+            if self.is_running:
+                frames = self.frames_rendered
+                self.set_text(self.fps_label, f"FPS: {(frames - self.last_stats_frames) / elapsed:.1f}")
+                self.last_stats_frames = frames
+                if self.process_pipeline is not None:
+                    self.update_statistics(self.process_pipeline.summary)
+                else:
+                    self.update_statistics(self.stats.get_summary())
+                self.update_pipeline_stats()
+                if self.controller is not None:
+                    from utils.adaptive import describe
+                    controller = self.controller
+                    self.set_text(
+                        self.operating_point_label,
+                        f"Operating point: {describe(controller.point)} (load {controller.load:.2f})"
+                    )
+            self.last_stats_time = current_time
+        
+        self.app.after(self.render_interval_ms, self.render_tick)
+    
+    def show_process_frame(self):
+        """Record every frame from the worker processes and display the newest, handing older ones straight back"""
+        latest = None
+        while True:
+            item = self.process_pipeline.get(timeout=0)
+            if item is None:
                 break
+            if latest is not None:
+                self.process_pipeline.release(latest[0])
+            latest = item
+            self.frames_rendered += 1
+            if self.event_recorder is None and self.event_classes:
+                # The capture process has sent a frame, so it has reported the source's FPS
+                self.capture_fps = self.process_pipeline.fps() or 30.0
+                self.start_event_recorder()
+            
+            # Recorders copy the frame, so the slot can go back as soon as it is shown
+            slot, frame, info = item
+            recorder = self.recorder
+            if recorder is not None:
+                recorder.write(frame, info["time"])
+            if self.event_recorder is not None:
+                self.event_recorder.write(frame, info["time"], info["classes"])
+        if self.process_pipeline.finished:
+            raise Exception("Failed to grab frame")
+        if latest is None:
+            return
+        
+        slot, frame, info = latest
+        with profiler.section("tk_update"):
+            self.update_ui(frame)
+        self.process_pipeline.release(slot)
+    
+    def update_pipeline_stats(self):
+        if self.process_pipeline is not None:
+            stats = self.process_pipeline.get_stats()
+            lines = ["Processes (alive / restarts):"]
+            for name, worker in stats.items():
+                if name != "dropped":
+                    lines.append(f"{name}: {'yes' if worker['alive'] else 'no'} / {worker['restarts']}")
+            lines.append(f"Dropped frames: {stats['dropped']}")
+            self.set_text(self.pipeline_label, "\n".join(lines))
+            return
+        if self.pipeline is None:
+            return
+        lines = ["Pipeline (queue / ms):"]
+        for name, stage in self.pipeline.get_stats().items():
+            lines.append(f"{name}: {stage['queue_depth']} / {stage['latency_ms']:.1f}")
+        
+        # Allocations should stop growing once the pipeline is warm
+        pools = [self.frame_pool]
+        if self.recorder is not None:
+            pools.append(self.recorder.pool)
+        if self.event_recorder is not None:
+            pools.append(self.event_recorder.pool)
+        if self.full_pool is not None:
+            pools.append(self.full_pool)
+        if self.tiler is not None:
+            lines.append(f"Tiles (run / skipped): {self.tiler.tiles_run} / {self.tiler.tiles_skipped}")
+        lines.append("Buffers (alloc / reused / copies):")
+        for pool in pools:
+            stats = pool.get_stats()
+            lines.append(f"{pool.name}: {stats['allocations']} / {stats['reuses']} / {stats['copies']}")
+        self.set_text(self.pipeline_label, "\n".join(lines))
+    
+    def on_pipeline_error(self, stage_name, error):
+        # Called from a worker thread; the Tk thread handles it in render_tick
+        self.pipeline_error = (stage_name, error)
     
     def update_ui(self, frame):
-        image = Image.fromarray(frame)
-        photo = ImageTk.PhotoImage(image)
-        self.video_label.configure(image=photo)
-        self.video_label.image = photo
+        from PIL import Image, ImageTk
+        
+        # PIL swaps BGR to RGB while decoding, the only color conversion on the frame path
+        image = Image.frombuffer("RGB", (frame.shape[1], frame.shape[0]), frame, "raw", "BGR", 0, 1)
+        
+        # Reuse the Tk photo image while the frame size is unchanged
+        if self.photo is not None and (self.photo.width(), self.photo.height()) == image.size:
+            self.photo.paste(image)
+            return
+        self.photo = ImageTk.PhotoImage(image)
+        self.video_label.configure(image=self.photo)
+        self.video_label.image = self.photo
     
     def on_closing(self):
         self.stop_camera()
-        if self.video_writer:
-            self.video_writer.release()
+        if self.metrics_server:
+            self.metrics_server.stop()
+        if self.event_log is not None:
+            self.event_log.stop()
+        if self.export_on_close:
+            profiler.export_chrome_trace(self.trace_path)
         self.app.quit()
     
     def run(self):
-        
+        self.app.after(self.render_interval_ms, self.render_tick)
         self.app.mainloop()
 
-def create_app(model_path):
-    app = ObjectDetectionApp(model_path)
+def create_app(model_path, backend="pytorch", detect_interval=1, motion_threshold=None, uncertainty_threshold=None,
+               metrics_port=None,
+               record_backend="opencv", record_preset="veryfast", segment_seconds=None, max_segments=None,
+               event_classes=None, pre_event_seconds=5.0, tiling=None, events_dir=None, profile_path=None,
+               processes=False, target_fps=None, target_latency_ms=None, reid=False, metrics_host="127.0.0.1"):
+    app = ObjectDetectionApp(
+        model_path,
+        backend=backend,
+        detect_interval=detect_interval,
+        motion_threshold=motion_threshold,
+        uncertainty_threshold=uncertainty_threshold,
+        metrics_port=metrics_port,
+        record_backend=record_backend,
+        record_preset=record_preset,
+        segment_seconds=segment_seconds,
+        max_segments=max_segments,
+        event_classes=event_classes,
+        pre_event_seconds=pre_event_seconds,
+        tiling=tiling,
+        events_dir=events_dir,
+        profile_path=profile_path,
+        processes=processes,
+        target_fps=target_fps,
+        target_latency_ms=target_latency_ms,
+        reid=reid,
+        metrics_host=metrics_host
+    )
     app.run()
\ No newline at end of file
@@ -1,9 +1,180 @@
-from gui.main import create_app
-from model_train import train 
+import argparse
+
+from model_train.export import BACKENDS
+from utils.recording import RECORD_BACKENDS, FFMPEG_PRESETS
+
+
+def resolve_model_path(args):
+    if args.model:
+        return args.model
+    from model_train.registry import resolve_model
+    return resolve_model(force_retrain=args.retrain)
+
+
+def tiling_options(args):
+    """TiledDetector options, or None when neither tiles nor ROIs were requested"""
+    if args.tile_size is None and not args.roi:
+        return None
+    return {
+        "tile_size": args.tile_size,
+        "overlap": args.tile_overlap,
+        "rois": args.roi,
+        "motion_threshold": args.tile_motion_threshold,
+        "full_frame": args.tile_full_frame,
+    }
+
+
+def run_gui(args):
+    from gui.main import create_app
+
+    create_app(
+        model_path=resolve_model_path(args),
+        backend=args.backend,
+        detect_interval=args.detect_interval,
+        motion_threshold=args.motion_threshold,
+        uncertainty_threshold=args.uncertainty_threshold,
+        metrics_port=args.metrics_port,
+        record_backend=args.record_backend,
+        record_preset=args.record_preset,
+        segment_seconds=args.segment_seconds,
+        max_segments=args.max_segments,
+        event_classes=args.event_classes,
+        pre_event_seconds=args.pre_event_seconds,
+        tiling=tiling_options(args),
+        events_dir=args.events,
+        profile_path=args.profile,
+        processes=args.processes,
+        target_fps=args.target_fps,
+        target_latency_ms=args.target_latency_ms,
+        reid=args.reid,
+        metrics_host=args.metrics_host
+    )
+
+
+def run_track(args):
+    from model_train.export import load_model
+    from utils.headless import track
+
+    model = load_model(resolve_model_path(args), args.backend)
+    summary = track(
+        model,
+        args.source,
+        output=args.output,
+        records=args.records,
+        detect_interval=args.detect_interval,
+        motion_threshold=args.motion_threshold,
+        uncertainty_threshold=args.uncertainty_threshold,
+        metrics_port=args.metrics_port,
+        tiling=tiling_options(args),
+        events_dir=args.events,
+        profile_path=args.profile,
+        target_fps=args.target_fps,
+        target_latency_ms=args.target_latency_ms,
+        backend=args.backend,
+        reid=args.reid,
+        metrics_host=args.metrics_host
+    )
+    print(summary)
+
+
+def run_annotate(args):
+    from model_train.annotate import annotate
+    from model_train.export import load_model
+
+    model_path = resolve_model_path(args)
+    summary = annotate(
+        load_model(model_path, args.backend),
+        model_path,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        conf=args.conf,
+        val_fraction=args.val_fraction,
+        force=args.force
+    )
+    print(summary)
+
+
+def add_model_options(parser):
+    parser.add_argument("--model", help="Weights to use instead of the cached trained model")
+    parser.add_argument("--backend", default="pytorch", choices=BACKENDS, help="Inference backend")
+    parser.add_argument("--retrain", action="store_true", help="Retrain even if the cached model is up to date")
+
+
+def add_tracking_options(parser):
+    parser.add_argument("--detect-interval", type=int, default=1, help="Run the detector every N frames")
+    parser.add_argument("--motion-threshold", type=float, help="Also detect when the scene changes more than this (0-255)")
+    parser.add_argument("--uncertainty-threshold", type=float,
+                        help="Also detect when a predicted track position is this uncertain, relative to its height")
+    parser.add_argument("--metrics-port", type=int, help="Serve Prometheus/JSON metrics on this port")
+    parser.add_argument("--metrics-host", default="127.0.0.1",
+                        help="Address the metrics are served on; 0.0.0.0 exposes them to the network")
+    parser.add_argument("--tile-size", type=int, help="Detect on overlapping tiles of this size at full resolution")
+    parser.add_argument("--tile-overlap", type=float, default=0.2, help="Fraction of overlap between neighbouring tiles")
+    parser.add_argument("--roi", type=int, nargs=4, action="append", metavar=("X1", "Y1", "X2", "Y2"),
+                        help="Only detect inside this region of the full frame (repeatable)")
+    parser.add_argument("--tile-motion-threshold", type=float, help="Skip tiles whose mean change is below this (0-255)")
+    parser.add_argument("--tile-full-frame", action="store_true", help="Also run the whole frame as one tile for large objects")
+    parser.add_argument("--events", help="Directory to append tracked detections to (query with python -m utils.events)")
+    parser.add_argument("--profile", metavar="TRACE", help="Time each stage and write a Chrome trace here on exit or SIGUSR1")
+    parser.add_argument("--target-fps", type=float, help="Lower inference size, detection rate and overlay detail to hold this FPS")
+    parser.add_argument("--target-latency-ms", type=float, help="Same, for this much work per frame")
+    parser.add_argument("--reid", action="store_true", help="Recover lost track IDs by appearance (color embeddings)")
+
+
+def shared_options(*add_options, defaults=True):
+    """Parent parser with options accepted both before and after the subcommand
+
+    The subcommands' copies have no defaults, so they do not overwrite a
+    value given before the subcommand.
+    """
+    parser = argparse.ArgumentParser(add_help=False)
+    for add in add_options:
+        add(parser)
+    if not defaults:
+        for action in parser._actions:
+            action.default = argparse.SUPPRESS
+    return parser
+
 
 def main():
-    train.main()
-    create_app(model_path='runs/detect/train/weights/best.pt')
+    parser = argparse.ArgumentParser(description="Real-time object detection and tracking",
+                                     parents=[shared_options(add_model_options, add_tracking_options)])
+    subparsers = parser.add_subparsers(dest="command")
+    shared = [shared_options(add_model_options, add_tracking_options, defaults=False)]
+
+    gui_parser = subparsers.add_parser("gui", help="Launch the desktop app (default)", parents=shared)
+    gui_parser.add_argument("--record-backend", default="opencv", choices=RECORD_BACKENDS, help="Video encoder for recordings")
+    gui_parser.add_argument("--record-preset", default="veryfast", choices=FFMPEG_PRESETS, help="x264 preset for the ffmpeg backend")
+    gui_parser.add_argument("--segment-seconds", type=float, help="Start a new recording file every N seconds")
+    gui_parser.add_argument("--max-segments", type=int, help="Keep only the newest N recording files")
+    gui_parser.add_argument("--event-classes", nargs="+", help="Record automatically when one of these classes is detected")
+    gui_parser.add_argument("--pre-event-seconds", type=float, default=5.0, help="Seconds kept before an event recording starts")
+    gui_parser.add_argument("--processes", action="store_true",
+                            help="Run capture, inference and tracking in separate processes over shared memory")
+
+    track_parser = subparsers.add_parser("track", help="Headless detection and tracking", parents=shared)
+    track_parser.add_argument("source", help="Video file, stream URL, camera index or image folder")
+    track_parser.add_argument("--output", help="Path of the annotated output video")
+    track_parser.add_argument("--records", help="Path of the per-frame track records (JSON lines)")
+
+    annotate_parser = subparsers.add_parser("annotate", help="Auto-label data/raw and add it to the dataset splits",
+                                            parents=[shared_options(add_model_options, defaults=False)])
+    annotate_parser.add_argument("--batch-size", type=int, default=16, help="Images per model call")
+    annotate_parser.add_argument("--workers", type=int, help="Decoding processes (default: one per core)")
+    annotate_parser.add_argument("--conf", type=float, default=0.5, help="Minimum confidence of a written box")
+    annotate_parser.add_argument("--val-fraction", type=float, default=0.2, help="Share of new images put in val")
+    annotate_parser.add_argument("--force", action="store_true", help="Relabel every image, ignoring the cache")
+
+    args = parser.parse_args()
+    if args.command is None:
+        args = parser.parse_args(["gui"], namespace=args)
+    if args.command == "track":
+        run_track(args)
+    elif args.command == "annotate":
+        run_annotate(args)
+    else:
+        run_gui(args)
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,295 @@
+# model_train/annotate.py
+import argparse
+import json
+import os
+import re
+import shutil
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from model_train.registry import file_hash
+from utils.buffers import letterbox_into, letterbox_geometry
+
+RAW_DIR = "data/raw/images"
+ANNOTATED_DIR = "data/annotated"
+DATASET_DIR = "data/dataset"
+CACHE_FILE = "autolabel_cache.json"
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+REDUCED_READS = ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4), (2, cv2.IMREAD_REDUCED_COLOR_2))
+
+
+def decode_image(path, imgsz=640):
+    """Decode an image and letterbox it to imgsz; runs in a worker process
+
+    JPEGs are decoded at the smallest 1/2, 1/4 or 1/8 scale that still
+    covers imgsz, which is several times faster than a full decode of a
+    phone photo. Returns (letterboxed image, decoded (height, width)) so
+    only the small image is sent back; labels are normalized, so the
+    decoded shape is all that is needed to map boxes back.
+    """
+    # A 1/8 decode is cheap enough to use as a probe of the full size
+    image = cv2.imread(path, cv2.IMREAD_REDUCED_COLOR_8)
+    if image is None:
+        return None, None
+    longest = 8 * max(image.shape[:2])
+    flag = cv2.IMREAD_COLOR
+    for factor, reduced in REDUCED_READS:
+        if longest // factor >= imgsz:
+            flag = reduced
+            break
+    if flag != cv2.IMREAD_REDUCED_COLOR_8:
+        image = cv2.imread(path, flag)
+    return letterbox_into(image, np.empty((imgsz, imgsz, 3), dtype=np.uint8)), image.shape[:2]
+
+
+def decoded_batches(pool, paths, batch_size, imgsz):
+    """Yield (paths, decoded) batches, decoding the next batch while the current one is labeled"""
+    batches = [paths[i:i + batch_size] for i in range(0, len(paths), batch_size)]
+    ahead = None
+    for index, batch in enumerate(batches):
+        current = ahead or [pool.submit(decode_image, path, imgsz) for path in batch]
+        ahead = [pool.submit(decode_image, path, imgsz) for path in batches[index + 1]] \
+            if index + 1 < len(batches) else None
+        yield batch, [future.result() for future in current]
+
+
+def yolo_labels(result, image_shape, imgsz, class_ids, conf):
+    """YOLO label rows (class, cx, cy, w, h normalized to the image) of one result"""
+    data = result.boxes.data.cpu().numpy()
+    if data.shape[1] == 7:
+        data = data[:, [0, 1, 2, 3, 5, 6]]
+    names = result.names
+    keep = [i for i, row in enumerate(data) if row[4] >= conf and names.get(int(row[5])) in class_ids]
+    if not keep:
+        return np.zeros((0, 5), dtype=np.float64)
+    data = data[keep]
+
+    # Boxes come back in letterboxed coordinates; undo the letterbox, then normalize
+    height, width = image_shape
+    scale, left, top = letterbox_geometry(image_shape, (imgsz, imgsz))
+    x1 = np.clip((data[:, 0] - left) / scale, 0, width) / width
+    y1 = np.clip((data[:, 1] - top) / scale, 0, height) / height
+    x2 = np.clip((data[:, 2] - left) / scale, 0, width) / width
+    y2 = np.clip((data[:, 3] - top) / scale, 0, height) / height
+    classes = [class_ids[names[int(cls)]] for cls in data[:, 5]]
+    rows = np.stack([classes, (x1 + x2) / 2, (y1 + y2) / 2, x2 - x1, y2 - y1], axis=1)
+    # Boxes that lay entirely in the padding are empty after clipping
+    return rows[(rows[:, 3] > 0) & (rows[:, 4] > 0)]
+
+
+def format_labels(rows):
+    return "".join(f"{int(row[0])} {row[1]:.6f} {row[2]:.6f} {row[3]:.6f} {row[4]:.6f}\n" for row in rows)
+
+
+def load_cache(path):
+    if not os.path.exists(path):
+        return {"weights": None, "file_hashes": {}, "images": {}}
+    with open(path) as f:
+        cache = json.load(f)
+    # Early caches were keyed by content hash, which merged raw files with identical content
+    if any("digest" not in entry for entry in cache["images"].values()):
+        cache["images"] = {
+            entry["source"]: dict(entry, digest=digest, weights=entry.get("weights"))
+            for digest, entry in cache["images"].items()
+        }
+    return cache
+
+
+def save_cache(cache, path):
+    with open(path + ".tmp", "w") as f:
+        json.dump(cache, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def upload_name(name):
+    """File name as Label Studio stores an upload ("IMG (1).jpg" becomes "IMG_1.jpg")"""
+    stem, ext = os.path.splitext(name)
+    return re.sub(r"[^\w.-]+", "_", stem).strip("_") + ext
+
+
+def manual_names(annotated_dir, generated):
+    """Upload names of the images in annotated_dir that were labeled by hand (<prefix>-<upload name>)"""
+    images_dir = os.path.join(annotated_dir, "images")
+    if not os.path.isdir(images_dir):
+        return set()
+    return {name.split("-", 1)[1] for name in os.listdir(images_dir) if name not in generated and "-" in name}
+
+
+def remove_generated(name, annotated_dir, dataset_dir):
+    """Delete an auto-labeled image and its labels from annotated_dir and both splits"""
+    stem = os.path.splitext(name)[0]
+    for root in (annotated_dir, os.path.join(dataset_dir, "train"), os.path.join(dataset_dir, "val")):
+        for path in (os.path.join(root, "images", name), os.path.join(root, "labels", stem + ".txt")):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def split_for(name, val_fraction):
+    """Split decided by a checksum of the file name, so reruns put a file in the same split"""
+    return "val" if zlib.crc32(name.encode()) % 1000 < val_fraction * 1000 else "train"
+
+
+def update_splits(annotated_dir, dataset_dir, val_fraction, file_hashes):
+    """Copy annotated images and labels that are new or changed into the train/val split
+
+    Files already in either split stay there; only their labels are refreshed.
+    An image whose content is already in a split is not added again, so the
+    same picture can never end up in both train and val.
+    Returns the number of files added per split and of duplicates skipped.
+    """
+    added = {"train": 0, "val": 0, "duplicates": 0}
+    images_dir = os.path.join(annotated_dir, "images")
+    labels_dir = os.path.join(annotated_dir, "labels")
+    existing = {}
+    contents = {}  # content hash -> split holding it
+    leaked = 0
+    for split in ("train", "val"):
+        os.makedirs(os.path.join(dataset_dir, split, "images"), exist_ok=True)
+        os.makedirs(os.path.join(dataset_dir, split, "labels"), exist_ok=True)
+        for name in sorted(os.listdir(os.path.join(dataset_dir, split, "images"))):
+            existing[name] = split
+            digest = file_hash(os.path.join(dataset_dir, split, "images", name), file_hashes)
+            if contents.setdefault(digest, split) != split:
+                leaked += 1
+    if leaked:
+        print(f"Warning: {leaked} images in {dataset_dir} are in both train and val")
+
+    for name in sorted(os.listdir(images_dir)):
+        stem = os.path.splitext(name)[0]
+        label = os.path.join(labels_dir, stem + ".txt")
+        if not os.path.exists(label):
+            continue
+        split = existing.get(name)
+        if split is None:
+            digest = file_hash(os.path.join(images_dir, name), file_hashes)
+            if digest in contents:
+                added["duplicates"] += 1
+                continue
+            split = split_for(name, val_fraction)
+            contents[digest] = split
+            shutil.copy2(os.path.join(images_dir, name), os.path.join(dataset_dir, split, "images", name))
+            added[split] += 1
+        target = os.path.join(dataset_dir, split, "labels", stem + ".txt")
+        if not os.path.exists(target) or os.path.getmtime(target) < os.path.getmtime(label):
+            shutil.copy2(label, target)
+    return added
+
+
+def annotate(model, weights, raw_dir=RAW_DIR, annotated_dir=ANNOTATED_DIR, dataset_dir=DATASET_DIR,
+             batch_size=16, workers=None, imgsz=640, conf=0.5, val_fraction=0.2, force=False):
+    """Label new or changed raw images with the model and grow the train/val splits
+
+    Images are decoded on a process pool and run through the model in
+    batches; each batch's label files are written together. The cache maps
+    every raw file name to its content hash and the weights it was labeled
+    with, so a rerun only processes new or changed images. Images that
+    already have hand-made labels in annotated_dir are left alone, and a
+    raw file with the same content as one already labeled is skipped.
+    """
+    images_dir = os.path.join(annotated_dir, "images")
+    labels_dir = os.path.join(annotated_dir, "labels")
+    os.makedirs(images_dir, exist_ok=True)
+    os.makedirs(labels_dir, exist_ok=True)
+    with open(os.path.join(annotated_dir, "classes.txt")) as f:
+        class_ids = {line.strip(): index for index, line in enumerate(f) if line.strip()}
+
+    cache_path = os.path.join(annotated_dir, CACHE_FILE)
+    cache = load_cache(cache_path)
+    images = cache["images"]
+    weights_hash = file_hash(weights, cache["file_hashes"]) if os.path.exists(weights) else weights
+    generated = {entry["name"] for entry in images.values()}
+    manual = manual_names(annotated_dir, generated)
+    # Content already labeled by hand counts as seen, so a renamed copy of it is not labeled again
+    seen = {
+        file_hash(os.path.join(images_dir, name), cache["file_hashes"]): name
+        for name in sorted(os.listdir(images_dir)) if name not in generated
+    }
+
+    todo = []
+    skipped = duplicates = 0
+    for name in sorted(os.listdir(raw_dir)):
+        if not name.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        path = os.path.join(raw_dir, name)
+        digest = file_hash(path, cache["file_hashes"])
+        entry = images.get(name)
+        hand_labeled = upload_name(name) in manual
+        # Labels are stale when the raw file changed, it was since labeled by hand, or it duplicates another file
+        if entry is not None and (entry["digest"] != digest or hand_labeled or seen.get(digest, name) != name):
+            remove_generated(images.pop(name)["name"], annotated_dir, dataset_dir)
+            entry = None
+        if hand_labeled:
+            skipped += 1
+            continue
+        if seen.setdefault(digest, name) != name:
+            print(f"Skipping {name}: same image as {seen[digest]}")
+            duplicates += 1
+            continue
+        if force or entry is None or entry["weights"] != weights_hash:
+            todo.append((path, digest))
+    print(f"{len(todo)} new or changed images to label ({skipped} hand-labeled, {duplicates} duplicates skipped)")
+
+    labeled = 0
+    with ProcessPoolExecutor(workers) as pool:
+        paths = [path for path, _ in todo]
+        digests = dict(todo)
+        for batch, decoded in decoded_batches(pool, paths, batch_size, imgsz):
+            valid = [(path, image, shape) for path, (image, shape) in zip(batch, decoded) if image is not None]
+            for path, (image, _) in zip(batch, decoded):
+                if image is None:
+                    print(f"Skipping unreadable image {path}")
+            if not valid:
+                continue
+            results = model([image for _, image, _ in valid], verbose=False, imgsz=imgsz)
+
+            # Write the whole batch's labels and images together, then record them in the cache
+            for (path, _, shape), result in zip(valid, results):
+                source = os.path.basename(path)
+                digest = digests[path]
+                name = f"{digest[:8]}-{upload_name(source)}"
+                rows = yolo_labels(result, shape, imgsz, class_ids, conf)
+                with open(os.path.join(labels_dir, os.path.splitext(name)[0] + ".txt"), "w") as f:
+                    f.write(format_labels(rows))
+                shutil.copy2(path, os.path.join(images_dir, name))
+                images[source] = {"digest": digest, "name": name, "weights": weights_hash, "boxes": len(rows)}
+            labeled += len(valid)
+            save_cache(cache, cache_path)
+            print(f"Labeled {labeled}/{len(todo)} images")
+
+    save_cache(cache, cache_path)
+    added = update_splits(annotated_dir, dataset_dir, val_fraction, cache["file_hashes"])
+    save_cache(cache, cache_path)
+    print(f"Added {added['train']} images to train and {added['val']} to val")
+    return {
+        "labeled": labeled, "skipped_manual": skipped, "skipped_duplicates": duplicates,
+        "train": added["train"], "val": added["val"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Auto-label data/raw with a trained model and update the dataset splits")
+    parser.add_argument("--weights", default="runs/detect/train/weights/best.pt")
+    parser.add_argument("--backend", default="pytorch")
+    parser.add_argument("--raw", default=RAW_DIR)
+    parser.add_argument("--annotated", default=ANNOTATED_DIR)
+    parser.add_argument("--dataset", default=DATASET_DIR)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--workers", type=int, help="Decoding processes (default: one per core)")
+    parser.add_argument("--conf", type=float, default=0.5, help="Minimum confidence of a written box")
+    parser.add_argument("--val-fraction", type=float, default=0.2)
+    parser.add_argument("--force", action="store_true", help="Relabel every image, ignoring the cache")
+    args = parser.parse_args()
+
+    from model_train.export import load_model
+
+    model = load_model(args.weights, args.backend)
+    print(annotate(model, args.weights, args.raw, args.annotated, args.dataset, args.batch_size, args.workers,
+                   conf=args.conf, val_fraction=args.val_fraction, force=args.force))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# model_train/export.py
+import os
+
+import cv2
+import numpy as np
+
+from utils.buffers import letterbox_into
+
+BACKENDS = ("pytorch", "torchscript", "onnx", "onnx-int8", "openvino", "openvino-int8")
+CALIBRATION_DIR = "data/dataset/val/images"
+
+
+def exported_path(weights, backend):
+    """Where the exported artifact for a backend lives, next to the .pt weights"""
+    stem = os.path.splitext(weights)[0]
+    return {
+        "pytorch": weights,
+        "torchscript": stem + ".torchscript",
+        "onnx": stem + ".onnx",
+        "onnx-int8": stem + "_int8.onnx",
+        "openvino": stem + "_openvino_model",
+        "openvino-int8": stem + "_int8_openvino_model",
+    }[backend]
+
+
+def letterbox(image, imgsz=640):
+    """Resize keeping the aspect ratio and pad to a square imgsz x imgsz image"""
+    return letterbox_into(image, np.empty((imgsz, imgsz, 3), dtype=np.uint8))
+
+
+class ImageCalibrationReader:
+    """Feeds letterboxed validation images to ONNX Runtime static quantization"""
+
+    def __init__(self, input_name, image_dir=CALIBRATION_DIR, imgsz=640, max_images=100):
+        names = sorted(os.listdir(image_dir))[:max_images]
+        self.paths = [os.path.join(image_dir, n) for n in names]
+        self.input_name = input_name
+        self.imgsz = imgsz
+        self.index = 0
+
+    def get_next(self):
+        while self.index < len(self.paths):
+            image = cv2.imread(self.paths[self.index])
+            self.index += 1
+            if image is None:
+                continue
+            blob = cv2.cvtColor(letterbox(image, self.imgsz), cv2.COLOR_BGR2RGB)
+            blob = blob.transpose(2, 0, 1)[None].astype(np.float32) / 255.0
+            return {self.input_name: blob}
+        return None
+
+    def rewind(self):
+        self.index = 0
+
+
+def quantize_onnx(onnx_path, output_path, calibration_dir=CALIBRATION_DIR, imgsz=640):
+    """INT8 static quantization of an ONNX model calibrated on validation images"""
+    import onnxruntime
+    from onnxruntime.quantization import QuantFormat, QuantType, quantize_static
+
+    session = onnxruntime.InferenceSession(onnx_path, providers=["CPUExecutionProvider"])
+    reader = ImageCalibrationReader(session.get_inputs()[0].name, calibration_dir, imgsz)
+    quantize_static(
+        onnx_path,
+        output_path,
+        reader,
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+    )
+    return output_path
+
+
+def export_model(weights, backend, imgsz=640, data=None):
+    """Export .pt weights for a backend, reusing an existing export if present"""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}")
+
+    target = exported_path(weights, backend)
+    if os.path.exists(target):
+        return target
+
+    from ultralytics import YOLO
+
+    if backend == "onnx-int8":
+        onnx_path = export_model(weights, "onnx", imgsz, data)
+        return quantize_onnx(onnx_path, target, imgsz=imgsz)
+
+    model = YOLO(weights)
+    if backend == "torchscript":
+        path = model.export(format="torchscript", imgsz=imgsz)
+    elif backend == "onnx":
+        # Dynamic axes so batched multi-stream inference works with ONNX Runtime too
+        path = model.export(format="onnx", imgsz=imgsz, simplify=True, dynamic=True)
+    elif backend == "openvino":
+        path = model.export(format="openvino", imgsz=imgsz)
+    else:
+        # OpenVINO INT8 is calibrated by ultralytics on the dataset's val split
+        if data is None:
+            from model_train.train import resolve_data_config
+            data = resolve_data_config()
+        path = model.export(format="openvino", imgsz=imgsz, int8=True, data=data)
+        if os.path.abspath(path) != os.path.abspath(target):
+            os.replace(path, target)
+            path = target
+    return str(path)
+
+
+def load_model(weights, backend="pytorch", imgsz=640):
+    """Load weights with the selected inference backend
+
+    Every backend is wrapped by ultralytics.YOLO, so results have the same
+    interface as the PyTorch model.
+    """
+    from ultralytics import YOLO
+
+    path = weights if backend == "pytorch" else export_model(weights, backend, imgsz)
+    return YOLO(path, task="detect")
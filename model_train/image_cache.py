@@ -0,0 +1,147 @@
+# model_train/image_cache.py
+import hashlib
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from model_train.registry import file_hash
+
+CACHE_DIR = "runs/detect/image_cache"
+CACHE_VERSION = 1
+
+
+def resize_for_training(image, imgsz):
+    """Resize so the long side is imgsz, exactly as ultralytics' BaseDataset.load_image does in rect mode"""
+    h0, w0 = image.shape[:2]
+    ratio = imgsz / max(h0, w0)
+    if ratio != 1:
+        size = (min(math.ceil(w0 * ratio), imgsz), min(math.ceil(h0 * ratio), imgsz))
+        image = cv2.resize(image, size, interpolation=cv2.INTER_LINEAR)
+    return image
+
+
+def cache_image(path, npy_path, row, imgsz):
+    """Decode and resize one image straight into its row of the cache; runs in a worker process
+
+    Returns (original (h, w), resized (h, w), seconds spent decoding and resizing).
+    """
+    start = time.perf_counter()
+    image = cv2.imread(path)
+    if image is None:
+        raise FileNotFoundError(f"Image Not Found {path}")
+    resized = resize_for_training(image, imgsz)
+    seconds = time.perf_counter() - start
+
+    array = np.load(npy_path, mmap_mode="r+")
+    height, width = resized.shape[:2]
+    array[row, :height, :width] = resized
+    array.flush()
+    del array
+    return image.shape[:2], (height, width), seconds
+
+
+class ImageCache:
+    """Decoded, resized training images in one memory-mapped .npy file
+
+    Every image is decoded once and stored top-left in an
+    (N, imgsz, imgsz, 3) uint8 array next to a JSON file with the
+    original and resized shapes. The cache is rebuilt when its key
+    (image contents, imgsz and cache version) changes. Loading an image
+    is then a copy out of the page cache instead of a JPEG decode, and
+    DataLoader workers share the mapped pages.
+    """
+
+    def __init__(self, files, imgsz, name, cache_dir=CACHE_DIR, workers=None):
+        self.files = list(files)
+        self.imgsz = imgsz
+        self.npy_path = os.path.join(cache_dir, f"{name}-{imgsz}.npy")
+        self.meta_path = os.path.join(cache_dir, f"{name}-{imgsz}.json")
+        self.workers = workers
+        self.array = None
+        os.makedirs(cache_dir, exist_ok=True)
+
+        meta = self.load_meta()
+        self.key = self.cache_key(meta["file_hashes"])
+        if meta.get("key") != self.key or not os.path.exists(self.npy_path):
+            meta = self.build(meta["file_hashes"])
+        self.rows = {path: row for row, path in enumerate(meta["files"])}
+        self.shapes = meta["shapes"]
+        self.decode_seconds = meta["decode_seconds"]
+
+    def __len__(self):
+        return len(self.files)
+
+    def __getstate__(self):
+        # The mapping is reopened in each DataLoader worker rather than pickled as a full array
+        state = self.__dict__.copy()
+        state["array"] = None
+        return state
+
+    def load_meta(self):
+        if not os.path.exists(self.meta_path):
+            return {"file_hashes": {}}
+        with open(self.meta_path) as f:
+            return json.load(f)
+
+    def cache_key(self, file_hashes):
+        digest = hashlib.sha256(f"{CACHE_VERSION}:{self.imgsz}".encode())
+        for path in sorted(self.files):
+            digest.update(os.path.abspath(path).encode())
+            digest.update(file_hash(path, file_hashes).encode())
+        return digest.hexdigest()
+
+    def build(self, file_hashes):
+        """Decode every image into a new cache file on a process pool"""
+        print(f"Caching {len(self.files)} images to {self.npy_path}")
+        tmp_path = self.npy_path + ".tmp.npy"
+        array = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.uint8,
+                                          shape=(len(self.files), self.imgsz, self.imgsz, 3))
+        del array
+
+        with ProcessPoolExecutor(self.workers) as pool:
+            futures = [pool.submit(cache_image, path, tmp_path, row, self.imgsz) for row, path in enumerate(self.files)]
+            results = [future.result() for future in futures]
+        os.replace(tmp_path, self.npy_path)
+
+        meta = {
+            "key": self.key,
+            "imgsz": self.imgsz,
+            "files": self.files,
+            "shapes": [[list(hw0), list(hw)] for hw0, hw, _ in results],
+            # Decoding cost of one pass over the dataset, i.e. what every uncached epoch pays
+            "decode_seconds": sum(seconds for _, _, seconds in results),
+            "file_hashes": file_hashes,
+        }
+        # The metadata is written last, so an interrupted build is redone next time
+        with open(self.meta_path + ".tmp", "w") as f:
+            json.dump(meta, f)
+        os.replace(self.meta_path + ".tmp", self.meta_path)
+        return meta
+
+    def load(self, path):
+        """(image, original (h, w), resized (h, w)) of a cached file, in load_image's return format"""
+        if self.array is None:
+            self.array = np.load(self.npy_path, mmap_mode="r")
+        row = self.rows[path]
+        hw0, (height, width) = self.shapes[row]
+        # Copied, since augmentations may modify the image in place
+        return np.array(self.array[row, :height, :width]), tuple(hw0), (height, width)
+
+    def read_seconds(self):
+        """Time of one pass over the dataset read from the cache"""
+        start = time.perf_counter()
+        for path in self.files:
+            self.load(path)
+        return time.perf_counter() - start
+
+    def report(self):
+        cached = self.read_seconds()
+        saved = self.decode_seconds - cached
+        print(f"Image cache {self.npy_path}: decoding {len(self)} images takes {self.decode_seconds:.2f}s per epoch, "
+              f"reading them from the cache {cached:.2f}s (saves {saved:.2f}s per epoch)")
+        return saved
@@ -0,0 +1,96 @@
+# model_train/registry.py
+import hashlib
+import json
+import os
+from datetime import datetime
+
+REGISTRY_PATH = "runs/detect/registry.json"
+CONFIG_PATH = "train_config.yaml"
+DATASET_DIR = "data/dataset"
+BASE_WEIGHTS = "models/yolo11n.pt"
+LEGACY_WEIGHTS = "runs/detect/train/weights/best.pt"
+
+
+def load_registry(path=REGISTRY_PATH):
+    if not os.path.exists(path):
+        return {"models": {}, "file_hashes": {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_registry(registry, path=REGISTRY_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(registry, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def file_hash(path, file_hashes):
+    """Content hash of a file, reusing the cached value while size and mtime are unchanged"""
+    stat = os.stat(path)
+    key = os.path.abspath(path)
+    cached = file_hashes.get(key)
+    if cached and cached["size"] == stat.st_size and cached["mtime_ns"] == stat.st_mtime_ns:
+        return cached["sha256"]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    file_hashes[key] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest.hexdigest()}
+    return digest.hexdigest()
+
+
+def fingerprint(config_path=CONFIG_PATH, dataset_dir=DATASET_DIR, base_weights=BASE_WEIGHTS, file_hashes=None):
+    """Fingerprint of everything that determines the trained weights"""
+    file_hashes = {} if file_hashes is None else file_hashes
+    digest = hashlib.sha256()
+
+    for path in (config_path, base_weights):
+        digest.update(path.encode())
+        digest.update(file_hash(path, file_hashes).encode() if os.path.exists(path) else b"missing")
+
+    for root, dirs, files in os.walk(dataset_dir):
+        dirs.sort()
+        for name in sorted(files):
+            # Skip label caches written by ultralytics during training
+            if name.endswith(".cache"):
+                continue
+            path = os.path.join(root, name)
+            digest.update(os.path.relpath(path, dataset_dir).encode())
+            digest.update(file_hash(path, file_hashes).encode())
+
+    return digest.hexdigest()
+
+
+def resolve_model(force_retrain=False, registry_path=REGISTRY_PATH, train_fn=None, **fingerprint_kwargs):
+    """Return weights matching the current config, dataset and base weights
+
+    Trained weights are reused when the fingerprint matches a registry entry.
+    Training only runs on a mismatch or when force_retrain is set.
+    """
+    registry = load_registry(registry_path)
+    key = fingerprint(file_hashes=registry["file_hashes"], **fingerprint_kwargs)
+    entry = registry["models"].get(key)
+
+    if not force_retrain and entry and os.path.exists(entry["weights"]):
+        print(f"Using cached model {entry['weights']} (fingerprint {key[:12]})")
+        save_registry(registry, registry_path)
+        return entry["weights"]
+
+    # Weights trained before the registry existed are adopted once
+    if not force_retrain and not registry["models"] and os.path.exists(LEGACY_WEIGHTS):
+        print(f"Registering existing model {LEGACY_WEIGHTS} (fingerprint {key[:12]})")
+        weights = LEGACY_WEIGHTS
+    else:
+        if train_fn is None:
+            from model_train import train
+            train_fn = train.main
+        print(f"Training model (fingerprint {key[:12]})")
+        # Only an interrupted run of this same fingerprint may be resumed
+        weights = str(train_fn(fingerprint=key))
+
+    registry["models"][key] = {"weights": weights, "created": datetime.now().isoformat(timespec="seconds")}
+    save_registry(registry, registry_path)
+    return weights
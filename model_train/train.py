@@ -1,8 +1,155 @@
+import argparse
+import glob
+import os
+
+import torch
+import yaml
 from ultralytics import YOLO
+from ultralytics.data import YOLODataset
+from ultralytics.models.yolo.detect import DetectionTrainer
+from ultralytics.utils import colorstr
+from ultralytics.utils.torch_utils import de_parallel
+
+from model_train.image_cache import CACHE_DIR, ImageCache
+from model_train.registry import CONFIG_PATH, BASE_WEIGHTS, fingerprint as training_fingerprint
+
+RESOLVED_CONFIG = "runs/detect/train_config.yaml"
+RUNS_DIR = "runs/detect"
+
+
+class CachedYOLODataset(YOLODataset):
+    """YOLODataset that reads decoded images from an ImageCache instead of decoding JPEGs every epoch"""
+
+    def __init__(self, *args, cache_dir=CACHE_DIR, cache_name="train", cache_workers=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # im_files is final here: corrupt images are dropped and val is reordered for rect batches
+        self.image_cache = ImageCache(self.im_files, self.imgsz, cache_name, cache_dir, cache_workers)
+
+    def load_image(self, i, rect_mode=True):
+        if not rect_mode:
+            return super().load_image(i, rect_mode)
+        image, hw0, hw = self.image_cache.load(self.im_files[i])
+        if self.augment:
+            # Mosaic and MixUp draw their extra images from the buffer
+            self.buffer.append(i)
+            if 1 < len(self.buffer) >= self.max_buffer_length:
+                self.buffer.pop(0)
+        return image, hw0, hw
+
+
+class CachedDetectionTrainer(DetectionTrainer):
+    """DetectionTrainer whose train and val datasets use the memory-mapped image cache"""
+
+    cache_dir = CACHE_DIR
+
+    def build_dataset(self, img_path, mode="train", batch=None):
+        # Same arguments as ultralytics' build_yolo_dataset
+        stride = max(int(de_parallel(self.model).stride.max() if self.model else 0), 32)
+        return CachedYOLODataset(
+            img_path=img_path,
+            imgsz=self.args.imgsz,
+            batch_size=batch,
+            augment=mode == "train",
+            hyp=self.args,
+            rect=self.args.rect or mode == "val",
+            cache=None,
+            single_cls=self.args.single_cls or False,
+            stride=stride,
+            pad=0.0 if mode == "train" else 0.5,
+            prefix=colorstr(f"{mode}: "),
+            task=self.args.task,
+            classes=self.args.classes,
+            data=self.data,
+            fraction=self.args.fraction if mode == "train" else 1.0,
+            cache_dir=self.cache_dir,
+            cache_name=mode,
+            cache_workers=self.args.workers or None,
+        )
+
+
+def resolve_data_config(config_path=CONFIG_PATH, output_path=RESOLVED_CONFIG):
+    """Copy of the dataset config with its root made absolute
+
+    A relative `path` in train_config.yaml is taken relative to the config
+    file itself, so the repository works from any checkout; ultralytics
+    would otherwise look for it under its global datasets directory.
+    """
+    with open(config_path) as f:
+        config = yaml.safe_load(f)
+    root = config.get("path") or "."
+    if not os.path.isabs(root):
+        root = os.path.join(os.path.dirname(os.path.abspath(config_path)), root)
+    config["path"] = os.path.normpath(root)
+    if not os.path.isdir(config["path"]):
+        raise Exception(f"Dataset directory {config['path']} from {config_path} does not exist")
+
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, "w") as f:
+        yaml.safe_dump(config, f, sort_keys=False)
+    return output_path
+
+
+def run_name(fingerprint):
+    """Run directory name tying a training run to the fingerprint of its inputs"""
+    return f"train-{fingerprint[:12]}"
+
+
+def unfinished_checkpoint(name, runs_dir=RUNS_DIR):
+    """last.pt of the newest run called `name` (or name2, name3...) if it was interrupted, otherwise None
+
+    Only runs of the same name are considered, so a run of other data or
+    settings is never resumed.
+    """
+    runs = glob.glob(os.path.join(runs_dir, f"{name}*", "weights", "last.pt"))
+    if not runs:
+        return None
+    last = max(runs, key=os.path.getmtime)
+    # Finished runs have their optimizer stripped and epoch set to -1
+    checkpoint = torch.load(last, map_location="cpu", weights_only=False)
+    return last if checkpoint.get("epoch", -1) >= 0 else None
+
+
+def main(config_path=CONFIG_PATH, epochs=100, imgsz=640, batch=16, workers=8, resume=True, cache=True,
+         fingerprint=None):
+    """Train and return the path of the best weights
+
+    The run is named after the fingerprint of the config, dataset and base
+    weights (computed here unless the registry passes it), and only an
+    interrupted run with the same fingerprint is resumed.
+    """
+    trainer = CachedDetectionTrainer if cache else None
+    name = run_name(fingerprint or training_fingerprint(config_path))
+    checkpoint = unfinished_checkpoint(name) if resume else None
+    if checkpoint:
+        # Epochs, data and the rest come from the checkpoint's own arguments
+        print(f"Resuming interrupted training from {checkpoint}")
+        resolve_data_config(config_path)
+        model = YOLO(checkpoint)
+        model.train(resume=True, trainer=trainer, imgsz=imgsz, batch=batch)
+    else:
+        model = YOLO(BASE_WEIGHTS)  # load a pretrained model (recommended for training)
+        model.train(data=resolve_data_config(config_path), epochs=epochs, imgsz=imgsz, batch=batch,
+                    workers=workers, trainer=trainer, project=RUNS_DIR, name=name)
+
+    if cache:
+        saved = sum(loader.dataset.image_cache.report() for loader in (model.trainer.train_loader,
+                                                                       model.trainer.test_loader))
+        print(f"The image cache saved about {saved:.1f}s of decoding per epoch, "
+              f"{saved * model.trainer.epochs:.0f}s over {model.trainer.epochs} epochs")
+
+    # Path of the best checkpoint, e.g. runs/detect/train-0123456789ab/weights/best.pt
+    return model.trainer.best
 
-def main():
-    # Load a model
-    model = YOLO("models/yolo11n.pt")  # load a pretrained model (recommended for training)
 
-    # Train the model with 2 GPUs
-    results = model.train(data="train_config.yaml", epochs=100, imgsz=640)
\ No newline at end of file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the detector on data/dataset")
+    parser.add_argument("--config", default=CONFIG_PATH)
+    parser.add_argument("--epochs", type=int, default=100)
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--batch", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=8, help="DataLoader workers and cache-building processes")
+    parser.add_argument("--no-resume", action="store_true",
+                        help="Start a new run even if one on the same config and data was interrupted")
+    parser.add_argument("--no-cache", action="store_true", help="Decode the JPEGs every epoch as ultralytics does")
+    args = parser.parse_args()
+    main(args.config, args.epochs, args.imgsz, args.batch, args.workers, not args.no_resume, not args.no_cache)
@@ -0,0 +1,45 @@
+# tests/fakes.py
+import time
+
+import numpy as np
+
+
+class FakeTensor:
+    def __init__(self, array):
+        self.array = np.asarray(array, dtype=np.float32).reshape(-1, 6)
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self.array
+
+
+class FakeResult:
+    names = {0: "Black Mouse", 1: "SSD Card"}
+
+    def __init__(self, rows):
+        self.boxes = type("Boxes", (), {"data": FakeTensor(rows)})()
+
+
+class FakeModel:
+    """Stands in for an ultralytics model: returns the same rows for every image"""
+
+    def __init__(self, rows=((200, 200, 440, 440, 0.9, 1),), delay=0.0):
+        self.rows = rows
+        self.delay = delay
+        self.calls = 0
+        self.images = 0
+
+    def __call__(self, images, **kwargs):
+        if not isinstance(images, list):
+            images = [images]
+        self.calls += 1
+        self.images += len(images)
+        time.sleep(self.delay)
+        return [FakeResult(self.rows) for _ in images]
+
+
+def load_fake_model(delay=0.0):
+    """Model loader for worker processes, which can only import it by name"""
+    return FakeModel(delay=delay)
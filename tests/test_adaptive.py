@@ -0,0 +1,81 @@
+# tests/test_adaptive.py
+import pytest
+
+from utils.adaptive import LatencyController, operating_points
+
+
+def feed(controller, seconds, frames, start=0.0, fps=30.0):
+    """Observe frames whose single stage takes `seconds` (a number or a function of the operating point index)"""
+    changes = 0
+    for frame in range(frames):
+        cost = seconds(controller.index) if callable(seconds) else seconds
+        changes += controller.observe({"inference": cost}, now=start + frame / fps)
+    return changes
+
+
+def test_waits_for_a_full_window_before_switching():
+    controller = LatencyController(target_fps=10, window=30)
+    assert feed(controller, 0.2, 29) == 0
+    assert controller.index == 0
+    assert feed(controller, 0.2, 1, start=1.0) == 1
+    assert controller.index == 1
+
+
+def test_steps_down_above_and_up_below_the_thresholds():
+    points = []
+    controller = LatencyController(target_fps=10, window=10, hold_seconds=0.0, on_change=points.append)
+    feed(controller, 0.12, 10)
+    assert controller.load == pytest.approx(1.2)
+    assert controller.index == 1
+    feed(controller, 0.05, 10, start=1.0)
+    assert controller.load == pytest.approx(0.5)
+    assert controller.index == 0
+    assert controller.switches == 2
+    assert points == [controller.points[1], controller.points[0]]
+
+
+def test_load_between_the_thresholds_keeps_the_point():
+    controller = LatencyController(target_fps=10, window=10, hold_seconds=0.0)
+    feed(controller, 0.12, 10)
+    assert feed(controller, 0.085, 300, start=1.0) == 0
+    assert controller.index == 1
+    assert controller.switches == 1
+
+
+def test_holds_a_new_point_before_switching_again():
+    controller = LatencyController(target_fps=10, window=10, hold_seconds=2.0)
+    feed(controller, 0.2, 10)
+    assert controller.index == 1
+    # Overloaded for another second: a full window, but still inside the hold
+    assert feed(controller, 0.2, 30, start=1.0) == 0
+    assert controller.index == 1
+    assert feed(controller, 0.2, 30, start=2.5) == 1
+    assert controller.index == 2
+
+
+def test_settles_on_the_best_point_inside_the_budget():
+    # Each cheaper point costs 15% less; point 2 is the first one under budget
+    controller = LatencyController(target_fps=10, window=30, hold_seconds=1.0)
+    feed(controller, lambda index: 0.13 * 0.85 ** index, 3000)
+    assert controller.index == 2
+    assert controller.switches == 2
+
+
+def test_latency_budget_sums_the_stages_and_fps_takes_the_slowest():
+    by_latency = LatencyController(target_latency_ms=100, window=1)
+    by_fps = LatencyController(target_fps=10, window=1)
+    for controller in (by_latency, by_fps):
+        controller.observe({"inference": 0.05, "render": 0.03}, now=0.0)
+    assert by_latency.load == pytest.approx(0.8)
+    assert by_fps.load == pytest.approx(0.5)
+
+
+def test_requires_a_target():
+    with pytest.raises(ValueError):
+        LatencyController()
+
+
+def test_fixed_size_backends_only_adapt_interval_and_detail():
+    points = operating_points("tensorrt")
+    assert {point["imgsz"] for point in points} == {640}
+    assert len(points) == len({tuple(sorted(point.items())) for point in points})
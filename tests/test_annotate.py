@@ -0,0 +1,137 @@
+# tests/test_annotate.py
+import json
+import os
+import shutil
+
+import cv2
+import numpy as np
+import pytest
+
+from fakes import FakeModel
+from model_train.annotate import CACHE_FILE, annotate, split_for, upload_name
+
+
+@pytest.fixture
+def layout(tmp_path):
+    raw = tmp_path / "raw"
+    annotated = tmp_path / "annotated"
+    raw.mkdir()
+    annotated.mkdir()
+    (annotated / "classes.txt").write_text("Black Mouse\nSSD Card\n")
+    weights = tmp_path / "best.pt"
+    weights.write_bytes(b"weights")
+    rng = np.random.default_rng(0)
+    for index in range(6):
+        cv2.imwrite(str(raw / f"IMG{index}.jpg"), rng.integers(0, 256, (120, 160, 3), dtype=np.uint8))
+    return raw, annotated, tmp_path / "dataset", weights
+
+
+def run(layout, model=None, **kwargs):
+    raw, annotated, dataset, weights = layout
+    return annotate(model or FakeModel(), str(weights), str(raw), str(annotated), str(dataset),
+                    batch_size=4, workers=1, **kwargs)
+
+
+def dataset_images(dataset):
+    return {split: sorted(os.listdir(dataset / split / "images")) for split in ("train", "val")}
+
+
+def test_labels_are_normalized_to_the_original_image(layout):
+    run(layout)
+    _, annotated, _, _ = layout
+    label_files = sorted(os.listdir(annotated / "labels"))
+    assert len(label_files) == 6
+    cls, cx, cy, w, h = map(float, (annotated / "labels" / label_files[0]).read_text().split())
+    # 160x120 letterboxed into 640x640: scale 4, 80 px of padding on top and bottom
+    assert cls == 1
+    assert (cx, cy) == pytest.approx((0.5, 0.5))
+    assert (w, h) == pytest.approx((240 / 640, 240 / 480))
+
+
+def test_rerun_only_labels_new_or_changed_images(layout):
+    raw, _, _, _ = layout
+    run(layout)
+    model = FakeModel()
+    assert run(layout, model)["labeled"] == 0
+    assert model.images == 0
+
+    cv2.imwrite(str(raw / "IMG0.jpg"), np.zeros((120, 160, 3), dtype=np.uint8))
+    shutil.copy(raw / "IMG1.jpg", raw / "NEW.jpg")
+    cv2.imwrite(str(raw / "NEW2.jpg"), np.full((120, 160, 3), 90, dtype=np.uint8))
+    summary = run(layout, model)
+    # NEW.jpg has the same content as IMG1.jpg, so only the changed file and NEW2.jpg are labeled
+    assert summary["labeled"] == 2
+    assert summary["skipped_duplicates"] == 1
+
+
+def test_changed_image_replaces_its_old_copy(layout):
+    raw, annotated, dataset, _ = layout
+    run(layout)
+    cv2.imwrite(str(raw / "IMG0.jpg"), np.zeros((120, 160, 3), dtype=np.uint8))
+    run(layout)
+
+    copies = [name for name in os.listdir(annotated / "images") if name.endswith("-IMG0.jpg")]
+    assert len(copies) == 1
+    in_splits = [name for names in dataset_images(dataset).values() for name in names if name.endswith("-IMG0.jpg")]
+    assert in_splits == copies
+
+
+def test_new_weights_relabel_everything(layout):
+    _, _, _, weights = layout
+    run(layout)
+    weights.write_bytes(b"retrained")
+    assert run(layout)["labeled"] == 6
+
+
+def test_duplicate_content_is_cached_once_and_split_once(layout):
+    raw, annotated, dataset, _ = layout
+    shutil.copy(raw / "IMG2.jpg", raw / "IMG2 (1).jpg")
+
+    summary = run(layout)
+    assert summary["labeled"] == 6
+    assert summary["skipped_duplicates"] == 1
+
+    cache = json.loads((annotated / CACHE_FILE).read_text())
+    assert len(cache["images"]) == 6
+    assert len({entry["digest"] for entry in cache["images"].values()}) == 6
+    splits = dataset_images(dataset)
+    assert len(splits["train"]) + len(splits["val"]) == 6
+
+    # A rerun does not mistake the duplicate for a hand-labeled image
+    summary = run(layout)
+    assert summary["skipped_manual"] == 0
+    assert summary["skipped_duplicates"] == 1
+
+
+def test_hand_labeled_images_are_skipped(layout):
+    raw, annotated, _, _ = layout
+    (annotated / "images").mkdir()
+    (annotated / "labels").mkdir()
+    shutil.copy(raw / "IMG3.jpg", annotated / "images" / "1a2b3c4d-IMG3.jpg")
+    (annotated / "labels" / "1a2b3c4d-IMG3.txt").write_text("0 0.5 0.5 0.1 0.1\n")
+
+    summary = run(layout)
+    assert summary["skipped_manual"] == 1
+    assert summary["labeled"] == 5
+    assert (annotated / "labels" / "1a2b3c4d-IMG3.txt").read_text() == "0 0.5 0.5 0.1 0.1\n"
+
+
+def test_existing_split_members_stay_put(layout):
+    _, annotated, dataset, _ = layout
+    run(layout, val_fraction=0.5)
+    before = dataset_images(dataset)
+    run(layout, val_fraction=0.0, force=True)
+    assert dataset_images(dataset) == before
+
+
+def test_split_for_is_deterministic():
+    names = [f"{index:08x}-IMG{index}.jpg" for index in range(1000)]
+    splits = [split_for(name, 0.2) for name in names]
+    assert splits == [split_for(name, 0.2) for name in names]
+    assert 100 < splits.count("val") < 300
+    assert split_for(names[0], 0.0) == "train"
+
+
+def test_upload_name_matches_label_studio():
+    assert upload_name("IMG20250206095902 (1).jpg") == "IMG20250206095902_1.jpg"
+    assert upload_name("IMG20250206095902.jpg") == "IMG20250206095902.jpg"
@@ -0,0 +1,71 @@
+# tests/test_buffers.py
+import numpy as np
+import pytest
+
+from utils.buffers import LETTERBOX_FILL, FramePool, letterbox_geometry, letterbox_into
+from utils.detections import Detections
+
+
+def test_pool_reuses_released_buffers():
+    pool = FramePool((48, 64, 3))
+    in_flight = [pool.acquire() for _ in range(3)]
+    for _ in range(100):
+        pool.release(in_flight.pop(0))
+        in_flight.append(pool.acquire())
+    stats = pool.get_stats()
+    assert stats["allocations"] == 3
+    assert stats["reuses"] == 100
+    assert len({id(buffer) for buffer in in_flight}) == 3
+
+
+def test_pool_ignores_buffers_of_another_shape():
+    pool = FramePool((48, 64, 3))
+    pool.release(np.empty((48, 64, 1), dtype=np.uint8))
+    pool.release(np.empty((48, 64, 3), dtype=np.float32))
+    pool.release(None)
+    assert pool.get_stats()["free"] == 0
+
+
+def test_pool_copy_resizes_into_a_pooled_buffer():
+    pool = FramePool((48, 64, 3))
+    buffer = pool.copy(np.full((96, 128, 3), 7, dtype=np.uint8))
+    assert buffer.shape == (48, 64, 3)
+    assert (buffer == 7).all()
+    pool.release(buffer)
+    assert pool.copy(np.zeros((48, 64, 3), dtype=np.uint8)) is buffer
+    assert pool.get_stats()["copies"] == 2
+
+
+def bright_box(image):
+    ys, xs = np.nonzero(image[..., 0] > 128)
+    return [xs.min(), ys.min(), xs.max() + 1, ys.max() + 1]
+
+
+@pytest.mark.parametrize("width, height, geometry", [
+    (1280, 720, (0.5, 0, 140)),
+    (480, 640, (1.0, 80, 0)),
+    (1000, 500, (0.64, 0, 160)),
+])
+def test_letterbox_geometry_maps_boxes_onto_the_letterboxed_frame(width, height, geometry):
+    frame = np.zeros((height, width, 3), dtype=np.uint8)
+    box = [100, 200, 300, 400]
+    frame[box[1]:box[3], box[0]:box[2]] = 255
+    dst = letterbox_into(frame, np.empty((640, 640, 3), dtype=np.uint8))
+
+    scale, left, top = letterbox_geometry(frame.shape, dst.shape)
+    assert (scale, left, top) == pytest.approx(geometry)
+    detections = Detections(np.array([box + [0.9, 0]], dtype=np.float32)).transform(scale, left, top)
+    assert detections.xyxy[0].tolist() == pytest.approx(bright_box(dst), abs=1)
+
+    # And back: undoing the transform recovers the original box
+    back = (detections.xyxy[0] - [left, top, left, top]) / scale
+    assert back.tolist() == pytest.approx(box, abs=1e-3)
+
+
+def test_letterbox_pads_the_borders():
+    frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+    dst = np.zeros((640, 640, 3), dtype=np.uint8)
+    letterbox_into(frame, dst)
+    assert (dst[:140] == LETTERBOX_FILL).all()
+    assert (dst[500:] == LETTERBOX_FILL).all()
+    assert (dst[140:500] == 0).all()
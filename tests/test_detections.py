@@ -0,0 +1,53 @@
+# tests/test_detections.py
+import numpy as np
+
+from fakes import FakeResult
+from utils.detections import Detections
+
+NAMES = {0: "Black Mouse", 1: "SSD Card"}
+
+
+def sample(count=3):
+    data = np.array([[10 * i, 10 * i, 10 * i + 5, 10 * i + 5, 0.5 + i / 10, i % 2] for i in range(count)],
+                    dtype=np.float32)
+    return Detections(data, NAMES)
+
+
+def test_from_results():
+    detections = Detections.from_results([FakeResult([(1, 2, 3, 4, 0.9, 1)])])
+    assert detections.xyxy.tolist() == [[1, 2, 3, 4]]
+    assert detections.cls.tolist() == [1]
+    assert detections.track_ids.tolist() == [-1]
+    assert detections.names == NAMES
+    assert len(Detections.from_results([])) == 0
+
+
+def test_from_results_drops_the_ultralytics_track_column():
+    result = FakeResult([])
+    result.boxes.data.array = np.array([[1, 2, 3, 4, 7, 0.9, 1]], dtype=np.float32)
+    detections = Detections.from_results([result])
+    assert detections.data.shape == (1, 6)
+    assert detections.conf.tolist() == [np.float32(0.9)]
+    assert detections.cls.tolist() == [1]
+
+
+def test_large_track_ids_survive_every_round_trip():
+    # float32 cannot hold IDs past 2**24; a long run reaches them
+    ids = np.array([2 ** 24 + 1, -1, 2 ** 40 + 3], dtype=np.int64)
+    detections = sample()
+    detections.track_ids = ids
+    assert detections.track_ids.tolist() == ids.tolist()
+
+    tracked = detections.tracked()
+    assert tracked.track_ids.tolist() == [2 ** 24 + 1, 2 ** 40 + 3]
+    assert tracked.xyxy.tolist() == detections.xyxy[[0, 2]].tolist()
+
+    merged = Detections.concatenate([tracked, Detections(), detections.select([1])])
+    assert merged.track_ids.tolist() == [2 ** 24 + 1, 2 ** 40 + 3, -1]
+    assert merged.data.tolist() == detections.data[[0, 2, 1]].tolist()
+
+
+def test_transform_scales_then_shifts_boxes():
+    detections = sample(1).transform(scale=2, dx=5, dy=-1)
+    assert detections.xyxy.tolist() == [[5, -1, 15, 9]]
+    assert detections.conf.tolist() == [np.float32(0.5)]
@@ -0,0 +1,100 @@
+# tests/test_events.py
+import numpy as np
+import pytest
+
+from utils.detections import Detections
+from utils.events import TrackEventLog, TrackEventStore
+
+NAMES = {0: "Black Mouse", 1: "SSD Card"}
+
+
+def frame(track_ids, classes, x=0.0):
+    data = np.array([[x, 0, x + 10, 10, 0.9, cls] for cls in classes], dtype=np.float32).reshape(-1, 6)
+    return Detections(data, NAMES, track_ids)
+
+
+def write(directory, frames, chunk_rows=4):
+    """One run: (timestamp, stream, detections) per frame; stop() writes everything"""
+    log = TrackEventLog(str(directory), chunk_rows=chunk_rows)
+    for timestamp, stream, detections in frames:
+        log.append(detections, timestamp, stream)
+    log.stop()
+    return log
+
+
+def test_append_round_trips_rows(tmp_path):
+    big_id = 2 ** 40 + 7
+    write(tmp_path, [
+        (100.0, "cam", frame([0, -1], [0, 1])),
+        (101.0, "cam", frame([big_id], [1], x=5)),
+    ])
+    events = TrackEventStore(str(tmp_path)).query()
+    # Only confirmed tracks are logged
+    assert events["track_id"].tolist() == [0, big_id]
+    assert events["timestamp"].tolist() == [100.0, 101.0]
+    assert events["cls"].tolist() == [0, 1]
+    assert events["x1"].tolist() == [0.0, 5.0]
+    assert events["session"].tolist() == [0, 0]
+
+
+def test_query_filters_and_prunes_chunks(tmp_path):
+    # chunk_rows=2: each chunk holds one second of one class and stream
+    write(tmp_path, [
+        (t, "front" if t % 2 else "back", frame([2 * t, 2 * t + 1], [t % 2, t % 2]))
+        for t in range(10)
+    ], chunk_rows=2)
+    store = TrackEventStore(str(tmp_path))
+    assert len(store.index["chunks"]) == 10
+
+    mice = store.query("Black Mouse")
+    assert set(mice["cls"].tolist()) == {0}
+    assert len(mice) == 10
+    assert store.chunks_read == 5
+
+    store.chunks_read = 0
+    window = store.query(start=3, end=5)
+    assert sorted(set(window["timestamp"].tolist())) == [3, 4, 5]
+    assert store.chunks_read == 3
+
+    front = store.query(stream="front")
+    assert set(front["timestamp"].astype(int).tolist()) == {1, 3, 5, 7, 9}
+
+    store.chunks_read = 0
+    track = store.query(track_id=9)
+    assert track["timestamp"].tolist() == [4.0]
+    assert store.chunks_read == 1
+
+    assert len(store.query("SSD Card", stream="back")) == 0
+    assert len(store.query("Unknown")) == 0
+
+
+def test_dwell_times_keep_runs_apart(tmp_path):
+    # Track IDs restart at 0 every run
+    write(tmp_path, [(t, "camera", frame([0], [0])) for t in (100.0, 130.0)])
+    write(tmp_path, [(t, "camera", frame([0], [0])) for t in (90_000.0, 90_010.0)])
+
+    dwell = TrackEventStore(str(tmp_path)).dwell_times()
+    assert set(dwell) == {("camera", 0, 0), ("camera", 1, 0)}
+    assert dwell[("camera", 0, 0)]["dwell"] == pytest.approx(30)
+    assert dwell[("camera", 1, 0)]["dwell"] == pytest.approx(10)
+    assert dwell[("camera", 1, 0)]["class"] == "Black Mouse"
+
+
+def test_chunks_from_before_sessions_still_load(tmp_path):
+    legacy_dtype = np.dtype([("timestamp", np.float64), ("stream", np.int32), ("track_id", np.int32),
+                             ("cls", np.int16), ("x1", np.float32), ("y1", np.float32), ("x2", np.float32),
+                             ("y2", np.float32), ("conf", np.float32)])
+    rows = np.zeros(2, dtype=legacy_dtype)
+    rows["timestamp"] = [1.0, 5.0]
+    rows["track_id"] = [3, 3]
+    np.save(tmp_path / "chunk_000000.npy", rows)
+    (tmp_path / "index.json").write_text(
+        '{"chunks": [{"file": "chunk_000000.npy", "rows": 2, "min_time": 1.0, "max_time": 5.0, '
+        '"min_track": 3, "max_track": 3, "classes": [0], "streams": [0]}], '
+        '"streams": {"camera": 0}, "names": {"0": "Black Mouse"}}'
+    )
+    write(tmp_path, [(10.0, "camera", frame([3], [0]))])
+
+    dwell = TrackEventStore(str(tmp_path)).dwell_times()
+    assert dwell[("camera", -1, 3)]["dwell"] == pytest.approx(4)
+    assert ("camera", 0, 3) in dwell
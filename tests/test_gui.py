@@ -0,0 +1,35 @@
+# tests/test_gui.py
+import numpy as np
+import pytest
+
+pytest.importorskip("customtkinter")
+
+from gui.main import ObjectDetectionApp
+from utils.detections import Detections
+from utils.stats import DetectionStats
+from utils.tracking import ObjectTracker
+from utils.visualization import Visualizer
+
+NAMES = {0: "Black Mouse", 1: "SSD Card"}
+
+
+def bare_app():
+    # Only the parts draw_detections uses; the window is never created
+    app = ObjectDetectionApp.__new__(ObjectDetectionApp)
+    app.tracker = ObjectTracker()
+    app.visualizer = Visualizer(app.tracker)
+    app.stats = DetectionStats()
+    return app
+
+
+def test_tracks_expire_over_empty_keyframes():
+    app = bare_app()
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    detections = Detections(np.array([[100, 100, 200, 200, 0.9, 0]], dtype=np.float32), NAMES)
+    app.draw_detections(frame, detections)
+    assert app.tracker.slots
+
+    for _ in range(app.tracker.max_lost_frames + 1):
+        app.draw_detections(frame, Detections(names=NAMES))
+    assert not app.tracker.slots
+    assert app.stats.frames == app.tracker.max_lost_frames + 2
@@ -0,0 +1,43 @@
+# tests/test_headless.py
+import cv2
+import numpy as np
+
+from utils.headless import iter_frames
+
+
+def write_video(path, frames):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 30.0, (64, 48))
+    for index in range(frames):
+        writer.write(np.full((48, 64, 3), index * 8, dtype=np.uint8))
+    writer.release()
+
+
+def test_video_resumes_at_start_frame(tmp_path):
+    path = tmp_path / "clip.avi"
+    write_video(path, 20)
+    frames = {index: frame for index, frame, _ in iter_frames(str(path))}
+    resumed = [(index, frame) for index, frame, _ in iter_frames(str(path), start=15)]
+    assert [index for index, _ in resumed] == [15, 16, 17, 18, 19]
+    for index, frame in resumed:
+        assert np.array_equal(frame, frames[index])
+
+
+def test_image_folder_resumes_at_start_frame(tmp_path):
+    for index in range(5):
+        cv2.imwrite(str(tmp_path / f"{index:03d}.png"), np.full((8, 8, 3), index, dtype=np.uint8))
+    resumed = [(index, int(frame[0, 0, 0])) for index, frame, _ in iter_frames(str(tmp_path), start=3)]
+    assert resumed == [(3, 3), (4, 4)]
+
+
+def test_properties_report_the_source_fps(tmp_path):
+    path = tmp_path / "clip.avi"
+    write_video(path, 3)
+    properties = {}
+    frames = iter_frames(str(path), properties=properties)
+    next(frames)
+    assert properties["fps"] == 30.0
+    frames.close()
+
+    properties = {}
+    next(iter_frames(str(tmp_path), properties=properties), None)
+    assert properties["fps"] is None
@@ -0,0 +1,57 @@
+# tests/test_image_cache.py
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from model_train.image_cache import ImageCache, resize_for_training
+
+
+@pytest.fixture
+def images(tmp_path):
+    rng = np.random.default_rng(0)
+    paths = []
+    for index, (height, width) in enumerate([(120, 160), (300, 200), (64, 64)]):
+        path = str(tmp_path / f"img{index}.png")
+        cv2.imwrite(path, rng.integers(0, 256, (height, width, 3), dtype=np.uint8))
+        paths.append(path)
+    return paths
+
+
+def test_cached_images_match_a_fresh_decode(images, tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / "cache")
+    ImageCache(images, 128, "train", cache_dir, workers=1)
+    # A second instance maps the existing file instead of decoding again
+    monkeypatch.setattr(ImageCache, "build", lambda self, file_hashes: pytest.fail("cache was rebuilt"))
+    cache = ImageCache(images, 128, "train", cache_dir, workers=1)
+    for path in images:
+        image, hw0, hw = cache.load(path)
+        expected = resize_for_training(cv2.imread(path), 128)
+        assert np.array_equal(image, expected)
+        assert hw0 == cv2.imread(path).shape[:2]
+        assert hw == expected.shape[:2]
+    assert isinstance(cache.array, np.memmap)
+
+
+def test_changed_image_invalidates_the_cache(images, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    old = ImageCache(images, 128, "train", cache_dir, workers=1)
+    cv2.imwrite(images[1], np.full((50, 90, 3), 7, dtype=np.uint8))
+    # Make sure the size/mtime check sees the new file even on coarse filesystem clocks
+    os.utime(images[1], ns=(os.stat(images[1]).st_atime_ns, os.stat(images[1]).st_mtime_ns + 10 ** 9))
+
+    cache = ImageCache(images, 128, "train", cache_dir, workers=1)
+    assert cache.key != old.key
+    image, hw0, _ = cache.load(images[1])
+    assert hw0 == (50, 90)
+    assert np.array_equal(image, resize_for_training(cv2.imread(images[1]), 128))
+
+
+def test_other_image_size_uses_its_own_cache(images, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    small = ImageCache(images, 64, "train", cache_dir, workers=1)
+    large = ImageCache(images, 128, "train", cache_dir, workers=1)
+    assert small.npy_path != large.npy_path
+    assert max(small.load(images[1])[2]) == 64
+    assert max(large.load(images[1])[2]) == 128
@@ -0,0 +1,50 @@
+# tests/test_kalman.py
+import numpy as np
+import pytest
+
+from utils.kalman import BatchKalmanFilter, xyah_to_xyxy, xyxy_to_xyah
+
+
+def test_box_conversions_round_trip():
+    boxes = np.array([[10, 20, 50, 100], [0, 0, 30, 15]], dtype=np.float64)
+    xyah = xyxy_to_xyah(boxes)
+    assert xyah[0] == pytest.approx([30, 60, 0.5, 80])
+    assert xyah_to_xyxy(xyah) == pytest.approx(boxes)
+
+
+def test_predict_moves_by_the_velocity_and_grows_uncertainty():
+    kf = BatchKalmanFilter()
+    mean, covariance = kf.initiate([[100, 100, 0.5, 80]])
+    mean[0, 4:6] = [3, -2]
+    predicted, predicted_cov = kf.predict(mean, covariance)
+    assert predicted[0, :4] == pytest.approx([103, 98, 0.5, 80])
+    assert np.all(np.diag(predicted_cov[0]) > np.diag(covariance[0]))
+
+
+def test_update_moves_toward_the_measurement_and_shrinks_uncertainty():
+    kf = BatchKalmanFilter()
+    mean, covariance = kf.predict(*kf.initiate([[100, 100, 0.5, 80]]))
+    updated, updated_cov = kf.update(mean, covariance, np.array([[110, 100, 0.5, 80]]))
+    assert 100 < updated[0, 0] < 110
+    assert updated[0, 1] == pytest.approx(100)
+    assert np.all(np.diag(updated_cov[0])[:4] < np.diag(covariance[0])[:4])
+
+
+def test_velocity_is_learned_from_repeated_updates():
+    kf = BatchKalmanFilter()
+    mean, covariance = kf.initiate([[100, 100, 0.5, 80]])
+    for step in range(1, 30):
+        mean, covariance = kf.predict(mean, covariance)
+        mean, covariance = kf.update(mean, covariance, np.array([[100 + 5 * step, 100, 0.5, 80]]))
+    assert mean[0, 4] == pytest.approx(5, abs=0.1)
+
+
+def test_batch_matches_one_track_at_a_time():
+    kf = BatchKalmanFilter()
+    measurements = np.array([[100, 100, 0.5, 80], [300, 50, 1.0, 20]])
+    mean, covariance = kf.predict(*kf.initiate(measurements))
+    batch = kf.update(mean, covariance, measurements + 4)
+    for i in range(2):
+        single = kf.update(mean[i:i + 1], covariance[i:i + 1], measurements[i:i + 1] + 4)
+        assert single[0][0] == pytest.approx(batch[0][i])
+        assert single[1][0] == pytest.approx(batch[1][i])
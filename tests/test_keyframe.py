@@ -0,0 +1,32 @@
+# tests/test_keyframe.py
+import numpy as np
+
+from utils.detections import Detections
+from utils.keyframe import KeyframeScheduler
+from utils.tracking import ObjectTracker
+
+
+def test_uncertainty_comes_from_the_published_snapshot():
+    frame = np.zeros((64, 64, 3), dtype=np.uint8)
+    scheduler = KeyframeScheduler(interval=100, uncertainty_threshold=0.05)
+    tracker = ObjectTracker()
+    tracker.update(Detections(np.array([[10, 10, 30, 40, 0.9, 0]], dtype=np.float32)))
+    assert scheduler.should_detect(frame)
+
+    frames = 0
+    while True:
+        frames += 1
+        detect = scheduler.should_detect(frame)
+        if detect:
+            break
+        tracker.predict()
+        scheduler.observe(tracker)
+    # The uncertainty grows with every prediction until it forces a keyframe well before the interval
+    assert 1 < frames < 100
+    assert scheduler.uncertainty > 0.05
+
+
+def test_unobserved_tracker_does_not_trigger_keyframes():
+    frame = np.zeros((64, 64, 3), dtype=np.uint8)
+    scheduler = KeyframeScheduler(interval=10, uncertainty_threshold=0.0)
+    assert [scheduler.should_detect(frame) for _ in range(10)] == [True] + [False] * 9
@@ -0,0 +1,36 @@
+# tests/test_main.py
+import sys
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def parse(monkeypatch):
+    parsed = []
+    for name in ("run_gui", "run_track", "run_annotate"):
+        monkeypatch.setattr(main, name, parsed.append)
+
+    def parse(*argv):
+        monkeypatch.setattr(sys, "argv", ["main.py", *argv])
+        main.main()
+        return parsed[-1]
+    return parse
+
+
+def test_shared_options_are_accepted_after_the_subcommand(parse):
+    args = parse("track", "video.mp4", "--model", "best.onnx", "--backend", "onnx", "--detect-interval", "4")
+    assert (args.command, args.source, args.model, args.backend, args.detect_interval) == (
+        "track", "video.mp4", "best.onnx", "onnx", 4)
+
+
+def test_options_before_the_subcommand_are_kept(parse):
+    args = parse("--model", "best.pt", "--reid", "track", "video.mp4", "--output", "out.mp4")
+    assert (args.model, args.reid, args.output, args.metrics_host) == ("best.pt", True, "out.mp4", "127.0.0.1")
+    assert parse("--retrain", "annotate").retrain
+
+
+def test_gui_is_the_default_command(parse):
+    args = parse("--detect-interval", "2")
+    assert (args.command, args.detect_interval, args.record_backend) == ("gui", 2, "opencv")
@@ -0,0 +1,61 @@
+# tests/test_matching.py
+import numpy as np
+import pytest
+
+from utils.matching import giou_matrix, iou_matrix, linear_assignment, nms
+
+
+def test_iou_matrix():
+    boxes = [[0, 0, 10, 10], [5, 0, 15, 10], [20, 20, 30, 30]]
+    ious = iou_matrix(boxes, boxes)
+    assert ious.shape == (3, 3)
+    assert np.diag(ious) == pytest.approx([1, 1, 1])
+    # Half of each box overlaps: 50 / (100 + 100 - 50)
+    assert ious[0, 1] == pytest.approx(1 / 3)
+    assert ious[0, 2] == 0
+    assert np.array_equal(ious, ious.T)
+
+
+def test_iou_matrix_handles_empty_and_degenerate_boxes():
+    assert iou_matrix(np.empty((0, 4)), [[0, 0, 1, 1]]).shape == (0, 1)
+    assert iou_matrix([[0, 0, 0, 0]], [[0, 0, 0, 0]])[0, 0] == 0
+
+
+def test_giou_matrix():
+    boxes = [[0, 0, 10, 10], [5, 0, 15, 10], [20, 0, 30, 10]]
+    gious = giou_matrix(boxes, boxes)
+    assert np.diag(gious) == pytest.approx([1, 1, 1])
+    # Overlapping boxes fill their enclosing box, so GIOU equals IOU
+    assert gious[0, 1] == pytest.approx(1 / 3)
+    # Disjoint: IOU 0 minus the 100 of 300 enclosing area neither box covers
+    assert gious[0, 2] == pytest.approx(-1 / 3)
+
+
+def test_linear_assignment_finds_the_optimal_pairs():
+    # Greedy would take the 0.1 pair and leave row 1 with 0.9
+    cost = np.array([[0.1, 0.2], [0.15, 0.9]])
+    matches, unmatched_rows, unmatched_cols = linear_assignment(cost, max_cost=1.0)
+    assert sorted(map(tuple, matches.tolist())) == [(0, 1), (1, 0)]
+    assert len(unmatched_rows) == 0 and len(unmatched_cols) == 0
+
+
+def test_linear_assignment_gates_pairs_above_max_cost():
+    cost = np.array([[0.1, 0.95], [0.95, 0.8]])
+    matches, unmatched_rows, unmatched_cols = linear_assignment(cost, max_cost=0.7)
+    assert matches.tolist() == [[0, 0]]
+    assert unmatched_rows.tolist() == [1]
+    assert unmatched_cols.tolist() == [1]
+
+
+def test_linear_assignment_with_no_rows_or_columns():
+    matches, unmatched_rows, unmatched_cols = linear_assignment(np.empty((2, 0)), max_cost=0.7)
+    assert matches.shape == (0, 2)
+    assert unmatched_rows.tolist() == [0, 1]
+    assert unmatched_cols.tolist() == []
+
+
+def test_nms_is_per_class():
+    boxes = [[0, 0, 10, 10], [1, 0, 11, 10], [1, 0, 11, 10]]
+    scores = [0.9, 0.8, 0.7]
+    assert nms(boxes, scores).tolist() == [0]
+    assert nms(boxes, scores, classes=[0, 0, 1]).tolist() == [0, 2]
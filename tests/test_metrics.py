@@ -0,0 +1,51 @@
+# tests/test_metrics.py
+import re
+
+import numpy as np
+
+from utils.detections import Detections
+from utils.metrics import prometheus_text
+from utils.stats import DetectionStats
+
+SAMPLE = re.compile(r'^(object_tracking_\w+)\{((?:\w+="[^"]*",?)*)\} (-?\d+(?:\.\d+)?)$')
+
+
+def parse(text):
+    """{(metric, labels): value} after checking every line against the text exposition format"""
+    assert text.endswith("\n")
+    samples = {}
+    declared = {}
+    for line in text.splitlines():
+        if line.startswith("# HELP "):
+            name = line.split()[2]
+            assert name not in declared
+            declared[name] = None
+        elif line.startswith("# TYPE "):
+            _, _, name, kind = line.split()
+            assert name in declared and kind in ("counter", "gauge")
+            declared[name] = kind
+        else:
+            match = SAMPLE.match(line)
+            assert match, line
+            name, labels, value = match.groups()
+            assert declared.get(name) is not None, f"{name} has no TYPE line before its samples"
+            samples[name, tuple(re.findall(r'(\w+)="([^"]*)"', labels))] = float(value)
+    return samples
+
+
+def test_prometheus_text_is_well_formed():
+    stats = DetectionStats()
+    names = {0: "Black Mouse", 1: "SSD Card"}
+    data = np.array([[0, 0, 10, 10, 0.8, 0], [5, 5, 20, 20, 0.6, 1]], dtype=np.float32)
+    stats.update(Detections(data, names, track_ids=[1, 2]))
+    stats.update(Detections())
+    samples = parse(prometheus_text({"cam0": stats, "cam1": DetectionStats()}))
+
+    assert samples["object_tracking_frames_total", (("stream", "cam0"),)] == 2
+    assert samples["object_tracking_detections_total", (("stream", "cam0"),)] == 2
+    assert samples["object_tracking_unique_objects_total", (("stream", "cam0"),)] == 2
+    assert samples["object_tracking_avg_confidence_percent", (("stream", "cam0"),)] == 70
+    assert samples["object_tracking_class_detections_total", (("stream", "cam0"), ("class", "SSD Card"))] == 1
+    assert samples["object_tracking_frames_total", (("stream", "cam1"),)] == 0
+    windows = {labels[1][1] for metric, labels in samples if metric == "object_tracking_window_fps"}
+    assert windows == {"1s", "1m", "1h"}
@@ -0,0 +1,57 @@
+# tests/test_multi_stream.py
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from fakes import FakeModel
+from utils.multi_stream import MultiStreamServer, default_policy
+from utils.pipeline import BLOCK, DROP_OLDEST
+
+
+def write_clip(path, frames):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 30, (160, 120))
+    for index in range(frames):
+        writer.write(np.full((120, 160, 3), index % 255, dtype=np.uint8))
+    writer.release()
+    return str(path)
+
+
+def run_server(server, timeout=30):
+    server.start()
+    deadline = time.time() + timeout
+    while server.is_running and time.time() < deadline:
+        time.sleep(0.02)
+    server.stop()
+
+
+def test_video_files_block_instead_of_dropping(tmp_path):
+    short = write_clip(tmp_path / "short.avi", 20)
+    long = write_clip(tmp_path / "long.avi", 120)
+    assert default_policy(long) == BLOCK
+    assert default_policy("0") == DROP_OLDEST
+
+    server = MultiStreamServer(FakeModel(), [short, long], max_batch=4)
+    run_server(server)
+
+    assert [stream.frames for stream in server.streams] == [20, 120]
+    assert [stream.queue.dropped for stream in server.streams] == [0, 0]
+
+
+def test_batches_take_frames_round_robin(tmp_path):
+    clips = [write_clip(tmp_path / f"clip{index}.avi", 10) for index in range(3)]
+    server = MultiStreamServer(FakeModel(), clips, max_batch=3)
+    for stream in server.streams:
+        for _ in range(2):
+            stream.queue.put(stream.read())
+
+    # Every stream contributes one frame before any contributes a second
+    assert [stream_id for stream_id, _ in server.collect_batch()] == [0, 1, 2]
+    assert [stream_id for stream_id, _ in server.collect_batch()] == [1, 2, 0]
+    server.stop()
+
+
+def test_invalid_policy_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        MultiStreamServer(FakeModel(), [write_clip(tmp_path / "clip.avi", 2)], queue_policy="fifo")
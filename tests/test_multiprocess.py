@@ -0,0 +1,112 @@
+# tests/test_multiprocess.py
+import time
+
+import cv2
+import numpy as np
+
+from fakes import load_fake_model
+from utils.multiprocess import CAPTURE, CONSUMER, FREE, INFERENCE, RENDER, TO_RENDER, ProcessPipeline
+
+
+def write_video(path, frames):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 30.0, (64, 48))
+    for index in range(frames):
+        writer.write(np.full((48, 64, 3), index * 4 % 256, dtype=np.uint8))
+    writer.release()
+
+
+def start_pipeline(tmp_path, frames=60, delay=0.0):
+    path = tmp_path / "clip.avi"
+    write_video(path, frames)
+    return ProcessPipeline(str(path), load_fake_model, (delay,), frame_size=(64, 64), slots=4).start()
+
+
+def run(pipeline, on_frame, timeout=60.0):
+    """Frame indices delivered until the end of the stream; on_frame decides whether to release each slot"""
+    seen = []
+    deadline = time.time() + timeout
+    while not pipeline.finished:
+        assert time.time() < deadline, "pipeline did not finish"
+        item = pipeline.get(timeout=0.1)
+        if item is None:
+            continue
+        slot, frame, info = item
+        seen.append(info["frame_index"])
+        if on_frame(slot, len(seen)):
+            pipeline.release(slot)
+    return seen
+
+
+def settle(pipeline, timeout=5.0):
+    """Let pending fences resolve once the workers have exited"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        pipeline.check_workers()
+        if not pipeline.fences:
+            return
+        time.sleep(0.05)
+
+
+def test_capture_restart_does_not_repeat_frames(tmp_path):
+    pipeline = start_pipeline(tmp_path)
+    try:
+        def on_frame(slot, count):
+            if count == 10:
+                pipeline.processes[CAPTURE].kill()
+            return True
+
+        seen = run(pipeline, on_frame)
+        settle(pipeline)
+        assert pipeline.restarts[CAPTURE] == 1
+        assert seen == sorted(set(seen))
+        assert pipeline.fps() == 30.0
+        assert list(pipeline.slot_state) == [FREE] * pipeline.slots
+    finally:
+        pipeline.stop()
+
+
+def test_slot_lost_by_a_crashed_worker_is_reclaimed(tmp_path):
+    pipeline = start_pipeline(tmp_path, delay=0.02)
+    try:
+        def on_frame(slot, count):
+            if count == 10:
+                # Inference dies after marking its slot as sent but before sending it
+                deadline = time.time() + 5.0
+                while INFERENCE not in pipeline.slot_state[:] and time.time() < deadline:
+                    time.sleep(0.001)
+                for held in range(pipeline.slots):
+                    if pipeline.slot_state[held] == INFERENCE:
+                        pipeline.slot_state[held] = TO_RENDER
+                pipeline.processes[INFERENCE].kill()
+            return True
+
+        seen = run(pipeline, on_frame)
+        settle(pipeline)
+        assert pipeline.restarts[INFERENCE] == 1
+        assert len(seen) == len(set(seen))
+        assert list(pipeline.slot_state) == [FREE] * pipeline.slots
+    finally:
+        pipeline.stop()
+
+
+def test_slot_held_by_the_consumer_survives_a_restart(tmp_path):
+    pipeline = start_pipeline(tmp_path)
+    held = []
+    try:
+        def on_frame(slot, count):
+            if count == 1:
+                held.append(slot)
+                return False
+            if count == 10:
+                pipeline.processes[RENDER].kill()
+            return True
+
+        seen = run(pipeline, on_frame)
+        settle(pipeline)
+        assert pipeline.restarts[RENDER] == 1
+        assert len(seen) == len(set(seen))
+        states = list(pipeline.slot_state)
+        assert states[held[0]] == CONSUMER
+        assert states.count(FREE) == pipeline.slots - 1
+    finally:
+        pipeline.stop()
@@ -0,0 +1,93 @@
+# tests/test_pipeline.py
+import threading
+import time
+
+import pytest
+
+from utils.pipeline import BLOCK, DROP_NEWEST, DROP_OLDEST, FrameQueue, Pipeline
+
+
+def fill(queue, items):
+    dropped = []
+    queue.on_drop = dropped.append
+    accepted = [queue.put(item, timeout=0.05) for item in items]
+    return accepted, dropped
+
+
+def drain(queue):
+    items = []
+    while len(queue):
+        items.append(queue.get(timeout=0))
+    return items
+
+
+def test_drop_oldest_keeps_the_newest_items():
+    queue = FrameQueue(2, DROP_OLDEST)
+    accepted, dropped = fill(queue, [1, 2, 3, 4])
+    assert accepted == [True, True, True, True]
+    assert dropped == [1, 2]
+    assert queue.dropped == 2
+    assert drain(queue) == [3, 4]
+
+
+def test_drop_newest_refuses_items_when_full():
+    queue = FrameQueue(2, DROP_NEWEST)
+    accepted, dropped = fill(queue, [1, 2, 3, 4])
+    assert accepted == [True, True, False, False]
+    assert dropped == [3, 4]
+    assert queue.dropped == 2
+    assert drain(queue) == [1, 2]
+
+
+def test_block_waits_for_room_and_gives_up_after_the_timeout():
+    queue = FrameQueue(2, BLOCK)
+    accepted, dropped = fill(queue, [1, 2, 3])
+    assert accepted == [True, True, False]
+    assert dropped == [3]
+    assert drain(queue) == [1, 2]
+
+    queue.put(1)
+    queue.put(2)
+    threading.Timer(0.05, queue.get).start()
+    assert queue.put(3, timeout=2.0)
+    assert drain(queue) == [2, 3]
+
+
+def test_close_wakes_a_blocked_put():
+    queue = FrameQueue(2, BLOCK)
+    queue.put(1)
+    queue.put(2)
+    results = []
+    producer = threading.Thread(target=lambda: results.append(queue.put(3)))
+    producer.start()
+    time.sleep(0.05)
+    queue.close()
+    producer.join(1.0)
+    assert not producer.is_alive()
+    assert results == [False]
+    # Items already queued can still be taken, then get reports the close
+    assert drain(queue) == [1, 2]
+    assert queue.get(timeout=0) is None
+
+
+def test_stop_does_not_deadlock_a_pipeline_with_a_blocking_queue():
+    released = threading.Event()
+    pipeline = Pipeline(queue_size=2, queue_policy=BLOCK)
+    pipeline.add_stage("source", lambda: 1)
+    pipeline.add_stage("slow", lambda item: released.wait(5.0))
+    pipeline.start()
+    time.sleep(0.1)
+    assert pipeline.get_stats()["slow"]["queue_depth"] == 2
+
+    start = time.perf_counter()
+    pipeline.stop(timeout=1.0)
+    released.set()
+    for stage in pipeline.stages:
+        stage.join(1.0)
+        assert not stage.is_alive()
+    assert time.perf_counter() - start < 2.0
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        FrameQueue(2, "drop_all")
@@ -0,0 +1,41 @@
+# tests/test_profiling.py
+import json
+import time
+
+from utils.profiling import NULL_SECTION, Profiler
+
+
+def test_nested_sections_export_a_valid_chrome_trace(tmp_path):
+    profiler = Profiler(enabled=True)
+    with profiler.section("outer"):
+        time.sleep(0.002)
+        with profiler.section("inner"):
+            time.sleep(0.002)
+
+    with open(profiler.export_chrome_trace(str(tmp_path / "trace.json"))) as f:
+        trace = json.load(f)
+    events = {event["name"]: event for event in trace["traceEvents"] if event["ph"] == "X"}
+    assert set(events) == {"outer", "inner"}
+    for event in events.values():
+        assert isinstance(event["ts"], (int, float)) and event["dur"] > 0
+        assert {"pid", "tid"} <= set(event)
+    outer, inner = events["outer"], events["inner"]
+    # Times are in microseconds and the inner section lies within the outer one
+    assert outer["dur"] > inner["dur"] >= 2000
+    assert outer["ts"] <= inner["ts"] and inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+    assert inner["tid"] == outer["tid"]
+    assert any(event["ph"] == "M" and event["tid"] == outer["tid"] for event in trace["traceEvents"])
+
+
+def test_disabled_profiler_records_nothing():
+    profiler = Profiler(enabled=False)
+
+    @profiler.timed("work")
+    def work():
+        return 42
+
+    with profiler.section("outer") as section:
+        assert section is NULL_SECTION
+        assert work() == 42
+    assert profiler.buffers == {}
+    assert profiler.get_stats() == {}
@@ -0,0 +1,56 @@
+# tests/test_reid.py
+import numpy as np
+
+from utils.reid import ReIDGallery, color_embeddings
+
+
+def unit_embeddings(count, dim, seed=0):
+    embeddings = np.random.default_rng(seed).random((count, dim)).astype(np.float32)
+    return embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+
+def test_full_gallery_keeps_every_track_added_in_one_batch():
+    gallery = ReIDGallery(max_tracks=4)
+    dim = gallery.features.shape[2]
+    gallery.add([0, 1], [0, 0], unit_embeddings(2, dim), frame_index=1)
+    gallery.add([2, 3], [0, 0], unit_embeddings(2, dim, 1), frame_index=2)
+
+    gallery.add([4, 5], [0, 0], unit_embeddings(2, dim, 2), frame_index=3)
+
+    # The two oldest tracks make room, not the one added first in the batch
+    assert gallery.ids() == {2, 3, 4, 5}
+
+
+def test_expire_drops_tracks_unseen_for_max_age():
+    gallery = ReIDGallery(max_age=10)
+    dim = gallery.features.shape[2]
+    gallery.add([0], [0], unit_embeddings(1, dim), frame_index=0)
+    gallery.add([1], [0], unit_embeddings(1, dim, 1), frame_index=8)
+
+    gallery.expire(12)
+
+    assert gallery.ids() == {1}
+
+
+def test_match_recovers_same_appearance_and_respects_class():
+    frame = np.zeros((200, 200, 3), dtype=np.uint8)
+    frame[20:60, 20:60] = (255, 0, 0)
+    frame[120:160, 120:160] = (0, 255, 0)
+    gallery = ReIDGallery()
+    boxes = np.array([[20, 20, 60, 60], [120, 120, 160, 160]], dtype=np.float32)
+    gallery.add([7, 8], [0, 0], gallery.embed(frame, boxes), frame_index=1)
+
+    # The same objects seen in the opposite order match back to their own IDs
+    query = gallery.embed(frame, boxes[::-1])
+    assert sorted(gallery.match(query, [0, 0], [7, 8])) == [(0, 8), (1, 7)]
+    # A different class never matches
+    assert gallery.match(query, [1, 1], [7, 8]) == []
+
+
+def test_color_embeddings_are_normalized():
+    frame = np.random.default_rng(0).integers(0, 256, (100, 100, 3), dtype=np.uint8)
+    embeddings = color_embeddings(frame, [[0, 0, 50, 50], [10, 10, 90, 90]])
+
+    assert embeddings.shape == (2, 2 * 8 * 4 * 4)
+    np.testing.assert_allclose(np.linalg.norm(embeddings, axis=1), 1.0, atol=1e-4)
+    assert color_embeddings(frame, np.zeros((0, 4))).shape == (0, 2 * 8 * 4 * 4)
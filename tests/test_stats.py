@@ -0,0 +1,37 @@
+# tests/test_stats.py
+import numpy as np
+import pytest
+
+from utils.detections import Detections
+from utils.stats import DetectionStats
+
+
+def run_at_fps(stats, fps, start, seconds):
+    for frame in range(int(fps * seconds)):
+        stats.update(Detections(), now=start + frame / fps)
+
+
+def test_windows_report_the_steady_rate_early_in_a_second():
+    stats = DetectionStats()
+    run_at_fps(stats, 10, 1000.0, 5.1)
+    windows = stats.get_windows(now=1005.05)
+    # The current second holds one frame so far; it is left out rather than averaged in
+    assert windows["1s"]["fps"] == pytest.approx(10)
+    assert windows["1m"]["fps"] == pytest.approx(10)
+    assert windows["1h"]["fps"] == pytest.approx(10)
+
+
+def test_windows_are_empty_before_a_second_completes():
+    stats = DetectionStats()
+    run_at_fps(stats, 10, 1000.0, 0.5)
+    assert stats.get_windows(now=1000.5)["1s"]["fps"] == 0.0
+
+
+def test_class_ids_beyond_the_default_size_are_counted():
+    stats = DetectionStats(max_classes=80)
+    names = {3: "cup", 95: "drone", 600: "kite"}
+    data = np.array([[0, 0, 10, 10, 0.5, 3], [0, 0, 10, 10, 0.5, 95], [0, 0, 10, 10, 0.5, 95]], dtype=np.float32)
+    stats.update(Detections(data, names), now=1000.0)
+    stats.update(Detections(data[:1] + [0, 0, 0, 0, 0, 597], names), now=1000.5)
+    assert stats.get_summary()["class_counts"] == {"cup": 1, "drone": 2, "kite": 1}
+    assert stats.get_windows(now=1001.0)["1s"]["class_counts"] == {"cup": 1, "drone": 2, "kite": 1}
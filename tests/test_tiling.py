@@ -0,0 +1,88 @@
+# tests/test_tiling.py
+import numpy as np
+
+from fakes import FakeResult
+from utils.tiling import MotionMask, TiledDetector, tile_grid
+
+
+class BrightBoxModel:
+    """Detects the bounding box of the bright pixels in each crop"""
+
+    def __init__(self):
+        self.images = 0
+
+    def __call__(self, crops, **kwargs):
+        self.images += len(crops)
+        results = []
+        for crop in crops:
+            ys, xs = np.nonzero(crop[..., 0] > 128)
+            rows = [(xs.min(), ys.min(), xs.max() + 1, ys.max() + 1, 0.9, 0)] if len(xs) else []
+            results.append(FakeResult(rows))
+        return results
+
+
+def frame_with_box(x1, y1, x2, y2, width=1500, height=1000):
+    frame = np.zeros((height, width, 3), dtype=np.uint8)
+    frame[y1:y2, x1:x2] = 255
+    return frame
+
+
+def test_grid_covers_the_edges_at_the_requested_overlap():
+    tiles = tile_grid(1500, 1000, tile_size=640, overlap=0.25)
+    covered = np.zeros((1000, 1500), dtype=bool)
+    for x1, y1, x2, y2 in tiles:
+        assert (x2 - x1, y2 - y1) == (640, 640)
+        covered[y1:y2, x1:x2] = True
+    assert covered.all()
+
+    xs = sorted(set(tiles[:, 0].tolist()))
+    ys = sorted(set(tiles[:, 1].tolist()))
+    assert xs == [0, 480, 860]
+    assert ys == [0, 360]
+    # Neighbours overlap by at least a quarter of a tile; the last one is shifted back, not cut short
+    assert all(640 - (b - a) >= 160 for a, b in zip(xs, xs[1:]))
+    assert tiles[:, 2].max() == 1500 and tiles[:, 3].max() == 1000
+
+
+def test_rois_are_clipped_to_the_frame():
+    tiles = tile_grid(1500, 1000, tile_size=640, rois=[(-50, -50, 300, 200), (1400, 900, 2000, 1200),
+                                                       (2000, 2000, 2100, 2100)])
+    assert tiles.tolist() == [[0, 0, 300, 200], [1400, 900, 1500, 1000]]
+    assert tile_grid(1500, 1000, tile_size=None, rois=[(100, -10, 1600, 500)]).tolist() == [[100, 0, 1500, 500]]
+
+
+def test_object_in_the_overlap_is_merged_across_tiles():
+    model = BrightBoxModel()
+    detector = TiledDetector(model, tile_size=640, overlap=0.25)
+    detections = detector(frame_with_box(500, 100, 600, 200))
+    # Seen whole by the first two tiles of the top row
+    assert model.images == len(detector.tiles)
+    assert len(detections) == 1
+    assert detections.xyxy.tolist() == [[500, 100, 600, 200]]
+
+
+def test_static_tiles_are_skipped_and_keep_their_detections():
+    model = BrightBoxModel()
+    detector = TiledDetector(model, tile_size=640, overlap=0.25, motion_threshold=2.0)
+    frame = frame_with_box(500, 100, 600, 200)
+    detector(frame)
+    assert detector.tiles_run == len(detector.tiles)
+
+    detections = detector(frame.copy())
+    assert detector.tiles_skipped == len(detector.tiles)
+    assert detections.xyxy.tolist() == [[500, 100, 600, 200]]
+
+    # Something appears in the bottom-right corner, which only the last tile covers
+    moved = frame.copy()
+    moved[850:950, 1350:1450] = 255
+    detections = detector(moved)
+    assert detector.tiles_run == len(detector.tiles) + 1
+    assert sorted(detections.xyxy.tolist()) == [[500, 100, 600, 200], [1350, 850, 1450, 950]]
+
+
+def test_motion_mask_reruns_static_tiles_after_max_skip():
+    mask = MotionMask(threshold=2.0, max_skip=3)
+    tiles = tile_grid(1500, 1000, tile_size=640, overlap=0.25)
+    frame = frame_with_box(500, 100, 600, 200)
+    runs = [mask.update(frame, tiles).all() for _ in range(7)]
+    assert runs == [True, False, False, True, False, False, True]
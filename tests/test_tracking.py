@@ -0,0 +1,147 @@
+# tests/test_tracking.py
+import numpy as np
+import pytest
+
+from utils.tracking import ObjectTracker, CONFIRMED, FREE, LOST, TENTATIVE
+
+BOX = [100, 100, 200, 200]
+OTHER = [300, 300, 360, 380]
+NONE = np.empty((0, 4))
+
+
+def test_first_frame_tracks_start_confirmed():
+    tracker = ObjectTracker()
+    assert tracker.update_boxes([BOX, OTHER]).tolist() == [0, 1]
+    assert set(tracker.states[list(tracker.slots.values())]) == {CONFIRMED}
+
+
+def test_tentative_track_is_confirmed_after_n_init_hits():
+    tracker = ObjectTracker(n_init=3)
+    tracker.update_boxes([BOX])
+    assert tracker.update_boxes([BOX, OTHER]).tolist() == [0, -1]
+    slot = tracker.slots[1]
+    assert tracker.states[slot] == TENTATIVE
+    tracker.update_boxes([BOX, OTHER])
+    assert tracker.update_boxes([BOX, OTHER]).tolist() == [0, 1]
+    assert tracker.states[slot] == CONFIRMED
+
+
+def test_tentative_track_is_deleted_when_missed():
+    tracker = ObjectTracker(n_init=3)
+    tracker.update_boxes([BOX])
+    tracker.update_boxes([BOX, OTHER])
+    slot = tracker.slots[1]
+    tracker.update_boxes([BOX])
+    assert 1 not in tracker.slots
+    assert tracker.states[slot] == FREE
+
+
+def test_lost_track_is_recovered_with_its_id():
+    tracker = ObjectTracker()
+    tracker.update_boxes([BOX])
+    slot = tracker.slots[0]
+    tracker.update_boxes(NONE)
+    assert tracker.states[slot] == LOST
+    assert tracker.update_boxes([BOX]).tolist() == [0]
+    assert tracker.states[slot] == CONFIRMED
+
+
+def test_lost_track_is_deleted_after_max_lost_frames():
+    tracker = ObjectTracker()
+    tracker.update_boxes([BOX])
+    for _ in range(tracker.max_lost_frames):
+        tracker.update_boxes(NONE)
+    assert 0 in tracker.slots
+    tracker.update_boxes(NONE)
+    assert 0 not in tracker.slots
+    # A new object gets a new ID
+    assert tracker.update_boxes([BOX]).tolist() == [-1]
+    assert 1 in tracker.slots
+
+
+def test_full_table_recycles_the_longest_lost_track():
+    tracker = ObjectTracker(max_tracks=2)
+    tracker.update_boxes([BOX, OTHER])
+    tracker.update_boxes([BOX])
+    tracker.update_boxes([[500, 0, 560, 80]])
+    assert 1 not in tracker.slots
+    assert set(tracker.slots) == {0, 2}
+
+
+def test_lost_tracks_age_on_predicted_frames():
+    tracker = ObjectTracker()
+    tracker.update_boxes([BOX])
+    slot = tracker.slots[0]
+    # A keyframe without the object, then only predicted frames as with --detect-interval
+    tracker.update_boxes(np.empty((0, 4)))
+    assert tracker.states[slot] == LOST
+    for _ in range(tracker.max_lost_frames - 1):
+        tracker.predict()
+    assert tracker.lost_tracks[0][1] == tracker.max_lost_frames
+    tracker.predict()
+    assert 0 not in tracker.slots
+
+
+def test_matched_track_is_fresh_after_predicted_frames():
+    tracker = ObjectTracker()
+    tracker.update_boxes([BOX])
+    for _ in range(tracker.max_lost_frames + 5):
+        tracker.predict()
+    # Confirmed tracks are only judged on keyframes, so a long interval does not delete them
+    tracker.update_boxes([BOX])
+    slot = tracker.slots[0]
+    assert tracker.states[slot] == CONFIRMED
+    assert tracker.time_since_update[slot] == 0
+
+
+def test_reid_revives_a_deleted_track_with_its_id():
+    from utils.reid import ReIDGallery
+
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    frame[100:200, 100:200] = (0, 0, 255)
+    tracker = ObjectTracker(reid=ReIDGallery(sample_interval=1))
+    for _ in range(3):
+        tracker.update_boxes([BOX], frame=frame)
+    for _ in range(tracker.max_lost_frames + 1):
+        tracker.update_boxes(NONE, frame=frame)
+    assert 0 not in tracker.slots
+
+    # The same red object reappears elsewhere and gets its old ID back
+    moved = np.zeros_like(frame)
+    moved[300:400, 400:500] = (0, 0, 255)
+    assert tracker.update_boxes([[400, 300, 500, 400]], frame=moved).tolist() == [0]
+    assert tracker.reid.recovered == 1
+
+
+@pytest.mark.parametrize("interval", [1, 2, 5, 10])
+def test_reid_gallery_fills_in_keyframe_mode(interval):
+    from utils.keyframe import KeyframeScheduler
+    from utils.reid import ReIDGallery
+
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    frame[100:200, 100:200] = (0, 0, 255)
+    tracker = ObjectTracker(reid=ReIDGallery(sample_interval=5))
+    scheduler = KeyframeScheduler(interval)
+    for _ in range(40):
+        if scheduler.should_detect(frame):
+            tracker.update_boxes([BOX], frame=frame)
+        else:
+            tracker.predict()
+    assert tracker.reid.ids() == {0}
+    assert tracker.reid.counts[tracker.reid.rows[0]] >= 40 // max(interval, 5) - 1
+
+
+def test_reid_does_not_hand_an_id_to_a_lookalike_out_of_reach():
+    from utils.reid import ReIDGallery
+
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    frame[100:200, 100:200] = (0, 0, 255)
+    frame[100:200, 500:600] = (0, 0, 255)
+    tracker = ObjectTracker(reid=ReIDGallery(sample_interval=1))
+    for _ in range(3):
+        tracker.update_boxes([BOX], frame=frame)
+    tracker.update_boxes(NONE, frame=frame)
+
+    # A second object of the same colour on the far side appears a frame after the first was lost
+    assert tracker.update_boxes([[500, 100, 600, 200]], frame=frame).tolist() == [-1]
+    assert tracker.reid.recovered == 0
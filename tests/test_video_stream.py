@@ -0,0 +1,32 @@
+# tests/test_video_stream.py
+import threading
+
+from utils import video_stream
+from utils.video_stream import Camera
+
+
+class FakeCapture:
+    opened = {1, 3}
+    release_slow = threading.Event()
+
+    def __init__(self, index):
+        self.index = index
+        if index == 3:
+            # A hung driver that only answers after the probe deadline
+            FakeCapture.release_slow.wait(5)
+
+    def isOpened(self):
+        return self.index in self.opened
+
+    def release(self):
+        pass
+
+
+def test_slow_probe_is_left_out_without_disturbing_the_result(monkeypatch, tmp_path):
+    monkeypatch.setattr(video_stream.cv2, "VideoCapture", FakeCapture)
+    cache = tmp_path / "cameras.json"
+    try:
+        assert Camera.get_available_cameras(max_index=5, timeout=0.2, cache_path=str(cache)) == ["1"]
+    finally:
+        FakeCapture.release_slow.set()
+    assert Camera.cached_cameras(str(cache)) == ["1"]
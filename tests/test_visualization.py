@@ -0,0 +1,63 @@
+# tests/test_visualization.py
+import numpy as np
+
+from utils.visualization import Visualizer
+
+
+class StubTracker:
+    def get_color(self, track_id):
+        return (40 * track_id % 256, 100, 200)
+
+    def get_trail_segments(self, track_id):
+        return []
+
+
+def counting_visualizer(size):
+    visualizer = Visualizer(StubTracker(), label_cache_size=size)
+    visualizer.rendered = 0
+    render = visualizer.render_label
+
+    def counted(*args):
+        visualizer.rendered += 1
+        return render(*args)
+
+    visualizer.render_label = counted
+    return visualizer
+
+
+def draw(visualizer):
+    frame = np.zeros((240, 320, 3), dtype=np.uint8)
+    boxes = [(20, 40, 100, 120), (150, 60, 300, 200), (5, 10, 60, 50)]
+    return visualizer.draw_batch(frame, boxes, [1, 2, 3], ["Black Mouse", "SSD Card", "SSD Card"], [0.91, 0.5, 0.333])
+
+
+def test_repeated_labels_are_rendered_once():
+    visualizer = counting_visualizer(1024)
+    first = visualizer.get_label("SSD Card", 1, 0.904, (0, 0, 255))
+    # Confidence is shown with two decimals, so 0.904 and 0.901 share a label
+    assert visualizer.get_label("SSD Card", 1, 0.901, (0, 0, 255)) is first
+    visualizer.get_label("SSD Card", 1, 0.95, (0, 0, 255))
+    assert visualizer.rendered == 2
+
+
+def test_least_recently_used_label_is_evicted():
+    visualizer = counting_visualizer(2)
+    visualizer.get_label("a", 1, 0.5, (0, 0, 0))
+    visualizer.get_label("b", 2, 0.5, (0, 0, 0))
+    visualizer.get_label("a", 1, 0.5, (0, 0, 0))
+    visualizer.get_label("c", 3, 0.5, (0, 0, 0))
+    assert list(visualizer.label_cache) == [("a", 1, 0.5), ("c", 3, 0.5)]
+    visualizer.get_label("b", 2, 0.5, (0, 0, 0))
+    assert visualizer.rendered == 4
+
+
+def test_uncached_render_matches_the_cached_one():
+    cached = counting_visualizer(1024)
+    uncached = counting_visualizer(0)
+    draw(cached)
+    frame = draw(cached)
+    assert cached.rendered == 3
+    assert np.array_equal(frame, draw(uncached))
+    draw(uncached)
+    assert uncached.rendered == 6
+    assert not uncached.label_cache
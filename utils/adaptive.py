@@ -0,0 +1,111 @@
+# utils/adaptive.py
+import time
+from collections import deque
+
+import numpy as np
+
+# Operating points from best quality to cheapest: inference size, detector
+# interval and how much is drawn per track
+OPERATING_POINTS = (
+    {"imgsz": 640, "detect_interval": 1, "detail": "full"},
+    {"imgsz": 640, "detect_interval": 2, "detail": "full"},
+    {"imgsz": 480, "detect_interval": 2, "detail": "labels"},
+    {"imgsz": 480, "detect_interval": 3, "detail": "labels"},
+    {"imgsz": 320, "detect_interval": 3, "detail": "boxes"},
+    {"imgsz": 320, "detect_interval": 5, "detail": "boxes"},
+)
+
+# Backends exported with a fixed input size cannot change imgsz at run time
+DYNAMIC_SIZE_BACKENDS = ("pytorch", "onnx", "onnx-int8")
+
+
+def operating_points(backend="pytorch", points=OPERATING_POINTS):
+    """The points a backend can run; fixed-size backends keep 640 and only adapt interval and detail"""
+    if backend in DYNAMIC_SIZE_BACKENDS:
+        return tuple(points)
+    fixed = []
+    for point in points:
+        point = dict(point, imgsz=640)
+        if point not in fixed:
+            fixed.append(point)
+    return tuple(fixed)
+
+
+def describe(point):
+    return f"{point['imgsz']}px, detect every {point['detect_interval']}, {point['detail']}"
+
+
+class LatencyController:
+    """Step between operating points to keep the per-frame cost inside a budget
+
+    observe() takes the seconds each stage spent on one frame. Load is the
+    larger of the mean total work over target_latency_ms and the slowest
+    stage's mean over the frame period of target_fps, so 1.0 is exactly on
+    budget. Above degrade_above the controller moves to the next cheaper
+    point, below recover_below back to the better one. A full window of new
+    samples and hold_seconds must pass between switches, so it does not
+    oscillate around the threshold.
+    """
+
+    def __init__(self, target_fps=None, target_latency_ms=None, points=OPERATING_POINTS, window=30,
+                 degrade_above=1.0, recover_below=0.7, hold_seconds=2.0, on_change=None):
+        if target_fps is None and target_latency_ms is None:
+            raise ValueError("Set target_fps, target_latency_ms or both")
+        self.target_fps = target_fps
+        self.target_latency_ms = target_latency_ms
+        self.points = tuple(points)
+        self.window = window
+        self.degrade_above = degrade_above
+        self.recover_below = recover_below
+        self.hold_seconds = hold_seconds
+        self.on_change = on_change
+        self.index = 0
+        self.samples = {}  # stage -> last `window` durations
+        self.frames = 0
+        self.load = 0.0
+        self.switches = 0
+        self.last_change = None
+
+    @property
+    def point(self):
+        return self.points[self.index]
+
+    def compute_load(self):
+        means = [np.mean(samples) for samples in self.samples.values()]
+        load = 0.0
+        if self.target_latency_ms:
+            load = max(load, sum(means) * 1000 / self.target_latency_ms)
+        if self.target_fps:
+            load = max(load, max(means) * self.target_fps)
+        return load
+
+    def observe(self, stage_seconds, now=None):
+        """Record one frame's stage timings; returns True when the operating point changed"""
+        for stage, seconds in stage_seconds.items():
+            samples = self.samples.get(stage)
+            if samples is None:
+                samples = self.samples[stage] = deque(maxlen=self.window)
+            samples.append(seconds)
+        self.frames += 1
+        if self.frames < self.window:
+            return False
+        self.load = self.compute_load()
+
+        now = time.time() if now is None else now
+        if self.last_change is not None and now - self.last_change < self.hold_seconds:
+            return False
+        if self.load > self.degrade_above and self.index < len(self.points) - 1:
+            self.index += 1
+        elif self.load < self.recover_below and self.index > 0:
+            self.index -= 1
+        else:
+            return False
+
+        print(f"Load {self.load:.2f}, switching to operating point {self.index}: {describe(self.point)}")
+        self.samples = {}
+        self.frames = 0
+        self.switches += 1
+        self.last_change = now
+        if self.on_change:
+            self.on_change(self.point)
+        return True
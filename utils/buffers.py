@@ -0,0 +1,86 @@
+# utils/buffers.py
+import threading
+from collections import deque
+
+import cv2
+import numpy as np
+
+# Padding value of letterboxed frames, the same gray YOLO pads with
+LETTERBOX_FILL = 114
+
+
+class FramePool:
+    """Reusable frame buffers of one shape, handed out and returned explicitly
+
+    acquire() only allocates when every buffer is in use, so once the pipeline
+    is warm `allocations` stays constant while `reuses` keeps growing. A
+    buffer must be released exactly once, by whoever consumes it last.
+    """
+
+    def __init__(self, shape, dtype=np.uint8, name="frames"):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.name = name
+        self.free = deque()
+        self.lock = threading.Lock()
+        self.allocations = 0
+        self.reuses = 0
+        self.copies = 0
+
+    def acquire(self):
+        with self.lock:
+            if self.free:
+                self.reuses += 1
+                return self.free.pop()
+            self.allocations += 1
+        return np.empty(self.shape, dtype=self.dtype)
+
+    def release(self, buffer):
+        if buffer is None or buffer.shape != self.shape or buffer.dtype != self.dtype:
+            return
+        with self.lock:
+            self.free.append(buffer)
+
+    def copy(self, frame):
+        """Copy a frame into a pooled buffer, resizing it if its size differs"""
+        buffer = self.acquire()
+        if frame.shape == self.shape:
+            np.copyto(buffer, frame)
+        else:
+            cv2.resize(frame, (self.shape[1], self.shape[0]), dst=buffer)
+        with self.lock:
+            self.copies += 1
+        return buffer
+
+    def get_stats(self):
+        return {
+            "allocations": self.allocations,
+            "reuses": self.reuses,
+            "copies": self.copies,
+            "free": len(self.free),
+        }
+
+
+def letterbox_geometry(src_shape, dst_shape):
+    """Scale and (left, top) offset that letterbox an image of src_shape into dst_shape"""
+    dst_height, dst_width = dst_shape[:2]
+    height, width = src_shape[:2]
+    scale = min(dst_width / width, dst_height / height)
+    new_width, new_height = int(round(width * scale)), int(round(height * scale))
+    return scale, (dst_width - new_width) // 2, (dst_height - new_height) // 2
+
+
+def letterbox_into(frame, dst, fill=LETTERBOX_FILL):
+    """Resize a frame into dst keeping its aspect ratio and pad the borders, without allocating"""
+    scale, left, top = letterbox_geometry(frame.shape, dst.shape)
+    height, width = frame.shape[:2]
+    new_width, new_height = int(round(width * scale)), int(round(height * scale))
+    bottom, right = top + new_height, left + new_width
+
+    # Borders are refilled every time since drawing may have touched them
+    dst[:top] = fill
+    dst[bottom:] = fill
+    dst[top:bottom, :left] = fill
+    dst[top:bottom, right:] = fill
+    cv2.resize(frame, (new_width, new_height), dst=dst[top:bottom, left:right])
+    return dst
@@ -0,0 +1,87 @@
+# utils/detections.py
+import numpy as np
+
+# Columns of the per-frame detection array
+X1, Y1, X2, Y2, CONF, CLS = range(6)
+NUM_COLUMNS = 6
+
+
+class Detections:
+    """Canonical per-frame detection record shared by tracker, visualizer and stats
+
+    `data` is one contiguous (N, 6) float32 array of x1, y1, x2, y2, conf
+    and class. Track IDs are kept in a separate int64 array, since float32
+    cannot represent IDs above 2**24 that a long-running tracker reaches.
+    track_id is -1 until the tracker assigns a confirmed track.
+    """
+
+    def __init__(self, data=None, names=None, track_ids=None):
+        self.data = np.empty((0, NUM_COLUMNS), dtype=np.float32) if data is None else data
+        self.names = names or {}
+        if track_ids is None:
+            track_ids = np.full(len(self.data), -1, dtype=np.int64)
+        self.ids = np.asarray(track_ids, dtype=np.int64)
+
+    @classmethod
+    def from_results(cls, results):
+        """Extract the detections of the first result with a single device transfer"""
+        if not results or len(results) == 0:
+            return cls()
+        result = results[0]
+
+        # boxes.data is (N, 6) xyxy/conf/cls, or (N, 7) with track IDs in column 4
+        raw = result.boxes.data.cpu().numpy()
+        if raw.shape[1] == 7:
+            raw = raw[:, [0, 1, 2, 3, 5, 6]]
+
+        return cls(np.ascontiguousarray(raw, dtype=np.float32), result.names)
+
+    @classmethod
+    def concatenate(cls, items, names=None):
+        """One record holding the rows of several"""
+        items = [item for item in items if len(item)]
+        if not items:
+            return cls(names=names)
+        return cls(
+            np.concatenate([item.data for item in items]),
+            names or items[0].names,
+            np.concatenate([item.ids for item in items]),
+        )
+
+    def __len__(self):
+        return len(self.data)
+
+    @property
+    def xyxy(self):
+        return self.data[:, X1:Y2 + 1]
+
+    @property
+    def conf(self):
+        return self.data[:, CONF]
+
+    @property
+    def cls(self):
+        return self.data[:, CLS].astype(np.int64)
+
+    @property
+    def track_ids(self):
+        return self.ids
+
+    @track_ids.setter
+    def track_ids(self, values):
+        self.ids[:] = values
+
+    def transform(self, scale=1.0, dx=0.0, dy=0.0):
+        """Scale and then shift the boxes in place, e.g. from tile or frame to display coordinates"""
+        self.data[:, X1:Y2 + 1] *= scale
+        self.data[:, [X1, X2]] += dx
+        self.data[:, [Y1, Y2]] += dy
+        return self
+
+    def select(self, indices):
+        """Detections at the given row indices or mask"""
+        return Detections(self.data[indices], self.names, self.ids[indices])
+
+    def tracked(self):
+        """Detections that belong to a confirmed track"""
+        return self.select(self.ids >= 0)
@@ -0,0 +1,267 @@
+# utils/events.py
+import argparse
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+EVENT_DTYPE = np.dtype([
+    ("timestamp", np.float64),
+    ("stream", np.int32),
+    ("session", np.int32),
+    ("track_id", np.int64),
+    ("cls", np.int16),
+    ("x1", np.float32),
+    ("y1", np.float32),
+    ("x2", np.float32),
+    ("y2", np.float32),
+    ("conf", np.float32),
+])
+INDEX_FILE = "index.json"
+
+
+def load_index(directory):
+    path = os.path.join(directory, INDEX_FILE)
+    if not os.path.exists(path):
+        return {"chunks": [], "streams": {}, "names": {}, "sessions": []}
+    with open(path) as f:
+        index = json.load(f)
+    index.setdefault("sessions", [])
+    return index
+
+
+def upgrade_rows(rows):
+    """Rows of a chunk written before sessions existed, in the current EVENT_DTYPE
+
+    Those runs cannot be told apart, so they all share session -1.
+    """
+    if rows.dtype == EVENT_DTYPE:
+        return rows
+    upgraded = np.empty(len(rows), dtype=EVENT_DTYPE)
+    upgraded["session"] = -1
+    for name in rows.dtype.names:
+        upgraded[name] = rows[name]
+    return upgraded
+
+
+class TrackEventLog:
+    """Append tracked detections to chunked, memory-mappable .npy files
+
+    append() only stages rows in memory; a background thread moves them into
+    the open chunk every flush_interval seconds and writes the chunk as one
+    .npy file once it holds chunk_rows rows or is max_chunk_seconds old.
+    index.json records each chunk's time, track and class ranges so queries
+    can skip chunks without opening them. Track IDs restart with every run,
+    so each log is a new session and its rows carry the session id.
+    """
+
+    def __init__(self, directory, chunk_rows=65536, flush_interval=1.0, max_chunk_seconds=60.0):
+        self.directory = directory
+        self.chunk_rows = chunk_rows
+        self.flush_interval = flush_interval
+        self.max_chunk_seconds = max_chunk_seconds
+        os.makedirs(directory, exist_ok=True)
+        self.index = load_index(directory)
+        self.session = len(self.index["sessions"])
+        self.index["sessions"].append({"started": time.time()})
+        self.pending = []
+        self.lock = threading.Lock()
+        self.chunk = np.empty(chunk_rows, dtype=EVENT_DTYPE)
+        self.chunk_size = 0
+        self.chunk_started = None
+        self.rows_written = 0
+        self.running = False
+        self.thread = None
+
+    def stream_id(self, stream):
+        streams = self.index["streams"]
+        stream = str(stream)
+        if stream not in streams:
+            streams[stream] = len(streams)
+        return streams[stream]
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self
+
+    def append(self, detections, timestamp, stream="camera"):
+        """Stage the confirmed-track rows of one frame"""
+        tracked = detections.tracked()
+        if len(tracked) == 0:
+            return
+        rows = np.empty(len(tracked), dtype=EVENT_DTYPE)
+        rows["timestamp"] = timestamp
+        rows["session"] = self.session
+        rows["track_id"] = tracked.track_ids
+        rows["cls"] = tracked.cls
+        rows["conf"] = tracked.conf
+        for column, name in enumerate(("x1", "y1", "x2", "y2")):
+            rows[name] = tracked.xyxy[:, column]
+        with self.lock:
+            rows["stream"] = self.stream_id(stream)
+            for cls, name in tracked.names.items():
+                self.index["names"].setdefault(str(cls), name)
+            self.pending.append(rows)
+
+    def run(self):
+        while self.running:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error writing track events: {e}")
+
+    def flush(self, final=False):
+        with self.lock:
+            pending, self.pending = self.pending, []
+        for rows in pending:
+            while len(rows):
+                if self.chunk_started is None:
+                    self.chunk_started = time.time()
+                count = min(len(rows), self.chunk_rows - self.chunk_size)
+                self.chunk[self.chunk_size:self.chunk_size + count] = rows[:count]
+                self.chunk_size += count
+                rows = rows[count:]
+                if self.chunk_size == self.chunk_rows:
+                    self.write_chunk()
+        if self.chunk_size and (final or time.time() - self.chunk_started >= self.max_chunk_seconds):
+            self.write_chunk()
+
+    def write_chunk(self):
+        # Chunks are sorted by time so queries can binary-search a range inside one
+        data = np.sort(self.chunk[:self.chunk_size], order="timestamp")
+        name = f"chunk_{len(self.index['chunks']):06d}.npy"
+        np.save(os.path.join(self.directory, name), data)
+        self.index["chunks"].append({
+            "file": name,
+            "rows": int(len(data)),
+            "min_time": float(data["timestamp"][0]),
+            "max_time": float(data["timestamp"][-1]),
+            "min_track": int(data["track_id"].min()),
+            "max_track": int(data["track_id"].max()),
+            "classes": np.unique(data["cls"]).tolist(),
+            "streams": np.unique(data["stream"]).tolist(),
+        })
+        with self.lock:
+            index = json.dumps(self.index)
+        path = os.path.join(self.directory, INDEX_FILE)
+        with open(path + ".tmp", "w") as f:
+            f.write(index)
+        os.replace(path + ".tmp", path)
+        self.rows_written += len(data)
+        self.chunk_size = 0
+        self.chunk_started = None
+
+    def stop(self):
+        """Write everything still staged, including a partial chunk"""
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        self.flush(final=True)
+
+
+class TrackEventStore:
+    """Query a track event directory chunk by chunk through memory maps"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.index = load_index(directory)
+        self.class_ids = {name: int(cls) for cls, name in self.index["names"].items()}
+        self.stream_names = {stream_id: name for name, stream_id in self.index["streams"].items()}
+        self.chunks_read = 0
+
+    def chunks(self, start=None, end=None, cls=None, stream=None, track_id=None):
+        """Chunks whose index ranges can contain matching rows"""
+        for chunk in self.index["chunks"]:
+            if start is not None and chunk["max_time"] < start:
+                continue
+            if end is not None and chunk["min_time"] > end:
+                continue
+            if cls is not None and cls not in chunk["classes"]:
+                continue
+            if stream is not None and stream not in chunk["streams"]:
+                continue
+            if track_id is not None and not chunk["min_track"] <= track_id <= chunk["max_track"]:
+                continue
+            yield chunk
+
+    def query(self, class_name=None, start=None, end=None, stream=None, track_id=None):
+        """Structured array of the events matching every given filter"""
+        cls = self.class_ids.get(class_name, -1) if class_name is not None else None
+        stream_id = self.index["streams"].get(str(stream), -1) if stream is not None else None
+        parts = []
+        for chunk in self.chunks(start, end, cls, stream_id, track_id):
+            data = np.load(os.path.join(self.directory, chunk["file"]), mmap_mode="r")
+            self.chunks_read += 1
+            lo = 0 if start is None else np.searchsorted(data["timestamp"], start, side="left")
+            hi = len(data) if end is None else np.searchsorted(data["timestamp"], end, side="right")
+            rows = data[lo:hi]
+            mask = np.ones(len(rows), dtype=bool)
+            if cls is not None:
+                mask &= rows["cls"] == cls
+            if stream_id is not None:
+                mask &= rows["stream"] == stream_id
+            if track_id is not None:
+                mask &= rows["track_id"] == track_id
+            parts.append(upgrade_rows(np.array(rows[mask])))
+        if not parts:
+            return np.empty(0, dtype=EVENT_DTYPE)
+        return np.concatenate(parts)
+
+    def dwell_times(self, class_name=None, start=None, end=None, stream=None):
+        """First and last sighting and dwell seconds per (stream, session, track_id)"""
+        events = self.query(class_name, start, end, stream)
+        if len(events) == 0:
+            return {}
+        keys = np.stack([events["stream"], events["session"], events["track_id"]], axis=1)
+        unique, inverse = np.unique(keys, axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        first = np.full(len(unique), np.inf)
+        last = np.full(len(unique), -np.inf)
+        np.minimum.at(first, inverse, events["timestamp"])
+        np.maximum.at(last, inverse, events["timestamp"])
+        classes = np.zeros(len(unique), dtype=np.int64)
+        classes[inverse] = events["cls"]
+
+        dwell = {}
+        for (stream_id, session, track_id), t0, t1, cls in zip(unique.tolist(), first.tolist(), last.tolist(),
+                                                               classes.tolist()):
+            stream_name = self.stream_names.get(stream_id, str(stream_id))
+            dwell[(stream_name, session, track_id)] = {
+                "class": self.index["names"].get(str(cls), str(cls)),
+                "first": t0,
+                "last": t1,
+                "dwell": t1 - t0,
+            }
+        return dwell
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query a track event log")
+    parser.add_argument("directory", help="Directory written with --events")
+    parser.add_argument("--class", dest="class_name", help="Only this class")
+    parser.add_argument("--start", type=float, help="Unix time of the first event")
+    parser.add_argument("--end", type=float, help="Unix time of the last event")
+    parser.add_argument("--stream", help="Only this stream")
+    parser.add_argument("--dwell", action="store_true", help="Print dwell time per track instead of events")
+    args = parser.parse_args()
+
+    store = TrackEventStore(args.directory)
+    if args.dwell:
+        dwell = store.dwell_times(args.class_name, args.start, args.end, args.stream)
+        for (stream, session, track_id), info in sorted(dwell.items()):
+            print(f"{stream} session {session} track {track_id} {info['class']} {info['dwell']:.1f}s")
+        return
+    events = store.query(args.class_name, args.start, args.end, args.stream)
+    print(f"{len(events)} events")
+    for event in events[:20]:
+        print(event)
+
+
+if __name__ == "__main__":
+    main()
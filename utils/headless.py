@@ -0,0 +1,215 @@
+# utils/headless.py
+import json
+import os
+import time
+
+import cv2
+
+from utils.video_stream import Camera
+from utils.tracking import ObjectTracker
+from utils.visualization import Visualizer
+from utils.stats import DetectionStats
+from utils.detections import Detections
+from utils.keyframe import KeyframeScheduler
+from utils.tiling import TiledDetector
+from utils.events import TrackEventLog
+from utils.profiling import profiler
+from utils.metrics import MetricsServer
+from utils.adaptive import LatencyController, operating_points, describe
+from utils.reid import ReIDGallery
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+
+def iter_frames(source, start=0, properties=None):
+    """Yield (frame_index, frame, timestamp) from a video, stream URL, camera or image folder
+
+    Frames are read one at a time so memory stays flat regardless of length.
+    Image folders and video files begin at frame `start`; live sources
+    begin numbering there, so indices continue after a restart. When a
+    `properties` dict is given, the source's "fps" is stored in it before
+    the first frame is yielded (None for image folders and unknown rates).
+    """
+    if properties is not None:
+        properties["fps"] = None
+    if os.path.isdir(source):
+        names = sorted(n for n in os.listdir(source) if n.lower().endswith(IMAGE_EXTENSIONS))
+        for index, name in enumerate(names[start:], start):
+            frame = cv2.imread(os.path.join(source, name))
+            if frame is None:
+                print(f"Skipping unreadable image {name}")
+                continue
+            yield index, frame, time.time()
+        return
+
+    capture = Camera.load_camera(Camera.parse_source(source))
+    try:
+        if properties is not None:
+            fps = capture.get(cv2.CAP_PROP_FPS)
+            properties["fps"] = fps if fps > 0 else None
+        index = start
+        if start and os.path.isfile(source):
+            capture.set(cv2.CAP_PROP_POS_FRAMES, start)
+            # Some containers cannot seek; read up to the start frame instead
+            for _ in range(start - int(capture.get(cv2.CAP_PROP_POS_FRAMES))):
+                if not capture.grab():
+                    return
+        while True:
+            ret, frame = capture.read()
+            if not ret:
+                break
+            yield index, frame, time.time()
+            index += 1
+    finally:
+        capture.release()
+
+
+def frame_records(frame_index, timestamp, detections):
+    """Per-frame track record as a JSON-serializable dict"""
+    tracked = detections.tracked()
+    tracks = [
+        {
+            "track_id": track_id,
+            "class": detections.names.get(cls, ""),
+            "confidence": round(conf, 4),
+            "bbox": [round(v, 1) for v in bbox],
+        }
+        for bbox, conf, cls, track_id in zip(
+            tracked.xyxy.tolist(), tracked.conf.tolist(), tracked.cls.tolist(), tracked.track_ids.tolist()
+        )
+    ]
+    return {"frame": frame_index, "timestamp": timestamp, "keyframe": True, "tracks": tracks}
+
+
+def predicted_records(frame_index, timestamp, tracker, tracks):
+    """Per-frame record for a frame where the tracker predicted the boxes"""
+    records = []
+    for track_id, bbox in tracks.items():
+        class_name, conf = tracker.get_label(track_id)
+        records.append({
+            "track_id": int(track_id),
+            "class": class_name,
+            "confidence": round(conf, 4),
+            "bbox": [round(float(v), 1) for v in bbox],
+        })
+    return {"frame": frame_index, "timestamp": timestamp, "keyframe": False, "tracks": records}
+
+
+def track(model, source, output=None, records=None, show_progress=True,
+          detect_interval=1, motion_threshold=None, uncertainty_threshold=None, metrics_port=None, tiling=None,
+          events_dir=None, profile_path=None, target_fps=None, target_latency_ms=None, backend="pytorch",
+          reid=False, metrics_host="127.0.0.1"):
+    """Run detection, tracking and drawing over a source without any GUI
+
+    Writes the annotated video to `output` and one JSON line per frame to
+    `records` when given. With detect_interval > 1 the model only runs on
+    keyframes (and when motion or tracker uncertainty passes its threshold)
+    and tracks are predicted in between. With metrics_port the statistics
+    are served over HTTP on metrics_host while running. With tiling (TiledDetector
+    options) the model runs on overlapping full-resolution tiles. With
+    events_dir tracked detections are appended to a TrackEventLog. With
+    profile_path stage timings are written there as a Chrome trace at the end
+    (and on SIGUSR1). With target_fps or target_latency_ms a LatencyController
+    lowers inference size, detection rate and overlay detail while frames run
+    over budget; backend decides whether the inference size can change.
+    With reid, lost tracks are recovered by appearance.
+    Returns the final statistics summary.
+    """
+    tracker = ObjectTracker(reid=ReIDGallery() if reid else None)
+    visualizer = Visualizer(tracker)
+    stats = DetectionStats()
+    scheduler = KeyframeScheduler(detect_interval, motion_threshold, uncertainty_threshold)
+    tiler = TiledDetector(model, **tiling) if tiling else None
+    event_log = TrackEventLog(events_dir).start() if events_dir else None
+    if profile_path:
+        profiler.enabled = True
+        profiler.install_signal_handler(profile_path)
+    inference_options = {}
+    controller = None
+    if target_fps or target_latency_ms:
+        def apply_operating_point(point):
+            if tiler is None:
+                inference_options["imgsz"] = point["imgsz"]
+            scheduler.interval = point["detect_interval"]
+            visualizer.set_detail(point["detail"])
+
+        controller = LatencyController(target_fps, target_latency_ms, operating_points(backend),
+                                       on_change=apply_operating_point)
+        apply_operating_point(controller.point)
+    metrics_server = MetricsServer(metrics_port, metrics_host).start() if metrics_port else None
+    if metrics_server:
+        metrics_server.register(source, stats)
+
+    writer = None
+    # Filled in by iter_frames from the capture it opens, so the source is only opened once
+    source_properties = {}
+    records_file = open(records, "w") if records else None
+    start = time.time()
+    frames = 0
+
+    try:
+        for frame_index, frame, timestamp in iter_frames(source, properties=source_properties):
+            frame_start = time.perf_counter()
+            if scheduler.should_detect(frame):
+                with profiler.section("inference"):
+                    if tiler is not None:
+                        detections = tiler(frame)
+                    else:
+                        detections = Detections.from_results(model(frame, verbose=False, **inference_options))
+                with profiler.section("tracking"):
+                    tracker.update(detections, frame)
+                with profiler.section("drawing"):
+                    frame = visualizer.draw_detections(frame, detections)
+                stats.update(detections)
+                if event_log is not None:
+                    event_log.append(detections, timestamp, source)
+                record = frame_records(frame_index, timestamp, detections) if records_file else None
+            else:
+                tracks = tracker.predict()
+                frame = visualizer.draw_tracks(frame, tracks)
+                stats.update(Detections())
+                record = predicted_records(frame_index, timestamp, tracker, tracks) if records_file else None
+            scheduler.observe(tracker)
+            if controller is not None:
+                # One loop does all the work, so the whole frame is a single stage
+                controller.observe({"frame": time.perf_counter() - frame_start})
+
+            if output:
+                if writer is None:
+                    height, width = frame.shape[:2]
+                    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+                    fps = source_properties["fps"] or 30.0
+                    writer = cv2.VideoWriter(output, fourcc, fps, (width, height))
+                    writer_size = (width, height)
+                if frame.shape[1::-1] != writer_size:
+                    frame = cv2.resize(frame, writer_size)
+                with profiler.section("encode"):
+                    writer.write(frame)
+
+            if records_file:
+                records_file.write(json.dumps(record) + "\n")
+
+            frames += 1
+            if show_progress and frames % 100 == 0:
+                print(f"Processed {frames} frames ({frames / (time.time() - start):.1f} FPS)")
+    finally:
+        if writer is not None:
+            writer.release()
+        if records_file:
+            records_file.close()
+        if metrics_server:
+            metrics_server.stop()
+        if event_log is not None:
+            event_log.stop()
+        if profile_path:
+            profiler.export_chrome_trace(profile_path)
+
+    summary = dict(stats.get_summary())
+    summary["frames"] = frames
+    summary["keyframes"] = scheduler.keyframes
+    if controller is not None:
+        summary["operating_point"] = describe(controller.point)
+        summary["operating_point_switches"] = controller.switches
+    if tracker.reid is not None:
+        summary["reid_recovered"] = tracker.reid.recovered
+    return summary
@@ -0,0 +1,105 @@
+# utils/kalman.py
+import numpy as np
+
+# State is (cx, cy, aspect, height) plus their velocities; measurements are (cx, cy, aspect, height)
+STATE_DIM = 8
+MEASUREMENT_DIM = 4
+
+
+def xyxy_to_xyah(boxes):
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    width = boxes[:, 2] - boxes[:, 0]
+    height = np.maximum(boxes[:, 3] - boxes[:, 1], 1e-6)
+    return np.stack([
+        (boxes[:, 0] + boxes[:, 2]) / 2,
+        (boxes[:, 1] + boxes[:, 3]) / 2,
+        width / height,
+        height,
+    ], axis=1)
+
+
+def xyah_to_xyxy(xyah):
+    xyah = np.asarray(xyah, dtype=np.float64).reshape(-1, 4)
+    width = xyah[:, 2] * xyah[:, 3]
+    return np.stack([
+        xyah[:, 0] - width / 2,
+        xyah[:, 1] - xyah[:, 3] / 2,
+        xyah[:, 0] + width / 2,
+        xyah[:, 1] + xyah[:, 3] / 2,
+    ], axis=1)
+
+
+class BatchKalmanFilter:
+    """Constant-velocity Kalman filter operating on all tracks at once
+
+    Means are stored as (N, 8) arrays and covariances as (N, 8, 8) arrays, so
+    predict and update are a handful of batched matrix operations regardless
+    of the number of tracks. Noise scales with the box height.
+    """
+
+    def __init__(self, std_weight_position=1 / 20, std_weight_velocity=1 / 160):
+        self.std_weight_position = std_weight_position
+        self.std_weight_velocity = std_weight_velocity
+
+        self.motion_mat = np.eye(STATE_DIM)
+        for i in range(MEASUREMENT_DIM):
+            self.motion_mat[i, MEASUREMENT_DIM + i] = 1.0
+        self.update_mat = np.eye(MEASUREMENT_DIM, STATE_DIM)
+
+    def initiate(self, measurements):
+        """Mean and covariance for new tracks from (N, 4) xyah measurements"""
+        measurements = np.asarray(measurements, dtype=np.float64).reshape(-1, MEASUREMENT_DIM)
+        mean = np.hstack([measurements, np.zeros_like(measurements)])
+
+        height = measurements[:, 3]
+        pos = self.std_weight_position * height
+        vel = self.std_weight_velocity * height
+        std = np.stack([
+            2 * pos, 2 * pos, np.full_like(height, 1e-2), 2 * pos,
+            10 * vel, 10 * vel, np.full_like(height, 1e-5), 10 * vel,
+        ], axis=1)
+        covariance = np.zeros((len(measurements), STATE_DIM, STATE_DIM))
+        idx = np.arange(STATE_DIM)
+        covariance[:, idx, idx] = std ** 2
+        return mean, covariance
+
+    def predict(self, mean, covariance):
+        """Advance every track one frame"""
+        if len(mean) == 0:
+            return mean, covariance
+
+        height = mean[:, 3]
+        pos = self.std_weight_position * height
+        vel = self.std_weight_velocity * height
+        std = np.stack([
+            pos, pos, np.full_like(height, 1e-2), pos,
+            vel, vel, np.full_like(height, 1e-5), vel,
+        ], axis=1)
+
+        mean = mean @ self.motion_mat.T
+        covariance = self.motion_mat @ covariance @ self.motion_mat.T
+        idx = np.arange(STATE_DIM)
+        covariance[:, idx, idx] += std ** 2
+        return mean, covariance
+
+    def update(self, mean, covariance, measurements):
+        """Correct tracks with their matched (N, 4) xyah measurements"""
+        if len(mean) == 0:
+            return mean, covariance
+
+        height = mean[:, 3]
+        pos = self.std_weight_position * height
+        std = np.stack([pos, pos, np.full_like(height, 1e-1), pos], axis=1)
+
+        projected_cov = self.update_mat @ covariance @ self.update_mat.T
+        idx = np.arange(MEASUREMENT_DIM)
+        projected_cov[:, idx, idx] += std ** 2
+
+        # Kalman gain K = P H^T S^-1, solved instead of inverting S
+        cross_cov = covariance @ self.update_mat.T
+        gain = np.linalg.solve(projected_cov, cross_cov.transpose(0, 2, 1)).transpose(0, 2, 1)
+
+        innovation = measurements - mean[:, :MEASUREMENT_DIM]
+        mean = mean + np.einsum("nij,nj->ni", gain, innovation)
+        covariance = covariance - gain @ projected_cov @ gain.transpose(0, 2, 1)
+        return mean, covariance
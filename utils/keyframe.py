@@ -0,0 +1,63 @@
+# utils/keyframe.py
+import cv2
+
+
+class KeyframeScheduler:
+    """Decide which frames run the detector; the tracker predicts the others
+
+    A frame is a keyframe every `interval` frames, or earlier when the scene
+    changes more than `motion_threshold` (mean absolute difference of a small
+    grayscale thumbnail, 0-255) or the tracker's prediction uncertainty
+    exceeds `uncertainty_threshold`. The tracker may run on another thread
+    or process, so its uncertainty is published with observe() after every
+    tracker step and should_detect() only reads that snapshot.
+    """
+
+    def __init__(self, interval=1, motion_threshold=None, uncertainty_threshold=None, thumbnail_size=(64, 64)):
+        self.interval = max(1, interval)
+        self.motion_threshold = motion_threshold
+        self.uncertainty_threshold = uncertainty_threshold
+        self.thumbnail_size = thumbnail_size
+        self.frames_since_keyframe = 0
+        self.last_thumbnail = None
+        # Scratch buffers reused every frame
+        self.resized = None
+        self.spare_thumbnail = None
+        self.difference = None
+        self.keyframes = 0
+        self.frames = 0
+        self.uncertainty = 0.0
+
+    def motion_score(self, frame):
+        self.resized = cv2.resize(frame, self.thumbnail_size, dst=self.resized)
+        gray = self.spare_thumbnail = cv2.cvtColor(self.resized, cv2.COLOR_BGR2GRAY, dst=self.spare_thumbnail)
+        if self.last_thumbnail is None:
+            return float("inf"), gray
+        self.difference = cv2.absdiff(gray, self.last_thumbnail, dst=self.difference)
+        return float(cv2.mean(self.difference)[0]), gray
+
+    def observe(self, tracker):
+        """Publish the tracker's prediction uncertainty; call from the thread that updates the tracker"""
+        if self.uncertainty_threshold is not None:
+            self.uncertainty = tracker.prediction_uncertainty()
+
+    def should_detect(self, frame):
+        self.frames += 1
+        detect = self.keyframes == 0 or self.frames_since_keyframe + 1 >= self.interval
+
+        thumbnail = None
+        if self.motion_threshold is not None:
+            score, thumbnail = self.motion_score(frame)
+            detect = detect or score > self.motion_threshold
+
+        if not detect and self.uncertainty_threshold is not None:
+            detect = self.uncertainty > self.uncertainty_threshold
+
+        if detect:
+            self.frames_since_keyframe = 0
+            self.keyframes += 1
+            if thumbnail is not None:
+                self.last_thumbnail, self.spare_thumbnail = thumbnail, self.last_thumbnail
+        else:
+            self.frames_since_keyframe += 1
+        return detect
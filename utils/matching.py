@@ -0,0 +1,121 @@
+# utils/matching.py
+import numpy as np
+
+
+def intersection_union(boxes1, boxes2):
+    """Pairwise intersection and union areas of two sets of xyxy boxes, each (N, M)"""
+    x1 = np.maximum(boxes1[:, None, 0], boxes2[None, :, 0])
+    y1 = np.maximum(boxes1[:, None, 1], boxes2[None, :, 1])
+    x2 = np.minimum(boxes1[:, None, 2], boxes2[None, :, 2])
+    y2 = np.minimum(boxes1[:, None, 3], boxes2[None, :, 3])
+
+    intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area1 = (boxes1[:, 2] - boxes1[:, 0]) * (boxes1[:, 3] - boxes1[:, 1])
+    area2 = (boxes2[:, 2] - boxes2[:, 0]) * (boxes2[:, 3] - boxes2[:, 1])
+    union = area1[:, None] + area2[None, :] - intersection
+    return intersection, union
+
+
+def iou_matrix(boxes1, boxes2):
+    """Pairwise IOU between two sets of xyxy boxes, shape (N, M)"""
+    boxes1 = np.asarray(boxes1, dtype=np.float32).reshape(-1, 4)
+    boxes2 = np.asarray(boxes2, dtype=np.float32).reshape(-1, 4)
+    intersection, union = intersection_union(boxes1, boxes2)
+    return np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+
+
+def giou_matrix(boxes1, boxes2):
+    """Pairwise generalized IOU, in the range [-1, 1]"""
+    boxes1 = np.asarray(boxes1, dtype=np.float32).reshape(-1, 4)
+    boxes2 = np.asarray(boxes2, dtype=np.float32).reshape(-1, 4)
+    intersection, union = intersection_union(boxes1, boxes2)
+    iou = np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+
+    # Smallest enclosing box
+    x1 = np.minimum(boxes1[:, None, 0], boxes2[None, :, 0])
+    y1 = np.minimum(boxes1[:, None, 1], boxes2[None, :, 1])
+    x2 = np.maximum(boxes1[:, None, 2], boxes2[None, :, 2])
+    y2 = np.maximum(boxes1[:, None, 3], boxes2[None, :, 3])
+    enclosing = (x2 - x1) * (y2 - y1)
+
+    penalty = np.divide(enclosing - union, enclosing, out=np.zeros_like(enclosing), where=enclosing > 0)
+    return iou - penalty
+
+
+def center_distance_matrix(boxes1, boxes2):
+    """Pairwise center distance normalized by the enclosing box diagonal, in [0, 1]"""
+    boxes1 = np.asarray(boxes1, dtype=np.float32).reshape(-1, 4)
+    boxes2 = np.asarray(boxes2, dtype=np.float32).reshape(-1, 4)
+
+    c1 = (boxes1[:, :2] + boxes1[:, 2:]) / 2
+    c2 = (boxes2[:, :2] + boxes2[:, 2:]) / 2
+    dist = np.sum((c1[:, None, :] - c2[None, :, :]) ** 2, axis=-1)
+
+    x1 = np.minimum(boxes1[:, None, 0], boxes2[None, :, 0])
+    y1 = np.minimum(boxes1[:, None, 1], boxes2[None, :, 1])
+    x2 = np.maximum(boxes1[:, None, 2], boxes2[None, :, 2])
+    y2 = np.maximum(boxes1[:, None, 3], boxes2[None, :, 3])
+    diag = (x2 - x1) ** 2 + (y2 - y1) ** 2
+
+    return np.sqrt(np.divide(dist, diag, out=np.ones_like(dist), where=diag > 0))
+
+
+# Cost functions take (detections, tracks) and return a matrix where lower is better
+COST_FUNCTIONS = {
+    "iou": lambda d, t: 1.0 - iou_matrix(d, t),
+    "giou": lambda d, t: 1.0 - giou_matrix(d, t),
+    "center": lambda d, t: center_distance_matrix(d, t),
+}
+
+
+def cost_matrix(detections, tracks, cost="iou"):
+    """Build a (detections x tracks) cost matrix with the named cost function"""
+    if cost not in COST_FUNCTIONS:
+        raise ValueError(f"Unknown cost '{cost}', expected one of {sorted(COST_FUNCTIONS)}")
+    return COST_FUNCTIONS[cost](detections, tracks)
+
+
+def linear_assignment(cost, max_cost):
+    """Solve the optimal assignment and drop pairs whose cost exceeds max_cost
+
+    Returns (matches, unmatched_rows, unmatched_cols) where matches is a (K, 2) array
+    of (row, col) pairs.
+    """
+    rows, cols = cost.shape
+    if rows == 0 or cols == 0:
+        return np.empty((0, 2), dtype=int), np.arange(rows), np.arange(cols)
+
+    # scipy.optimize takes most of a second to import, so it is loaded on first use
+    from scipy.optimize import linear_sum_assignment
+
+    # Inadmissible pairs get a large finite cost so the solver never prefers them
+    gated = np.where(cost <= max_cost, cost, max_cost + 1e5)
+    row_idx, col_idx = linear_sum_assignment(gated)
+    keep = cost[row_idx, col_idx] <= max_cost
+    matches = np.stack([row_idx[keep], col_idx[keep]], axis=1)
+
+    unmatched_rows = np.setdiff1d(np.arange(rows), matches[:, 0])
+    unmatched_cols = np.setdiff1d(np.arange(cols), matches[:, 1])
+    return matches, unmatched_rows, unmatched_cols
+
+
+def nms(boxes, scores, classes=None, iou_threshold=0.5):
+    """Indices kept by greedy non-maximum suppression, per class when classes are given
+
+    The pairwise IOU matrix is computed once; each kept box then suppresses
+    all lower-scoring boxes it overlaps in a single row operation.
+    """
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    if len(boxes) == 0:
+        return np.empty(0, dtype=np.int64)
+    if classes is not None:
+        # Shift each class into its own region so boxes of different classes never overlap
+        boxes = boxes + (np.asarray(classes, dtype=np.float32) * (boxes.max() + 1))[:, None]
+
+    order = np.argsort(-np.asarray(scores), kind="stable")
+    ious = iou_matrix(boxes[order], boxes[order])
+    keep = np.ones(len(order), dtype=bool)
+    for i in range(len(order)):
+        if keep[i]:
+            keep[i + 1:] &= ious[i, i + 1:] <= iou_threshold
+    return order[keep]
@@ -0,0 +1,103 @@
+# utils/metrics.py
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def prometheus_text(sources):
+    """Render DetectionStats of every stream in the Prometheus text exposition format"""
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP object_tracking_{name} {help_text}")
+        lines.append(f"# TYPE object_tracking_{name} {kind}")
+        for labels, value in samples:
+            label_str = ",".join(f'{k}="{v}"' for k, v in labels.items())
+            lines.append(f"object_tracking_{name}{{{label_str}}} {value}")
+
+    snapshots = {stream: (stats.get_summary(), stats.get_windows(), stats.frames) for stream, stats in sources.items()}
+
+    metric("frames_total", "counter", "Frames processed",
+           [({"stream": s}, frames) for s, (_, _, frames) in snapshots.items()])
+    metric("detections_total", "counter", "Detections since start",
+           [({"stream": s}, summary["total_detections"]) for s, (summary, _, _) in snapshots.items()])
+    metric("unique_objects_total", "counter", "Distinct confirmed track IDs",
+           [({"stream": s}, summary["unique_objects"]) for s, (summary, _, _) in snapshots.items()])
+    metric("avg_confidence_percent", "gauge", "Average detection confidence since start",
+           [({"stream": s}, round(summary["avg_confidence"], 3)) for s, (summary, _, _) in snapshots.items()])
+    metric("class_detections_total", "counter", "Detections per class since start",
+           [({"stream": s, "class": c}, n) for s, (summary, _, _) in snapshots.items()
+            for c, n in summary["class_counts"].items()])
+    metric("window_fps", "gauge", "Frames per second over a rolling window",
+           [({"stream": s, "window": w}, round(v["fps"], 3)) for s, (_, windows, _) in snapshots.items()
+            for w, v in windows.items()])
+    metric("window_detections", "gauge", "Detections over a rolling window",
+           [({"stream": s, "window": w}, v["detections"]) for s, (_, windows, _) in snapshots.items()
+            for w, v in windows.items()])
+    metric("window_avg_confidence_percent", "gauge", "Average confidence over a rolling window",
+           [({"stream": s, "window": w}, round(v["avg_confidence"], 3)) for s, (_, windows, _) in snapshots.items()
+            for w, v in windows.items()])
+    return "\n".join(lines) + "\n"
+
+
+def json_snapshot(sources):
+    return {
+        stream: {"summary": stats.get_summary(), "windows": stats.get_windows(), "frames": stats.frames}
+        for stream, stats in sources.items()
+    }
+
+
+class MetricsServer:
+    """Serve /metrics (Prometheus text) and /metrics.json from a background thread
+
+    Only local clients can connect by default; pass host="0.0.0.0" to
+    expose the metrics to the network.
+    """
+
+    def __init__(self, port=9100, host="127.0.0.1"):
+        self.host = host
+        self.port = port
+        self.sources = {}
+        self.server = None
+        self.thread = None
+
+    def register(self, stream, stats):
+        self.sources[str(stream)] = stats
+
+    def unregister(self, stream):
+        self.sources.pop(str(stream), None)
+
+    def start(self):
+        sources = self.sources
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body = prometheus_text(dict(sources)).encode()
+                    content_type = "text/plain; version=0.0.4"
+                elif self.path == "/metrics.json":
+                    body = json.dumps(json_snapshot(dict(sources))).encode()
+                    content_type = "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        print(f"Serving metrics on http://{self.host}:{self.port}/metrics")
+        return self
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
@@ -0,0 +1,248 @@
+# utils/multi_stream.py
+import argparse
+import os
+import threading
+import time
+
+from utils.video_stream import Camera
+from utils.tracking import ObjectTracker
+from utils.visualization import Visualizer
+from utils.stats import DetectionStats
+from utils.detections import Detections
+from utils.buffers import FramePool, letterbox_into
+from utils.pipeline import FrameQueue, DROP_OLDEST, BLOCK, QUEUE_POLICIES
+from utils.metrics import MetricsServer
+from utils.events import TrackEventLog
+from utils.reid import ReIDGallery
+
+
+def default_policy(source):
+    """BLOCK for video files so no frame is skipped, DROP_OLDEST for cameras and streams to stay live"""
+    return BLOCK if isinstance(source, str) and os.path.isfile(source) else DROP_OLDEST
+
+
+class StreamContext:
+    """Per-source state: capture device, frame queue, tracker, visualizer and statistics"""
+
+    def __init__(self, stream_id, source, frame_size=(640, 640), reid=False, queue_policy=None, queue_size=2):
+        self.stream_id = stream_id
+        self.source = source
+        self.frame_size = frame_size
+        self.camera = Camera.load_camera(Camera.parse_source(source))
+        self.tracker = ObjectTracker(reid=ReIDGallery() if reid else None)
+        self.visualizer = Visualizer(self.tracker)
+        self.stats = DetectionStats()
+        self.pool = FramePool((frame_size[1], frame_size[0], 3), name=f"stream{stream_id}")
+        # Each stream has its own queue, so a fast source cannot evict another source's frames
+        self.queue = FrameQueue(queue_size, queue_policy or default_policy(source), on_drop=self.pool.release)
+        self.raw_frame = None
+        self.frames = 0
+        self.finished = False
+
+    def read(self):
+        """Next frame letterboxed into a pooled buffer, or None at the end of the source"""
+        ret, frame = self.camera.read(self.raw_frame)
+        if not ret:
+            return None
+        self.raw_frame = frame
+        return letterbox_into(frame, self.pool.acquire())
+
+    def release(self):
+        if self.camera is not None:
+            self.camera.release()
+            self.camera = None
+
+
+class MultiStreamServer:
+    """Batch frames from several sources into a single model call
+
+    One capture thread per source feeds that source's bounded queue. The
+    inference thread takes frames round-robin, one per stream per pass, up to
+    max_batch frames and waiting at most max_wait seconds after the first
+    one, runs the model once and hands each result back to the tracker and
+    statistics of the stream it came from. Video files block their capture
+    thread when their queue is full; cameras and streams drop their oldest
+    frame, unless queue_policy overrides it for all sources. Frames are BGR buffers
+    from the stream's pool and are recycled once on_result returns, so an
+    on_result callback that keeps a frame must copy it.
+    """
+
+    def __init__(self, model, sources, max_batch=8, max_wait=0.01,
+                 frame_size=(640, 640), queue_policy=None, on_result=None, event_log=None,
+                 reid=False):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.on_result = on_result
+        self.event_log = event_log
+        self.streams = [StreamContext(i, source, frame_size, reid, queue_policy) for i, source in enumerate(sources)]
+        # Signalled by capture threads whenever a frame is queued
+        self.ready = threading.Condition()
+        self.next_stream = 0
+        self.is_running = False
+        self.threads = []
+        self.batches = 0
+        self.batched_frames = 0
+
+    def start(self):
+        self.is_running = True
+        for stream in self.streams:
+            thread = threading.Thread(target=self.capture_loop, args=(stream,), daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        inference_thread = threading.Thread(target=self.inference_loop, daemon=True)
+        inference_thread.start()
+        self.threads.append(inference_thread)
+
+    def stop(self):
+        self.is_running = False
+        for stream in self.streams:
+            stream.queue.close()
+        with self.ready:
+            self.ready.notify_all()
+        for thread in self.threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout=1.0)
+        for stream in self.streams:
+            stream.release()
+
+    def capture_loop(self, stream):
+        while self.is_running:
+            frame = stream.read()
+            if frame is None:
+                stream.finished = True
+                break
+            stream.queue.put(frame)
+            with self.ready:
+                self.ready.notify()
+
+    def queued(self):
+        return sum(len(stream.queue) for stream in self.streams)
+
+    def take_round(self, limit):
+        """At most one frame from each stream, starting after the stream served first last time"""
+        count = len(self.streams)
+        batch = []
+        for offset in range(count):
+            if len(batch) >= limit:
+                break
+            stream = self.streams[(self.next_stream + offset) % count]
+            frame = stream.queue.get(timeout=0)
+            if frame is not None:
+                batch.append((stream.stream_id, frame))
+        return batch
+
+    def collect_batch(self):
+        """Wait for one frame, then gather more round-robin until the batch is full or max_wait passes"""
+        batch = []
+        deadline = time.perf_counter() + 0.1
+        while len(batch) < self.max_batch:
+            taken = self.take_round(self.max_batch - len(batch))
+            if taken:
+                if not batch:
+                    deadline = time.perf_counter() + self.max_wait
+                batch.extend(taken)
+                continue
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0 or not self.is_running:
+                break
+            with self.ready:
+                self.ready.wait_for(lambda: self.queued() > 0 or not self.is_running, timeout)
+        # The next batch starts with the following stream
+        self.next_stream = (self.next_stream + 1) % len(self.streams)
+        return batch
+
+    def inference_loop(self):
+        while self.is_running:
+            batch = self.collect_batch()
+            if not batch:
+                if all(stream.finished for stream in self.streams) and self.queued() == 0:
+                    self.is_running = False
+                continue
+
+            # Ultralytics expects BGR arrays, the same order the frames are captured in
+            frames = [frame for _, frame in batch]
+            try:
+                results = self.model(frames, verbose=False)
+            except Exception as e:
+                print(f"Error in batched inference: {e}")
+                self.is_running = False
+                break
+
+            self.batches += 1
+            self.batched_frames += len(batch)
+
+            # Results come back in input order, so each stream's frames stay ordered
+            for (stream_id, frame), result in zip(batch, results):
+                stream = self.streams[stream_id]
+                self.process_result(stream, frame, [result])
+                stream.pool.release(frame)
+
+    def process_result(self, stream, frame, results):
+        detections = stream.tracker.update(Detections.from_results(results), frame)
+        frame = stream.visualizer.draw_detections(frame, detections)
+        stream.stats.update(detections)
+        if self.event_log is not None:
+            self.event_log.append(detections, time.time(), f"{stream.stream_id}:{stream.source}")
+        stream.frames += 1
+        if self.on_result:
+            self.on_result(stream, frame, detections)
+
+    def get_summary(self):
+        """Per-stream statistics plus the average batch size"""
+        return {
+            "avg_batch_size": self.batched_frames / self.batches if self.batches else 0,
+            "streams": {
+                f"{stream.stream_id}:{stream.source}": dict(stream.stats.get_summary(), frames=stream.frames)
+                for stream in self.streams
+            },
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batched multi-source detection and tracking")
+    parser.add_argument("sources", nargs="+", help="Camera indices, video files or stream URLs")
+    parser.add_argument("--model", default="runs/detect/train/weights/best.pt")
+    parser.add_argument("--backend", default="pytorch", help="pytorch, torchscript, onnx, onnx-int8, openvino or openvino-int8")
+    parser.add_argument("--max-batch", type=int, default=8)
+    parser.add_argument("--max-wait", type=float, default=0.01, help="Seconds to wait to fill a batch")
+    parser.add_argument("--interval", type=float, default=5.0, help="Seconds between summaries")
+    parser.add_argument("--metrics-port", type=int, help="Serve Prometheus/JSON metrics on this port")
+    parser.add_argument("--metrics-host", default="127.0.0.1",
+                        help="Address the metrics are served on; 0.0.0.0 exposes them to the network")
+    parser.add_argument("--events", help="Directory to append tracked detections to")
+    parser.add_argument("--reid", action="store_true", help="Recover lost track IDs by appearance")
+    parser.add_argument("--queue-policy", choices=QUEUE_POLICIES,
+                        help="Per-stream queue policy (default: block for video files, drop_oldest for live sources)")
+    args = parser.parse_args()
+
+    from model_train.export import load_model
+
+    event_log = TrackEventLog(args.events).start() if args.events else None
+    server = MultiStreamServer(
+        load_model(args.model, args.backend), args.sources, args.max_batch, args.max_wait,
+        queue_policy=args.queue_policy, event_log=event_log, reid=args.reid
+    )
+    metrics_server = MetricsServer(args.metrics_port, args.metrics_host).start() if args.metrics_port else None
+    if metrics_server:
+        for stream in server.streams:
+            metrics_server.register(f"{stream.stream_id}:{stream.source}", stream.stats)
+
+    server.start()
+    try:
+        while server.is_running:
+            time.sleep(args.interval)
+            print(server.get_summary())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        if metrics_server:
+            metrics_server.stop()
+        if event_log:
+            event_log.stop()
+        print(server.get_summary())
+
+
+if __name__ == "__main__":
+    main()
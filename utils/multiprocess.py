@@ -0,0 +1,455 @@
+# utils/multiprocess.py
+import argparse
+import multiprocessing as mp
+import time
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from model_train.export import BACKENDS, load_model
+from utils.buffers import letterbox_into
+from utils.detections import Detections
+from utils.headless import iter_frames
+from utils.keyframe import KeyframeScheduler
+from utils.reid import ReIDGallery
+from utils.stats import DetectionStats
+from utils.tracking import ObjectTracker
+from utils.visualization import Visualizer
+
+# Who holds a ring slot; the TO_ states mean it is on its way to that stage
+FREE, CAPTURE, INFERENCE, RENDER, CONSUMER, TO_INFERENCE, TO_RENDER, TO_CONSUMER = range(8)
+STAGE_NAMES = {CAPTURE: "capture", INFERENCE: "inference", RENDER: "render"}
+
+# Pipes ("hops") are keyed by the channel they use: FREE carries free slots to capture.
+# For each hop: the slot state while a message is on it, the stage that sends it
+# (None for the parent) and each stage's inbox and outbox
+IN_FLIGHT = {FREE: FREE, INFERENCE: TO_INFERENCE, RENDER: TO_RENDER, CONSUMER: TO_CONSUMER}
+SENDER = {FREE: None, INFERENCE: CAPTURE, RENDER: INFERENCE, CONSUMER: RENDER}
+INBOX = {CAPTURE: FREE, INFERENCE: INFERENCE, RENDER: RENDER}
+OUTBOX = {CAPTURE: INFERENCE, INFERENCE: RENDER, RENDER: CONSUMER}
+BARRIER = "barrier"
+
+
+class SharedFrameRing:
+    """Fixed number of frame slots in one shared memory block
+
+    Processes exchange slot indices over pipes; the frames themselves are
+    never pickled.
+    """
+
+    def __init__(self, slots, shape, dtype=np.uint8, name=None):
+        self.slots = slots
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.owner = name is None
+        if self.owner:
+            size = slots * int(np.prod(self.shape)) * self.dtype.itemsize
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.frames = np.ndarray((slots,) + self.shape, dtype=self.dtype, buffer=self.shm.buf)
+
+    def spec(self):
+        """What another process needs to attach to this ring"""
+        return self.shm.name, self.slots, self.shape, self.dtype.str
+
+    @classmethod
+    def attach(cls, spec):
+        name, slots, shape, dtype = spec
+        return cls(slots, shape, dtype, name=name)
+
+    def close(self):
+        self.frames = None
+        try:
+            self.shm.close()
+        except BufferError:
+            print("Shared frame ring still has views open, leaving it mapped")
+        if self.owner:
+            self.shm.unlink()
+
+
+class BarrierForwarder:
+    """Sends a barrier down a worker's outbox when the parent asks for one
+
+    A barrier tells the parent that every message sent before it on that pipe
+    has been received; see ProcessPipeline.fence.
+    """
+
+    def __init__(self, outbox, requests, hop):
+        self.outbox = outbox
+        self.requests = requests
+        self.hop = hop
+        # Requests from before a restart were answered by the parent when this worker's predecessor died
+        self.sent = requests[hop]
+
+    def __call__(self):
+        token = self.requests[self.hop]
+        if token != self.sent:
+            self.outbox.send((BARRIER, token))
+            self.sent = token
+
+
+def is_barrier(item):
+    return isinstance(item, tuple) and item[0] == BARRIER
+
+
+def take(inbox, slot_state, stage, stop_event, barriers_seen, forward_barrier):
+    """Next message from a stage's inbox, marking its slot as held by the stage"""
+    while not stop_event.is_set():
+        forward_barrier()
+        if not inbox.poll(0.1):
+            continue
+        item = inbox.recv()
+        if is_barrier(item):
+            barriers_seen[INBOX[stage]] = item[1]
+            continue
+        if item is not None and item[0] is not None:
+            slot_state[item[0]] = stage
+        return item
+    return None
+
+
+def capture_worker(spec, source, outbox, free_slots, slot_state, stop_event, dropped, drop_frames,
+                   last_frame, source_fps, barrier_requests, barriers_seen):
+    ring = SharedFrameRing.attach(spec)
+    forward_barrier = BarrierForwarder(outbox, barrier_requests, OUTBOX[CAPTURE])
+    properties = {}
+    try:
+        # A restarted worker continues after the last frame sent instead of replaying the source
+        for frame_index, frame, timestamp in iter_frames(source, last_frame.value + 1, properties):
+            if stop_event.is_set():
+                break
+            source_fps.value = properties["fps"] or 0.0
+            slot = None
+            while slot is None and not stop_event.is_set():
+                forward_barrier()
+                if free_slots.poll(0 if drop_frames else 0.1):
+                    item = free_slots.recv()
+                    if is_barrier(item):
+                        barriers_seen[FREE] = item[1]
+                        continue
+                    slot = item
+                    slot_state[slot] = CAPTURE
+                elif drop_frames:
+                    break
+            if slot is None:
+                if stop_event.is_set():
+                    break
+                # Live sources keep reading so the device buffer never goes stale
+                with dropped.get_lock():
+                    dropped.value += 1
+                continue
+            letterbox_into(frame, ring.frames[slot])
+            slot_state[slot] = TO_INFERENCE
+            last_frame.value = frame_index
+            outbox.send((slot, frame_index, timestamp))
+        if not stop_event.is_set():
+            forward_barrier()
+            outbox.send(None)
+    finally:
+        ring.close()
+
+
+def inference_worker(spec, model_loader, loader_args, inbox, outbox, slot_state, stop_event,
+                     detect_interval, motion_threshold, uncertainty_threshold, uncertainty, barrier_requests,
+                     barriers_seen):
+    model = model_loader(*loader_args)
+    ring = SharedFrameRing.attach(spec)
+    scheduler = KeyframeScheduler(detect_interval, motion_threshold, uncertainty_threshold)
+    forward_barrier = BarrierForwarder(outbox, barrier_requests, OUTBOX[INFERENCE])
+    try:
+        while True:
+            item = take(inbox, slot_state, INFERENCE, stop_event, barriers_seen, forward_barrier)
+            if item is None:
+                if not stop_event.is_set():
+                    outbox.send(None)
+                break
+            slot, frame_index, timestamp = item
+            frame = ring.frames[slot]
+            data = names = None
+            # The tracker lives in the render process, which publishes its uncertainty
+            scheduler.uncertainty = uncertainty.value
+            if scheduler.should_detect(frame):
+                detections = Detections.from_results(model(frame, verbose=False))
+                data, names = detections.data, detections.names
+            slot_state[slot] = TO_RENDER
+            outbox.send((slot, frame_index, timestamp, data, names))
+    finally:
+        ring.close()
+
+
+def render_worker(spec, inbox, outbox, slot_state, stop_event, summary_interval, reid, uncertainty_threshold,
+                  uncertainty, barrier_requests, barriers_seen):
+    ring = SharedFrameRing.attach(spec)
+    tracker = ObjectTracker(reid=ReIDGallery() if reid else None)
+    visualizer = Visualizer(tracker)
+    stats = DetectionStats()
+    last_summary = 0.0
+    forward_barrier = BarrierForwarder(outbox, barrier_requests, OUTBOX[RENDER])
+    try:
+        while True:
+            item = take(inbox, slot_state, RENDER, stop_event, barriers_seen, forward_barrier)
+            if item is None:
+                # The final statistics ride on the end-of-stream message
+                if not stop_event.is_set():
+                    outbox.send((None, None, None, dict(stats.get_summary(), frames=stats.frames), ()))
+                break
+            slot, frame_index, timestamp, data, names = item
+            frame = ring.frames[slot]
+            classes = ()
+            if data is not None:
+                detections = tracker.update(Detections(data, names), frame)
+                # Class names of the frame, e.g. for the consumer's event recording
+                classes = {detections.names.get(cls, "") for cls in set(detections.cls.tolist())}
+                visualizer.draw_detections(frame, detections)
+                stats.update(detections)
+            else:
+                visualizer.draw_tracks(frame, tracker.predict())
+                stats.update(Detections())
+            if uncertainty_threshold is not None:
+                uncertainty.value = tracker.prediction_uncertainty()
+
+            # Statistics travel with a frame a few times a second
+            summary = None
+            now = time.time()
+            if now - last_summary >= summary_interval:
+                summary = dict(stats.get_summary(), frames=stats.frames)
+                last_summary = now
+            slot_state[slot] = TO_CONSUMER
+            outbox.send((slot, frame_index, timestamp, summary, classes))
+    finally:
+        ring.close()
+
+
+class ProcessPipeline:
+    """Capture, inference and tracking/drawing in three processes over a shared-memory ring
+
+    Each process has its own interpreter, so the Python-heavy tracking and
+    drawing no longer share a GIL with inference or the GUI. The consumer
+    calls get() for the next annotated frame (a view into the ring) and
+    release() once done with it; a frame kept longer must be copied. A
+    worker that crashes is restarted up to max_restarts times, capture
+    continues after the last frame it sent, and the slots it held are
+    returned to the pool. Slots it had taken off or was about to put on a
+    pipe are found with barriers (see fence) and returned as well.
+    """
+
+    def __init__(self, source, model_loader, loader_args=(), frame_size=(640, 640), slots=8,
+                 detect_interval=1, motion_threshold=None, uncertainty_threshold=None, drop_frames=None,
+                 max_restarts=3, summary_interval=0.25, reid=False):
+        self.source = source
+        self.model_loader = model_loader
+        self.loader_args = loader_args
+        self.frame_size = frame_size
+        self.slots = slots
+        self.detect_interval = detect_interval
+        self.motion_threshold = motion_threshold
+        self.uncertainty_threshold = uncertainty_threshold
+        # Cameras drop frames when every slot is busy; files wait so none are skipped
+        self.drop_frames = str(source).isdigit() if drop_frames is None else drop_frames
+        self.max_restarts = max_restarts
+        self.summary_interval = summary_interval
+        self.reid = reid
+        self.context = mp.get_context("spawn")
+        self.ring = None
+        self.processes = {}
+        self.restarts = {stage: 0 for stage in STAGE_NAMES}
+        self.summary = {"total_detections": 0, "avg_confidence": 0, "unique_objects": 0, "class_counts": {}, "frames": 0}
+        self.finished = False
+        # Bumped on every release, so a fence can tell a lost slot from one that went round the ring
+        self.generation = [0] * slots
+        self.fences = []
+        self.barrier_token = 0
+
+    def start(self):
+        ctx = self.context
+        self.ring = SharedFrameRing(self.slots, (self.frame_size[1], self.frame_size[0], 3))
+        # One (reader, writer) pipe per hop: every pipe has a single reader and a
+        # single writer, so no lock is left held when a worker is killed, and at
+        # most `slots` messages are ever in flight, so sends never block
+        self.channels = {stage: ctx.Pipe(duplex=False) for stage in (FREE, INFERENCE, RENDER, CONSUMER)}
+        self.slot_state = ctx.Array("b", self.slots, lock=False)
+        for slot in range(self.slots):
+            self.release(slot)
+        self.stop_event = ctx.Event()
+        self.dropped = ctx.Value("q", 0)
+        self.last_frame = ctx.Value("q", -1)
+        self.source_fps = ctx.Value("d", 0.0, lock=False)
+        self.uncertainty = ctx.Value("d", 0.0, lock=False)
+        # Per hop: the last barrier the parent asked its sender for, and the last one its reader saw
+        self.barrier_requests = ctx.Array("q", CONSUMER + 1, lock=False)
+        self.barriers_seen = ctx.Array("q", CONSUMER + 1, lock=False)
+        for stage in STAGE_NAMES:
+            self.processes[stage] = self.spawn(stage)
+        return self
+
+    def spawn(self, stage):
+        spec = self.ring.spec()
+        if stage == CAPTURE:
+            target = capture_worker
+            args = (spec, self.source, self.channels[INFERENCE][1], self.channels[FREE][0], self.slot_state,
+                    self.stop_event, self.dropped, self.drop_frames, self.last_frame, self.source_fps,
+                    self.barrier_requests, self.barriers_seen)
+        elif stage == INFERENCE:
+            target = inference_worker
+            args = (spec, self.model_loader, self.loader_args, self.channels[INFERENCE][0],
+                    self.channels[RENDER][1], self.slot_state, self.stop_event, self.detect_interval,
+                    self.motion_threshold, self.uncertainty_threshold, self.uncertainty, self.barrier_requests,
+                    self.barriers_seen)
+        else:
+            target = render_worker
+            args = (spec, self.channels[RENDER][0], self.channels[CONSUMER][1], self.slot_state, self.stop_event,
+                    self.summary_interval, self.reid, self.uncertainty_threshold, self.uncertainty,
+                    self.barrier_requests, self.barriers_seen)
+        process = self.context.Process(target=target, args=args, name=STAGE_NAMES[stage], daemon=True)
+        process.start()
+        return process
+
+    def check_workers(self):
+        """Restart workers that died while running and reclaim the slots they held"""
+        if self.stop_event.is_set():
+            return
+        for stage, process in list(self.processes.items()):
+            if process.is_alive() or process.exitcode == 0:
+                continue
+            if self.restarts[stage] >= self.max_restarts:
+                raise Exception(f"{STAGE_NAMES[stage]} worker keeps crashing (exit code {process.exitcode})")
+            print(f"{STAGE_NAMES[stage]} worker exited with code {process.exitcode}, restarting")
+            for slot in range(self.slots):
+                if self.slot_state[slot] == stage:
+                    self.release(slot)
+            # A slot received but not yet marked, or marked but not yet sent, looks in flight
+            self.fence(INBOX[stage])
+            self.fence(OUTBOX[stage])
+            self.restarts[stage] += 1
+            self.processes[stage] = self.spawn(stage)
+        self.check_fences()
+
+    def fence(self, hop):
+        """Put a barrier on a pipe behind every slot currently in flight on it
+
+        Once the reader has seen the barrier, every message sent before it has
+        been received, so a slot from the snapshot that is still in flight
+        (and was not released in between) was lost by a crashed worker.
+        """
+        self.barrier_token += 1
+        in_flight = IN_FLIGHT[hop]
+        snapshot = {slot: self.generation[slot] for slot in range(self.slots) if self.slot_state[slot] == in_flight}
+        self.fences.append((hop, self.barrier_token, snapshot))
+        sender = SENDER[hop]
+        if sender is None or not self.processes[sender].is_alive():
+            # Nobody else is writing to the pipe, so the parent sends the barrier itself
+            self.channels[hop][1].send((BARRIER, self.barrier_token))
+        else:
+            self.barrier_requests[hop] = self.barrier_token
+
+    def check_fences(self):
+        for fence in list(self.fences):
+            hop, token, snapshot = fence
+            if self.barriers_seen[hop] < token:
+                continue
+            self.fences.remove(fence)
+            for slot, generation in snapshot.items():
+                if self.slot_state[slot] == IN_FLIGHT[hop] and self.generation[slot] == generation:
+                    print(f"Reclaiming slot {slot} lost in flight")
+                    self.release(slot)
+
+    def get(self, timeout=None):
+        """(slot, frame, info) for the next annotated frame, or None on timeout or at the end
+
+        info holds the frame_index, the capture time and the class names detected in the frame.
+        """
+        self.check_workers()
+        inbox = self.channels[CONSUMER][0]
+        if not inbox.poll(timeout):
+            return None
+        item = inbox.recv()
+        if is_barrier(item):
+            self.barriers_seen[CONSUMER] = item[1]
+            return None
+        slot, frame_index, timestamp, summary, classes = item
+        if summary is not None:
+            self.summary = summary
+        if slot is None:
+            self.finished = True
+            return None
+        self.slot_state[slot] = CONSUMER
+        return slot, self.ring.frames[slot], {"frame_index": frame_index, "time": timestamp, "classes": classes}
+
+    def release(self, slot):
+        self.generation[slot] += 1
+        self.slot_state[slot] = FREE
+        self.channels[FREE][1].send(slot)
+
+    def fps(self):
+        """Frame rate reported by the source, or None until capture has opened it or if it is unknown"""
+        if self.ring is None or self.source_fps.value <= 0:
+            return None
+        return self.source_fps.value
+
+    def get_stats(self):
+        stats = {
+            STAGE_NAMES[stage]: {"alive": process.is_alive(), "restarts": self.restarts[stage]}
+            for stage, process in self.processes.items()
+        }
+        stats["dropped"] = self.dropped.value if self.ring is not None else 0
+        return stats
+
+    def stop(self, timeout=2.0):
+        if self.ring is None:
+            return
+        self.stop_event.set()
+        for process in self.processes.values():
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+                process.join(timeout)
+        for reader, writer in self.channels.values():
+            reader.close()
+            writer.close()
+        self.ring.close()
+        self.ring = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Detection and tracking with one process per stage")
+    parser.add_argument("source", help="Video file, stream URL, camera index or image folder")
+    parser.add_argument("--model", default="runs/detect/train/weights/best.pt")
+    parser.add_argument("--backend", default="pytorch", choices=BACKENDS)
+    parser.add_argument("--slots", type=int, default=8, help="Frames in the shared memory ring")
+    parser.add_argument("--detect-interval", type=int, default=1)
+    parser.add_argument("--output", help="Path of the annotated output video")
+    parser.add_argument("--reid", action="store_true", help="Recover lost track IDs by appearance")
+    args = parser.parse_args()
+
+    # The loader is sent by reference; the inference worker loads its own copy of the model
+    pipeline = ProcessPipeline(args.source, load_model, (args.model, args.backend), slots=args.slots,
+                               detect_interval=args.detect_interval, reid=args.reid).start()
+    writer = None
+    frames = 0
+    start = time.time()
+    try:
+        while not pipeline.finished:
+            item = pipeline.get(timeout=0.5)
+            if item is None:
+                continue
+            slot, frame, _ = item
+            if args.output:
+                if writer is None:
+                    fps = pipeline.fps() or 30.0
+                    writer = cv2.VideoWriter(args.output, cv2.VideoWriter_fourcc(*'mp4v'), fps, frame.shape[1::-1])
+                writer.write(frame)
+            pipeline.release(slot)
+            frames += 1
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pipeline.stop()
+        if writer is not None:
+            writer.release()
+    print(dict(pipeline.summary, fps=round(frames / (time.time() - start), 1)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+# utils/pipeline.py
+import threading
+import time
+from collections import deque
+
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+BLOCK = "block"
+QUEUE_POLICIES = (DROP_OLDEST, DROP_NEWEST, BLOCK)
+
+
+class FrameQueue:
+    """Bounded ring queue between two pipeline stages
+
+    on_drop is called with every item the queue discards or refuses, so pooled
+    buffers inside it can be returned.
+    """
+
+    def __init__(self, maxsize=2, policy=DROP_OLDEST, on_drop=None):
+        if policy not in QUEUE_POLICIES:
+            raise ValueError(f"Unknown queue policy '{policy}', expected one of {QUEUE_POLICIES}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.on_drop = on_drop
+        self.items = deque()
+        self.dropped = 0
+        self.closed = False
+        self.condition = threading.Condition()
+
+    def __len__(self):
+        return len(self.items)
+
+    def put(self, item, timeout=None):
+        """Add an item, applying the queue policy when full. Returns False if dropped."""
+        discarded = None
+        with self.condition:
+            if self.closed:
+                discarded = item
+            elif len(self.items) >= self.maxsize:
+                if self.policy == DROP_NEWEST:
+                    self.dropped += 1
+                    discarded = item
+                elif self.policy == DROP_OLDEST:
+                    discarded = self.items.popleft()
+                    self.dropped += 1
+                else:
+                    ready = self.condition.wait_for(
+                        lambda: len(self.items) < self.maxsize or self.closed,
+                        timeout
+                    )
+                    if not ready or self.closed:
+                        discarded = item
+            if discarded is not item:
+                self.items.append(item)
+                self.condition.notify_all()
+        if discarded is not None and self.on_drop:
+            self.on_drop(discarded)
+        return discarded is not item
+
+    def get(self, timeout=None):
+        """Remove and return the oldest item, or None on timeout/close"""
+        with self.condition:
+            ready = self.condition.wait_for(lambda: self.items or self.closed, timeout)
+            if not ready or not self.items:
+                return None
+            item = self.items.popleft()
+            self.condition.notify_all()
+            return item
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+class Stage(threading.Thread):
+    """Worker thread that reads from an inbox, runs func and writes to an outbox
+
+    A stage without an inbox is a source: func is called with no arguments and
+    produces items. A func returning None produces nothing for that item.
+    """
+
+    def __init__(self, name, func, inbox=None, outbox=None, on_error=None):
+        super().__init__(name=name, daemon=True)
+        self.func = func
+        self.inbox = inbox
+        self.outbox = outbox
+        self.on_error = on_error
+        self.running = False
+        self.processed = 0
+        self.latency = 0.0  # Exponential moving average, seconds
+
+    def run(self):
+        self.running = True
+        while self.running:
+            if self.inbox is not None:
+                item = self.inbox.get(timeout=0.1)
+                if item is None:
+                    if self.inbox.closed:
+                        break
+                    continue
+            try:
+                start = time.perf_counter()
+                output = self.func(item) if self.inbox is not None else self.func()
+                elapsed = time.perf_counter() - start
+            except Exception as e:
+                print(f"Error in {self.name} stage: {e}")
+                self.running = False
+                if self.on_error:
+                    self.on_error(self.name, e)
+                break
+
+            self.processed += 1
+            self.latency = elapsed if self.processed == 1 else 0.9 * self.latency + 0.1 * elapsed
+            if output is not None and self.outbox is not None:
+                self.outbox.put(output, timeout=0.5)
+
+    def stop(self):
+        self.running = False
+
+
+class Pipeline:
+    """Chain of stages connected by bounded queues"""
+
+    def __init__(self, queue_size=2, queue_policy=DROP_OLDEST, on_error=None, on_drop=None):
+        self.queue_size = queue_size
+        self.queue_policy = queue_policy
+        self.on_error = on_error
+        self.on_drop = on_drop
+        self.stages = []
+
+    def add_stage(self, name, func, queue_policy=None):
+        """Append a stage; every stage after the first gets its own inbox queue"""
+        inbox = None
+        if self.stages:
+            inbox = FrameQueue(self.queue_size, queue_policy or self.queue_policy, self.on_drop)
+            self.stages[-1].outbox = inbox
+        stage = Stage(name, func, inbox=inbox, on_error=self._stage_failed)
+        self.stages.append(stage)
+        return stage
+
+    def _stage_failed(self, name, error):
+        self.stop()
+        if self.on_error:
+            self.on_error(name, error)
+
+    def start(self):
+        for stage in self.stages:
+            stage.start()
+
+    def stop(self, timeout=1.0):
+        for stage in self.stages:
+            stage.stop()
+            if stage.inbox is not None:
+                stage.inbox.close()
+        current = threading.current_thread()
+        for stage in self.stages:
+            if stage is not current and stage.is_alive():
+                stage.join(timeout)
+
+    def get_stats(self):
+        """Queue depth, drops and latency for each stage"""
+        return {
+            stage.name: {
+                "queue_depth": len(stage.inbox) if stage.inbox is not None else 0,
+                "dropped": stage.inbox.dropped if stage.inbox is not None else 0,
+                "latency_ms": stage.latency * 1000,
+                "processed": stage.processed,
+            }
+            for stage in self.stages
+        }
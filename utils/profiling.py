@@ -0,0 +1,180 @@
+# utils/profiling.py
+import functools
+import json
+import os
+import signal
+import threading
+import time
+
+import cv2
+import numpy as np
+
+
+class RingBuffer:
+    """Last `capacity` timings of one section in preallocated lists
+
+    Appends take no lock; each section is expected to be written from one
+    thread, and readers only ever see a slightly stale window.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.starts = [0] * capacity
+        self.durations = [0] * capacity
+        self.threads = [0] * capacity
+        self.count = 0
+
+    def append(self, start, duration, thread):
+        index = self.count % self.capacity
+        self.starts[index] = start
+        self.durations[index] = duration
+        self.threads[index] = thread
+        self.count += 1
+
+    def snapshot(self):
+        """(starts, durations, threads) arrays of the buffered entries, oldest first"""
+        count, capacity = self.count, self.capacity
+        if count <= capacity:
+            order = slice(0, count)
+            return (np.array(self.starts[order]), np.array(self.durations[order]), np.array(self.threads[order]))
+        split = count % capacity
+        return tuple(np.array(values[split:] + values[:split]) for values in (self.starts, self.durations, self.threads))
+
+
+class NullSection:
+    """Shared no-op context returned while profiling is disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SECTION = NullSection()
+
+
+class Section:
+    __slots__ = ("buffer", "start")
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        self.buffer.append(self.start, end - self.start, threading.get_ident())
+        return False
+
+
+class Profiler:
+    """Named section timers: `with profiler.section("inference"):` or `@profiler.timed()`
+
+    Disabled, a section is one attribute check and a shared no-op context.
+    Enabled, each section keeps its last `capacity` timings in a ring buffer
+    for the HUD and for Chrome trace export (chrome://tracing, Perfetto or
+    speedscope).
+    """
+
+    def __init__(self, enabled=False, capacity=4096):
+        self.enabled = enabled
+        self.capacity = capacity
+        self.buffers = {}
+
+    def buffer(self, name):
+        buffer = self.buffers.get(name)
+        if buffer is None:
+            buffer = self.buffers.setdefault(name, RingBuffer(self.capacity))
+        return buffer
+
+    def section(self, name):
+        if not self.enabled:
+            return NULL_SECTION
+        return Section(self.buffer(name))
+
+    def timed(self, name=None):
+        def decorate(func):
+            label = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with Section(self.buffer(label)):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def clear(self):
+        self.buffers = {}
+
+    def get_stats(self):
+        """Mean, p95 and last duration in ms per section over the buffered window"""
+        stats = {}
+        for name, buffer in list(self.buffers.items()):
+            _, durations, _ = buffer.snapshot()
+            if len(durations) == 0:
+                continue
+            ms = durations / 1e6
+            stats[name] = {
+                "count": buffer.count,
+                "mean_ms": float(ms.mean()),
+                "p95_ms": float(np.percentile(ms, 95)),
+                "last_ms": float(ms[-1]),
+            }
+        return stats
+
+    def export_chrome_trace(self, path):
+        """Write the buffered sections as Chrome trace complete events"""
+        pid = os.getpid()
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        events = []
+        seen_threads = set()
+        for name, buffer in list(self.buffers.items()):
+            starts, durations, threads = buffer.snapshot()
+            for start, duration, thread in zip(starts.tolist(), durations.tolist(), threads.tolist()):
+                events.append({
+                    "name": name, "ph": "X", "pid": pid, "tid": thread,
+                    "ts": start / 1000, "dur": duration / 1000,
+                })
+                seen_threads.add(thread)
+        for thread in seen_threads:
+            events.append({
+                "name": "thread_name", "ph": "M", "pid": pid, "tid": thread,
+                "args": {"name": thread_names.get(thread, str(thread))},
+            })
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        print(f"Wrote profile trace to {path}")
+        return path
+
+    def install_signal_handler(self, path, signum=None):
+        """Export a trace to path whenever the process gets SIGUSR1 (where available)"""
+        signum = signum or getattr(signal, "SIGUSR1", None)
+        if signum is None:
+            return False
+        signal.signal(signum, lambda *_: self.export_chrome_trace(path))
+        return True
+
+
+# Shared by the GUI, headless mode and the library code they call
+profiler = Profiler()
+
+
+def draw_hud(frame, stats, origin=(10, 10)):
+    """Overlay per-section mean/p95 ms in the corner of the frame, in place"""
+    if not stats:
+        return frame
+    lines = [f"{name}: {row['mean_ms']:.1f} / {row['p95_ms']:.1f} ms" for name, row in sorted(stats.items())]
+    x, y = origin
+    height = 18 * len(lines) + 8
+    width = 10 + 8 * max(len(line) for line in lines)
+    region = frame[y:y + height, x:x + width]
+    region //= 3
+    for index, line in enumerate(lines):
+        cv2.putText(frame, line, (x + 5, y + 18 * (index + 1)), cv2.FONT_HERSHEY_SIMPLEX, 0.45,
+                    (255, 255, 255), 1, cv2.LINE_AA)
+    return frame
@@ -0,0 +1,226 @@
+# utils/recording.py
+import os
+import shutil
+import subprocess
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import cv2
+
+from utils.buffers import FramePool
+from utils.pipeline import FrameQueue, DROP_OLDEST
+
+RECORD_BACKENDS = ("opencv", "ffmpeg")
+FFMPEG_PRESETS = ("ultrafast", "superfast", "veryfast", "faster", "fast", "medium", "slow")
+
+
+class OpenCVWriter:
+    """mp4v encoding through cv2.VideoWriter"""
+
+    def __init__(self, path, fps, frame_size):
+        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+        self.writer = cv2.VideoWriter(path, fourcc, fps, frame_size)
+        if not self.writer.isOpened():
+            raise Exception(f"Could not open video writer for {path}")
+
+    def write(self, frame):
+        self.writer.write(frame)
+
+    def release(self):
+        self.writer.release()
+
+
+class FFmpegWriter:
+    """H.264 encoding by piping raw BGR frames into an ffmpeg process"""
+
+    def __init__(self, path, fps, frame_size, preset="veryfast", crf=23):
+        if shutil.which("ffmpeg") is None:
+            raise Exception("ffmpeg not found on PATH")
+        width, height = frame_size
+        command = [
+            "ffmpeg", "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{width}x{height}", "-r", f"{fps:.3f}",
+            "-i", "-",
+            "-c:v", "libx264", "-preset", preset, "-crf", str(crf), "-pix_fmt", "yuv420p",
+            path,
+        ]
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE)
+
+    def write(self, frame):
+        self.process.stdin.write(frame.tobytes())
+
+    def release(self):
+        self.process.stdin.close()
+        self.process.wait()
+
+
+class Recorder:
+    """Writes frames on its own thread from a bounded queue
+
+    Frames are placed on a constant-rate timeline from their capture
+    timestamps: frames are repeated to fill gaps and skipped when they arrive
+    faster than `fps`, so the file plays back at the real capture speed.
+    With segment_seconds a new file is started every segment; with
+    max_segments only the newest files are kept. write() copies the frame into
+    a pooled buffer, so the caller can reuse its own buffer right away.
+    """
+
+    def __init__(self, output_dir, frame_size, fps=30.0, backend="opencv", preset="veryfast",
+                 segment_seconds=None, max_segments=None, queue_size=64, queue_policy=DROP_OLDEST,
+                 rgb=False, prefix="detection"):
+        if backend not in RECORD_BACKENDS:
+            raise ValueError(f"Unknown recording backend '{backend}', expected one of {RECORD_BACKENDS}")
+        self.output_dir = output_dir
+        self.frame_size = frame_size
+        self.fps = fps
+        self.backend = backend
+        self.preset = preset
+        self.segment_seconds = segment_seconds
+        self.max_segments = max_segments
+        self.rgb = rgb
+        self.prefix = prefix
+        width, height = frame_size
+        self.pool = FramePool((height, width, 3), name="recorder")
+        self.queue = FrameQueue(queue_size, queue_policy, on_drop=lambda item: self.pool.release(item[0]))
+        self.bgr = None
+        self.files = deque()
+        self.writer = None
+        self.thread = None
+        self.start_time = None
+        self.segment_start = None
+        self.segment_frames = 0
+        self.frames_written = 0
+
+    @property
+    def dropped(self):
+        return self.queue.dropped
+
+    def start(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self
+
+    def write(self, frame, timestamp=None):
+        """Queue a frame; timestamp None means the next slot on the timeline"""
+        return self.queue.put((self.pool.copy(frame), timestamp), timeout=1.0)
+
+    def stop(self):
+        """Flush queued frames and close the current file"""
+        self.queue.close()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def open_segment(self, timestamp):
+        if self.writer is not None:
+            self.writer.release()
+        name = datetime.fromtimestamp(timestamp).strftime(f"{self.prefix}_%Y%m%d_%H%M%S")
+        path = os.path.join(self.output_dir, name + ".mp4")
+        if self.backend == "ffmpeg":
+            self.writer = FFmpegWriter(path, self.fps, self.frame_size, self.preset)
+        else:
+            self.writer = OpenCVWriter(path, self.fps, self.frame_size)
+        self.segment_start = timestamp
+        self.segment_frames = 0
+        self.files.append(path)
+
+        # Rolling recording: delete the oldest files beyond max_segments
+        while self.max_segments and len(self.files) > self.max_segments:
+            old = self.files.popleft()
+            if os.path.exists(old):
+                os.remove(old)
+
+    def encode(self, frame):
+        if self.rgb:
+            self.bgr = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR, dst=self.bgr)
+            return self.bgr
+        return frame
+
+    def run(self):
+        try:
+            while True:
+                item = self.queue.get(timeout=0.5)
+                if item is None:
+                    if self.queue.closed and len(self.queue) == 0:
+                        break
+                    continue
+                frame, timestamp = item
+                if timestamp is None:
+                    timestamp = (self.start_time or 0.0) + self.frames_written / self.fps
+                if self.start_time is None:
+                    self.start_time = timestamp
+
+                if self.writer is None or (
+                    self.segment_seconds and timestamp - self.segment_start >= self.segment_seconds
+                ):
+                    self.open_segment(timestamp)
+
+                # Number of timeline slots this frame covers within the segment
+                target = int(round((timestamp - self.segment_start) * self.fps)) + 1
+                repeats = max(0, target - self.segment_frames)
+                if repeats > 0:
+                    encoded = self.encode(frame)
+                    for _ in range(repeats):
+                        self.writer.write(encoded)
+                    self.segment_frames += repeats
+                    self.frames_written += repeats
+                self.pool.release(frame)
+        except Exception as e:
+            print(f"Error in recorder: {e}")
+        finally:
+            if self.writer is not None:
+                self.writer.release()
+                self.writer = None
+
+
+class EventRecorder:
+    """Pre-event recording: keep the last N seconds in memory, flush when a class appears
+
+    Once triggered, frames keep going to a Recorder until `post_seconds` have
+    passed without another trigger.
+    """
+
+    def __init__(self, trigger_classes, pre_seconds=5.0, post_seconds=5.0, **recorder_kwargs):
+        self.trigger_classes = set(trigger_classes)
+        self.pre_seconds = pre_seconds
+        self.post_seconds = post_seconds
+        # The whole pre-event buffer is queued at once when an event starts
+        recorder_kwargs.setdefault("queue_size", int((pre_seconds + 2) * recorder_kwargs.get("fps", 30.0)))
+        self.recorder_kwargs = recorder_kwargs
+        width, height = recorder_kwargs["frame_size"]
+        self.pool = FramePool((height, width, 3), name="event")
+        self.buffer = deque()
+        self.recorder = None
+        self.last_trigger = None
+
+    def write(self, frame, timestamp=None, class_names=()):
+        timestamp = time.time() if timestamp is None else timestamp
+        if self.trigger_classes.intersection(class_names):
+            self.last_trigger = timestamp
+            if self.recorder is None:
+                self.recorder = Recorder(prefix="event", **self.recorder_kwargs).start()
+                for buffered_frame, buffered_time in self.buffer:
+                    self.recorder.write(buffered_frame, buffered_time)
+                    self.pool.release(buffered_frame)
+                self.buffer.clear()
+
+        if self.recorder is not None:
+            self.recorder.write(frame, timestamp)
+            if timestamp - self.last_trigger > self.post_seconds:
+                # Finish the file in the background so the caller never waits on encoding
+                threading.Thread(target=self.recorder.stop).start()
+                self.recorder = None
+            return
+
+        self.buffer.append((self.pool.copy(frame), timestamp))
+        while self.buffer and timestamp - self.buffer[0][1] > self.pre_seconds:
+            self.pool.release(self.buffer.popleft()[0])
+
+    def stop(self):
+        if self.recorder is not None:
+            self.recorder.stop()
+            self.recorder = None
+        self.buffer.clear()
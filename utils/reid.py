@@ -0,0 +1,162 @@
+# utils/reid.py
+import cv2
+import numpy as np
+
+from utils.matching import linear_assignment
+
+HSV_BINS = (8, 4, 4)  # hue, saturation, value
+GRID = 16             # sample points per crop side
+
+
+def color_embeddings(frame, boxes, bins=HSV_BINS, grid=GRID):
+    """Appearance embeddings for every box of a BGR frame as one (N, D) float32 array
+
+    Each crop is sampled on a fixed grid x grid lattice, so the cost does not
+    depend on box size. The embedding is an HSV histogram of the top half
+    followed by one of the bottom half, square-rooted and L2-normalized so
+    a dot product is the cosine similarity. All crops are converted with
+    one cvtColor and counted with one bincount.
+    """
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    count = len(boxes)
+    part_bins = bins[0] * bins[1] * bins[2]
+    if count == 0:
+        return np.zeros((0, 2 * part_bins), dtype=np.float32)
+
+    height, width = frame.shape[:2]
+    x1 = np.clip(boxes[:, 0], 0, width - 1)
+    y1 = np.clip(boxes[:, 1], 0, height - 1)
+    x2 = np.clip(boxes[:, 2], x1, width - 1)
+    y2 = np.clip(boxes[:, 3], y1, height - 1)
+    steps = (np.arange(grid) + 0.5) / grid
+    xs = (x1[:, None] + (x2 - x1)[:, None] * steps).astype(np.intp)
+    ys = (y1[:, None] + (y2 - y1)[:, None] * steps).astype(np.intp)
+    pixels = frame[ys[:, :, None], xs[:, None, :]]
+    hsv = cv2.cvtColor(pixels.reshape(count * grid, grid, 3), cv2.COLOR_BGR2HSV).reshape(count, grid, grid, 3)
+
+    hsv = hsv.astype(np.intp)
+    codes = ((hsv[..., 0] * bins[0] // 180) * bins[1] + hsv[..., 1] * bins[1] // 256) * bins[2] \
+        + hsv[..., 2] * bins[2] // 256
+    halves = (np.arange(grid) >= grid // 2).astype(np.intp)
+    index = (np.arange(count)[:, None, None] * 2 + halves[None, :, None]) * part_bins + codes
+    histograms = np.bincount(index.ravel(), minlength=count * 2 * part_bins).reshape(count, -1)
+
+    embeddings = np.sqrt(histograms.astype(np.float32))
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True) + 1e-6
+    return embeddings
+
+
+class ReIDGallery:
+    """Recent appearance embeddings per track, for recovering IDs after occlusion
+
+    Every track keeps its last `per_track` embeddings in a ring, sampled every
+    `sample_interval` frames. The gallery holds at most `max_tracks` tracks in
+    preallocated arrays; when full the least recently seen track is evicted,
+    and tracks unseen for `max_age` frames are dropped. A detection can only
+    take the ID of a track whose last box is within reach: one box height
+    plus `max_speed` box heights per frame since it was last sampled.
+    """
+
+    def __init__(self, max_tracks=256, per_track=8, max_age=300, threshold=0.85, sample_interval=5,
+                 max_speed=0.5, bins=HSV_BINS, grid=GRID):
+        self.max_tracks = max_tracks
+        self.per_track = per_track
+        self.max_age = max_age
+        self.threshold = threshold
+        self.sample_interval = sample_interval
+        self.max_speed = max_speed
+        self.bins = bins
+        self.grid = grid
+        dim = 2 * bins[0] * bins[1] * bins[2]
+        self.features = np.zeros((max_tracks, per_track, dim), dtype=np.float32)
+        self.counts = np.zeros(max_tracks, dtype=np.int32)
+        self.heads = np.zeros(max_tracks, dtype=np.int32)
+        self.track_ids = np.full(max_tracks, -1, dtype=np.int64)
+        self.classes = np.zeros(max_tracks, dtype=np.int64)
+        self.last_seen = np.zeros(max_tracks, dtype=np.int64)
+        self.boxes = np.full((max_tracks, 4), np.nan, dtype=np.float32)  # last sampled xyxy box
+        self.rows = {}  # track_id -> gallery row
+        self.recovered = 0
+
+    def __len__(self):
+        return len(self.rows)
+
+    def ids(self):
+        return set(self.rows)
+
+    def embed(self, frame, boxes):
+        return color_embeddings(frame, boxes, self.bins, self.grid)
+
+    def row(self, track_id, frame_index):
+        """Gallery row of a track, allocating one (and evicting the stalest track) if needed"""
+        row = self.rows.get(track_id)
+        if row is not None:
+            return row
+        free = np.flatnonzero(self.track_ids == -1)
+        if len(free):
+            row = int(free[0])
+        else:
+            row = int(np.argmin(self.last_seen))
+            del self.rows[int(self.track_ids[row])]
+        self.track_ids[row] = track_id
+        self.counts[row] = 0
+        self.heads[row] = 0
+        self.boxes[row] = np.nan
+        # Marked as seen now, so the next allocation in the same batch does not evict it again
+        self.last_seen[row] = frame_index
+        self.rows[track_id] = row
+        return row
+
+    def add(self, track_ids, classes, embeddings, frame_index, boxes=None):
+        """Store one embedding, and the box it was taken from, for each of several tracks"""
+        if len(track_ids) == 0:
+            return
+        rows = np.array([self.row(int(track_id), frame_index) for track_id in track_ids], dtype=np.intp)
+        heads = self.heads[rows]
+        self.features[rows, heads] = embeddings
+        self.heads[rows] = (heads + 1) % self.per_track
+        self.counts[rows] = np.minimum(self.counts[rows] + 1, self.per_track)
+        self.classes[rows] = classes
+        self.last_seen[rows] = frame_index
+        if boxes is not None:
+            self.boxes[rows] = boxes
+
+    def expire(self, frame_index):
+        stale = np.flatnonzero((self.track_ids >= 0) & (frame_index - self.last_seen > self.max_age))
+        for row in stale:
+            del self.rows[int(self.track_ids[row])]
+        self.track_ids[stale] = -1
+        self.counts[stale] = 0
+
+    def reachable(self, rows, boxes, frame_index):
+        """(Q, R) mask of the gallery rows each query box is close enough to have moved to"""
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        last = self.boxes[rows]
+        distance = np.hypot(
+            (boxes[:, None, 0] + boxes[:, None, 2] - last[None, :, 0] - last[None, :, 2]) / 2,
+            (boxes[:, None, 1] + boxes[:, None, 3] - last[None, :, 1] - last[None, :, 3]) / 2,
+        )
+        height = last[:, 3] - last[:, 1]
+        reach = height * (1 + self.max_speed * (frame_index - self.last_seen[rows]))
+        # Rows without a stored box compare as NaN and are never ruled out
+        return ~(distance > reach[None, :])
+
+    def match(self, embeddings, classes, candidate_ids, boxes=None, frame_index=None):
+        """Assign embeddings to candidate tracks of the same class by cosine similarity
+
+        A track's similarity is its best-matching stored sample. With the
+        query boxes and frame_index, tracks out of reach (see max_speed) are
+        ruled out. Returns (query_index, track_id) pairs at or above the threshold.
+        """
+        rows = np.array([self.rows[track_id] for track_id in candidate_ids if track_id in self.rows], dtype=np.intp)
+        if len(rows) == 0 or len(embeddings) == 0:
+            return []
+        samples = self.features[rows].reshape(-1, self.features.shape[2])
+        similarity = (samples @ embeddings.T).reshape(len(rows), self.per_track, len(embeddings))
+        filled = np.arange(self.per_track)[None, :] < self.counts[rows][:, None]
+        similarity = np.where(filled[:, :, None], similarity, -1.0).max(axis=1).T
+        similarity[np.asarray(classes)[:, None] != self.classes[rows][None, :]] = -1.0
+        if boxes is not None and frame_index is not None:
+            similarity[~self.reachable(rows, boxes, frame_index)] = -1.0
+        pairs, _, _ = linear_assignment(1.0 - similarity, 1.0 - self.threshold)
+        return [(int(query), int(self.track_ids[rows[column]])) for query, column in pairs]
@@ -1,49 +1,132 @@
 # utils/stats.py
+import time
+
+import numpy as np
+
+# Rolling windows reported by get_windows(), in seconds
+WINDOWS = {"1s": 1, "1m": 60, "1h": 3600}
+
+
 class DetectionStats:
-    def __init__(self):
+    def __init__(self, max_classes=80, history_seconds=3600):
         self.class_counts = {}
         self.total_detections = 0
         self.avg_confidence = 0
-        self.active_tracks = set()
-    
-    def update(self, results, track_matches):
+        self.unique_objects = 0
+        self.max_track_id = -1
+        self.frames = 0
+        self.names = {}
+        self._summary = None
+        self.first_second = None
+
+        # Per-second buckets in fixed-size ring buffers for the rolling windows
+        self.history_seconds = history_seconds
+        self.bucket_seconds = np.full(history_seconds, -1, dtype=np.int64)
+        self.bucket_frames = np.zeros(history_seconds, dtype=np.int64)
+        self.bucket_detections = np.zeros(history_seconds, dtype=np.int64)
+        self.bucket_confidence = np.zeros(history_seconds, dtype=np.float64)
+        self.bucket_classes = np.zeros((history_seconds, max_classes), dtype=np.int64)
+        self.class_totals = np.zeros(max_classes, dtype=np.int64)
+
+    def grow(self, num_classes):
+        """Widen the per-class counters for models with more classes than expected"""
+        extra = num_classes - self.class_totals.shape[0]
+        self.class_totals = np.pad(self.class_totals, (0, extra))
+        self.bucket_classes = np.pad(self.bucket_classes, ((0, 0), (0, extra)))
+
+    def bucket(self, now):
+        """Ring buffer index for the current second, clearing it if it holds an older second"""
+        second = int(now)
+        index = second % self.history_seconds
+        if self.bucket_seconds[index] != second:
+            self.bucket_seconds[index] = second
+            self.bucket_frames[index] = 0
+            self.bucket_detections[index] = 0
+            self.bucket_confidence[index] = 0
+            self.bucket_classes[index] = 0
+        return index
+
+    def update(self, detections, now=None):
         """Update detection statistics"""
-        if not results or len(results) == 0:
+        now = time.time() if now is None else now
+        if self.first_second is None:
+            self.first_second = int(now)
+        index = self.bucket(now)
+        self.bucket_frames[index] += 1
+        self.frames += 1
+
+        num_detections = len(detections)
+        if num_detections == 0:
             return
-            
-        result = results[0]
-        boxes = result.boxes
-        
+        self.names = detections.names
+        self._summary = None
+
         # Update total detections
-        num_detections = len(boxes)
         self.total_detections += num_detections
-        
-        # Update active tracks
-        self.active_tracks.update(track_matches.values())
-        
-        # Update class counts and average confidence
-        total_conf = 0
-        for box in boxes:
-            cls = int(box.cls[0].item())
-            conf = float(box.conf[0].item())
-            class_name = result.names[cls]
-            
-            self.class_counts[class_name] = self.class_counts.get(class_name, 0) + 1
-            total_conf += conf
-        
+
+        # Confirmed track IDs are handed out in increasing order, so any ID above
+        # the largest one seen so far is a new object
+        track_ids = detections.track_ids
+        new_ids = np.unique(track_ids[track_ids > self.max_track_id])
+        if len(new_ids):
+            self.unique_objects += len(new_ids)
+            self.max_track_id = int(new_ids[-1])
+
+        # Update class counts and confidence
+        counts = np.bincount(detections.cls, minlength=self.class_totals.shape[0])
+        if len(counts) > self.class_totals.shape[0]:
+            self.grow(len(counts))
+        self.class_totals += counts
+        self.bucket_classes[index] += counts
+        self.bucket_detections[index] += num_detections
+        total_conf = float(detections.conf.sum())
+        self.bucket_confidence[index] += total_conf
+
         # Update average confidence
-        if num_detections > 0:
-            self.avg_confidence = (
-                self.avg_confidence * (self.total_detections - num_detections) +
-                total_conf * 100
-            ) / self.total_detections
-    
-    def get_summary(self):
-        """Get formatted statistics summary"""
-        stats = {
-            "total_detections": self.total_detections,
-            "avg_confidence": self.avg_confidence,
-            "unique_objects": len(self.active_tracks),
-            "class_counts": self.class_counts
+        self.avg_confidence = (
+            self.avg_confidence * (self.total_detections - num_detections) +
+            total_conf * 100
+        ) / self.total_detections
+
+    def class_names(self, counts):
+        return {
+            self.names.get(cls, str(cls)): int(counts[cls])
+            for cls in np.flatnonzero(counts).tolist()
         }
-        return stats
\ No newline at end of file
+
+    def get_windows(self, now=None):
+        """Frames, detections, FPS, average confidence and class counts per rolling window
+
+        Windows cover the last completed seconds; the current second is still
+        filling up and would make the rates read low. Until a window has been
+        running for its full length, rates are taken over the seconds so far.
+        """
+        second = int(time.time() if now is None else now)
+        elapsed = second - self.first_second if self.first_second is not None else 0
+        windows = {}
+        for name, seconds in WINDOWS.items():
+            mask = (self.bucket_seconds >= second - seconds) & (self.bucket_seconds < second)
+            frames = int(self.bucket_frames[mask].sum())
+            detections = int(self.bucket_detections[mask].sum())
+            confidence = float(self.bucket_confidence[mask].sum())
+            covered = min(seconds, elapsed)
+            windows[name] = {
+                "frames": frames,
+                "fps": frames / covered if covered else 0.0,
+                "detections": detections,
+                "avg_confidence": confidence * 100 / detections if detections else 0.0,
+                "class_counts": self.class_names(self.bucket_classes[mask].sum(axis=0)),
+            }
+        return windows
+
+    def get_summary(self):
+        """Get formatted statistics summary, rebuilt only after new detections"""
+        if self._summary is None:
+            self.class_counts = self.class_names(self.class_totals)
+            self._summary = {
+                "total_detections": self.total_detections,
+                "avg_confidence": self.avg_confidence,
+                "unique_objects": self.unique_objects,
+                "class_counts": self.class_counts
+            }
+        return self._summary
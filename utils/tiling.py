@@ -0,0 +1,135 @@
+# utils/tiling.py
+import cv2
+import numpy as np
+
+from utils.detections import Detections
+from utils.matching import nms
+
+
+def tile_grid(width, height, tile_size=640, overlap=0.2, rois=None):
+    """(T, 4) xyxy tiles covering each ROI (or the whole frame) with the given overlap
+
+    Tiles are tile_size squares; the last tile of a row or column is shifted
+    back inside its ROI instead of being cut short. A ROI smaller than a tile,
+    or any ROI when tile_size is None, becomes a single crop.
+    """
+    regions = rois if rois else [(0, 0, width, height)]
+    tiles = []
+    for x1, y1, x2, y2 in regions:
+        x1, y1 = max(0, int(x1)), max(0, int(y1))
+        x2, y2 = min(width, int(x2)), min(height, int(y2))
+        if x2 <= x1 or y2 <= y1:
+            continue
+        if tile_size is None:
+            tiles.append((x1, y1, x2, y2))
+            continue
+        stride = max(1, int(tile_size * (1 - overlap)))
+        xs = range(x1, max(x1, x2 - tile_size) + 1, stride) if x2 - x1 > tile_size else [x1]
+        ys = range(y1, max(y1, y2 - tile_size) + 1, stride) if y2 - y1 > tile_size else [y1]
+        xs, ys = list(xs), list(ys)
+        if x2 - x1 > tile_size and xs[-1] + tile_size < x2:
+            xs.append(x2 - tile_size)
+        if y2 - y1 > tile_size and ys[-1] + tile_size < y2:
+            ys.append(y2 - tile_size)
+        for ty in ys:
+            for tx in xs:
+                tiles.append((tx, ty, min(tx + tile_size, x2), min(ty + tile_size, y2)))
+    return np.array(tiles, dtype=np.int64).reshape(-1, 4)
+
+
+class MotionMask:
+    """Which tiles changed since the previous frame
+
+    The frame is compared at 1/scale resolution and the mean absolute
+    difference of every tile is read from an integral image, so all tiles are
+    scored at once. A tile is re-run at least every max_skip frames even
+    without motion.
+    """
+
+    def __init__(self, threshold=2.0, scale=8, max_skip=30):
+        self.threshold = threshold
+        self.scale = scale
+        self.max_skip = max_skip
+        self.previous = None
+        self.gray = None
+        self.difference = None
+        self.skipped = None
+
+    def update(self, frame, tiles):
+        """Boolean mask over tiles: True where the tile should run the detector"""
+        height, width = frame.shape[:2]
+        size = (max(1, width // self.scale), max(1, height // self.scale))
+        small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        self.gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY, dst=self.gray)
+
+        if self.previous is None or self.previous.shape != self.gray.shape or \
+                self.skipped is None or len(self.skipped) != len(tiles):
+            active = np.ones(len(tiles), dtype=bool)
+            self.skipped = np.zeros(len(tiles), dtype=np.int64)
+        else:
+            self.difference = cv2.absdiff(self.gray, self.previous, dst=self.difference)
+            integral = cv2.integral(self.difference)
+            cells = np.clip(tiles // self.scale, 0, [size[0], size[1], size[0], size[1]])
+            x1, y1, x2, y2 = cells.T
+            sums = integral[y2, x2] - integral[y1, x2] - integral[y2, x1] + integral[y1, x1]
+            areas = np.maximum((x2 - x1) * (y2 - y1), 1)
+            active = (sums / areas > self.threshold) | (self.skipped + 1 >= self.max_skip)
+
+        self.skipped = np.where(active, 0, self.skipped + 1)
+        self.previous, self.gray = self.gray, self.previous
+        return active
+
+
+class TiledDetector:
+    """SAHI-style sliced inference over ROIs with cross-tile NMS
+
+    All changed tiles go to the model in one batched call. Each tile's
+    detections are shifted to frame coordinates and kept, so tiles skipped by
+    the motion mask contribute their last detections; the union is then
+    merged with class-aware NMS. With full_frame the whole frame is added as
+    one more tile so objects larger than a tile are still found.
+    """
+
+    def __init__(self, model, tile_size=640, overlap=0.2, rois=None, motion_threshold=None,
+                 iou_threshold=0.5, full_frame=False):
+        self.model = model
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.rois = rois
+        self.iou_threshold = iou_threshold
+        self.full_frame = full_frame
+        self.motion = MotionMask(motion_threshold) if motion_threshold is not None else None
+        self.frame_shape = None
+        self.tiles = None
+        self.tile_detections = []
+        self.tiles_run = 0
+        self.tiles_skipped = 0
+
+    def get_tiles(self, frame):
+        if frame.shape[:2] != self.frame_shape:
+            height, width = frame.shape[:2]
+            self.frame_shape = frame.shape[:2]
+            tiles = tile_grid(width, height, self.tile_size, self.overlap, self.rois)
+            if self.full_frame:
+                tiles = np.vstack([tiles, [[0, 0, width, height]]])
+            self.tiles = tiles
+            self.tile_detections = [Detections() for _ in range(len(tiles))]
+        return self.tiles
+
+    def __call__(self, frame):
+        tiles = self.get_tiles(frame)
+        active = self.motion.update(frame, tiles) if self.motion else np.ones(len(tiles), dtype=bool)
+        indices = np.flatnonzero(active).tolist()
+        self.tiles_run += len(indices)
+        self.tiles_skipped += len(tiles) - len(indices)
+
+        if indices:
+            crops = [frame[y1:y2, x1:x2] for x1, y1, x2, y2 in tiles[indices].tolist()]
+            results = self.model(crops, verbose=False)
+            for index, result in zip(indices, results):
+                x1, y1 = tiles[index, :2].tolist()
+                self.tile_detections[index] = Detections.from_results([result]).transform(dx=x1, dy=y1)
+
+        detections = Detections.concatenate(self.tile_detections)
+        keep = nms(detections.xyxy, detections.conf, detections.cls, self.iou_threshold)
+        return detections.select(np.sort(keep))
@@ -3,15 +3,50 @@ import numpy as np
 import colorsys
 import cv2
 
+from utils.matching import cost_matrix, linear_assignment
+from utils.kalman import BatchKalmanFilter, xyxy_to_xyah, xyah_to_xyxy
+from utils.profiling import profiler
+
+# Track states; FREE marks an unused slot in the track table
+FREE = -1
+TENTATIVE = 0
+CONFIRMED = 1
+LOST = 2
+
 class ObjectTracker:
-    def __init__(self):
-        self.track_history = {}  # Track history for each ID
-        self.id_colors = {}      # Color mapping for each ID
-        self.last_positions = {} # Last known positions
-        self.lost_tracks = {}    # Recently lost tracks
-        self.max_history = 30
+    def __init__(self, cost="iou", n_init=3, max_tracks=1024, max_history=30, reid=None):
+        self.id_colors = {}      # Color mapping for each live ID
+        self.names = {}          # Class names of the last detections
+        self.slots = {}          # Table slot for each live ID
+        self.max_history = max_history
         self.max_lost_frames = 30
         self.iou_threshold = 0.3
+        self.max_center_distance = 0.5
+        self.cost = cost         # Assignment cost: "iou", "giou" or "center"
+        self.n_init = n_init     # Consecutive hits before a tentative track is confirmed
+        self.max_tracks = max_tracks  # Hard cap on live tracks
+        self.reid = reid         # Optional ReIDGallery to recover IDs by appearance
+        self.next_id = 0
+        self.frame_index = 0
+        self.frames_since_detection = 0
+        self.last_reid_sample = None
+        
+        # Preallocated structure-of-arrays track table, one slot per live track.
+        # Slots of deleted tracks are recycled, so memory never grows.
+        self.kalman = BatchKalmanFilter()
+        self.track_ids = np.full(max_tracks, -1, dtype=np.int64)
+        self.states = np.full(max_tracks, FREE, dtype=np.int8)
+        self.hits = np.zeros(max_tracks, dtype=np.int32)
+        self.time_since_update = np.zeros(max_tracks, dtype=np.int32)
+        self.classes = np.zeros(max_tracks, dtype=np.int64)
+        self.confidences = np.zeros(max_tracks, dtype=np.float32)
+        self.means = np.zeros((max_tracks, 8))
+        self.covariances = np.zeros((max_tracks, 8, 8))
+        
+        # Trail of box centers per slot as a fixed-size ring buffer
+        self.trails = np.zeros((max_tracks, max_history, 2), dtype=np.int32)
+        self.trail_lengths = np.zeros(max_tracks, dtype=np.int32)
+        self.trail_heads = np.zeros(max_tracks, dtype=np.int32)
         
     def get_color(self, track_id):
         """Generate consistent color for track ID"""
@@ -21,116 +56,295 @@ class ObjectTracker:
             self.id_colors[track_id] = rgb_color
         return self.id_colors[track_id]
     
-    def calculate_iou(self, box1, box2):
-        """Calculate IOU between two boxes"""
-        x1 = max(box1[0], box2[0])
-        y1 = max(box1[1], box2[1])
-        x2 = min(box1[2], box2[2])
-        y2 = min(box1[3], box2[3])
+    def max_cost(self):
+        """Largest admissible assignment cost for the configured cost function"""
+        if self.cost == "center":
+            return self.max_center_distance
+        return 1.0 - self.iou_threshold
+    
+    def live_slots(self):
+        return np.flatnonzero(self.states != FREE)
+    
+    def boxes(self, slots):
+        """Kalman boxes of the given slots as an (N, 4) xyxy array"""
+        return xyah_to_xyxy(self.means[slots, :4])
+    
+    @property
+    def last_positions(self):
+        """Current boxes of confirmed tracks"""
+        slots = np.flatnonzero(self.states == CONFIRMED)
+        return {int(self.track_ids[slot]): box for slot, box in zip(slots, self.boxes(slots))}
+    
+    @property
+    def lost_tracks(self):
+        """Predicted boxes and frames lost of lost tracks"""
+        slots = np.flatnonzero(self.states == LOST)
+        return {
+            int(self.track_ids[slot]): (box, int(self.time_since_update[slot]))
+            for slot, box in zip(slots, self.boxes(slots))
+        }
+    
+    def get_label(self, track_id):
+        """Last class name and confidence of a track"""
+        slot = self.slots.get(track_id)
+        if slot is None:
+            return "", 0.0
+        return self.names.get(int(self.classes[slot]), ""), float(self.confidences[slot])
+    
+    def get_trail(self, track_id):
+        """Trail of box centers for a track, oldest first, or None if unknown"""
+        slot = self.slots.get(track_id)
+        if slot is None or self.trail_lengths[slot] == 0:
+            return None
+        length = self.trail_lengths[slot]
+        if length < self.max_history:
+            return self.trails[slot, :length]
+        return np.roll(self.trails[slot], -self.trail_heads[slot], axis=0)
+    
+    def get_trail_segments(self, track_id):
+        """Trail as views into the ring buffer, oldest segment first, without copying"""
+        slot = self.slots.get(track_id)
+        if slot is None or self.trail_lengths[slot] == 0:
+            return []
+        length = self.trail_lengths[slot]
+        head = self.trail_heads[slot]
+        if length < self.max_history or head == 0:
+            return [self.trails[slot, :length]]
+        return [self.trails[slot, head:], self.trails[slot, :head]]
+    
+    def add_to_trails(self, slots, bboxes):
+        """Append box centers to the trail ring buffers of several slots at once"""
+        slots = np.asarray(slots, dtype=int)
+        if len(slots) == 0:
+            return
+        bboxes = np.asarray(bboxes).reshape(-1, 4)
+        centers = np.stack([(bboxes[:, 0] + bboxes[:, 2]) / 2, (bboxes[:, 1] + bboxes[:, 3]) / 2], axis=1)
+        heads = self.trail_heads[slots]
+        self.trails[slots, heads] = centers.astype(np.int32)
+        self.trail_heads[slots] = (heads + 1) % self.max_history
+        self.trail_lengths[slots] = np.minimum(self.trail_lengths[slots] + 1, self.max_history)
+    
+    @profiler.timed("tracker.assign")
+    def assign(self, detections):
+        """Solve detections against the predicted boxes of every live track in one pass
+
+        Returns (pairs, unmatched_detections) where pairs holds (detection, slot) indices.
+        """
+        detections = np.asarray(detections, dtype=np.float32).reshape(-1, 4)
+        live = self.live_slots()
+        cost = cost_matrix(detections, self.boxes(live), self.cost)
+        pairs, unmatched_dets, _ = linear_assignment(cost, self.max_cost())
+        pairs[:, 1] = live[pairs[:, 1]]
+        return pairs, unmatched_dets
+    
+    def match_tracks(self, detections):
+        """Match current detections with existing tracks, returns {det_idx: track_id}"""
+        pairs, _ = self.assign(detections)
+        return {int(det_idx): int(self.track_ids[slot]) for det_idx, slot in pairs}
+    
+    @profiler.timed("tracker.predict")
+    def predict_live(self):
+        live = self.live_slots()
+        self.means[live], self.covariances[live] = self.kalman.predict(self.means[live], self.covariances[live])
+    
+    def predict(self):
+        """Advance all tracks one frame with the Kalman motion model, without detections
+
+        Tracks age on predicted frames too, so max_lost_frames counts frames
+        rather than keyframes; lost tracks past it are deleted here as well.
+        """
+        self.frame_index += 1
+        self.frames_since_detection += 1
+        self.predict_live()
+        live = self.states != FREE
+        self.time_since_update[live] += 1
+        self.remove_tracks(np.flatnonzero((self.states == LOST) & (self.time_since_update > self.max_lost_frames)))
         
-        intersection = max(0, x2 - x1) * max(0, y2 - y1)
-        area1 = (box1[2] - box1[0]) * (box1[3] - box1[1])
-        area2 = (box2[2] - box2[0]) * (box2[3] - box2[1])
-        union = area1 + area2 - intersection
+        slots = np.flatnonzero(self.states == CONFIRMED)
+        boxes = self.boxes(slots)
+        self.add_to_trails(slots, boxes)
+        return {int(self.track_ids[slot]): box for slot, box in zip(slots, boxes)}
+    
+    def prediction_uncertainty(self):
+        """Largest predicted position standard deviation of a confirmed track, relative to its height"""
+        slots = np.flatnonzero(self.states == CONFIRMED)
+        if len(slots) == 0:
+            return 0.0
+        std = np.sqrt(self.covariances[slots, 0, 0] + self.covariances[slots, 1, 1])
+        return float(np.max(std / np.maximum(self.means[slots, 3], 1.0)))
+    
+    def add_tracks(self, bboxes, track_ids=None):
+        """Start tracks for unmatched detections in free slots, returns the slots used
+
+        When the table is full the longest-lost tracks are recycled first; if
+        there is still no room the remaining detections are not tracked.
+        Tracks given existing track_ids are revived and start confirmed.
+        """
+        free = np.flatnonzero(self.states == FREE)
+        shortage = len(bboxes) - len(free)
+        if shortage > 0:
+            lost = np.flatnonzero(self.states == LOST)
+            oldest = lost[np.argsort(-self.time_since_update[lost])][:shortage]
+            self.remove_tracks(oldest)
+            free = np.flatnonzero(self.states == FREE)
         
-        return intersection / union if union > 0 else 0
+        slots = free[:len(bboxes)]
+        count = len(slots)
+        if count == 0:
+            return slots
+        
+        # Nothing to confirm against on the first frame, so those tracks start confirmed
+        state = CONFIRMED if self.frame_index <= 1 or self.n_init <= 1 or track_ids is not None else TENTATIVE
+        
+        self.means[slots], self.covariances[slots] = self.kalman.initiate(xyxy_to_xyah(bboxes[:count]))
+        if track_ids is None:
+            self.track_ids[slots] = np.arange(self.next_id, self.next_id + count)
+            self.next_id += count
+        else:
+            self.track_ids[slots] = np.asarray(track_ids)[:count]
+        self.states[slots] = state
+        self.hits[slots] = 1
+        self.time_since_update[slots] = 0
+        self.trail_lengths[slots] = 0
+        self.trail_heads[slots] = 0
+        for slot in slots:
+            self.slots[int(self.track_ids[slot])] = int(slot)
+        return slots
     
-    def match_tracks(self, detections):
-        """Match current detections with existing tracks"""
-        if not self.last_positions:
-            return {i: i for i in range(len(detections))}
-            
-        matches = {}
-        used_tracks = set()
-        used_detections = set()
-        
-        # First, try to match with active tracks
-        for det_idx, det_box in enumerate(detections):
-            best_iou = self.iou_threshold
-            best_track = None
-            
-            for track_id, last_box in self.last_positions.items():
-                if track_id in used_tracks:
-                    continue
-                    
-                iou = self.calculate_iou(det_box, last_box)
-                if iou > best_iou:
-                    best_iou = iou
-                    best_track = track_id
-            
-            if best_track is not None:
-                matches[det_idx] = best_track
-                used_tracks.add(best_track)
-                used_detections.add(det_idx)
-        
-        # Try to match with recently lost tracks
-        for det_idx in range(len(detections)):
-            if det_idx in used_detections:
-                continue
-                
-            best_iou = self.iou_threshold
-            best_track = None
-            
-            for track_id, (box, frames_lost) in list(self.lost_tracks.items()):
-                if frames_lost > self.max_lost_frames:
-                    del self.lost_tracks[track_id]
-                    continue
-                    
-                iou = self.calculate_iou(detections[det_idx], box)
-                if iou > best_iou:
-                    best_iou = iou
-                    best_track = track_id
-            
-            if best_track is not None:
-                matches[det_idx] = best_track
-                del self.lost_tracks[best_track]
-                used_detections.add(det_idx)
-        
-        # Assign new IDs to unmatched detections
-        next_id = max(self.last_positions.keys(), default=-1) + 1
-        for det_idx in range(len(detections)):
-            if det_idx not in matches:
-                matches[det_idx] = next_id
-                next_id += 1
-        
-        return matches
-    
-    def update(self, detections, boxes, frame=None):
-        """Update tracks with new detections"""
-        # Match detections with existing tracks
-        matches = self.match_tracks([box.xyxy[0].cpu().numpy() for box in boxes])
-        
-        # Update last positions and track history
-        new_positions = {}
-        for det_idx, track_id in matches.items():
-            box = boxes[det_idx]
-            bbox = box.xyxy[0].cpu().numpy()
-            new_positions[track_id] = bbox
-            
-            # Update track history
-            center = (int((bbox[0] + bbox[2]) / 2), int((bbox[1] + bbox[3]) / 2))
-            if track_id not in self.track_history:
-                self.track_history[track_id] = []
-            self.track_history[track_id].append(center)
-            
-            if len(self.track_history[track_id]) > self.max_history:
-                self.track_history[track_id].pop(0)
-        
-        # Update lost tracks
-        for track_id in list(self.last_positions.keys()):
-            if track_id not in new_positions:
-                self.lost_tracks[track_id] = (self.last_positions[track_id], 0)
-        
-        # Increment lost frames counter
-        for track_id in list(self.lost_tracks.keys()):
-            box, frames_lost = self.lost_tracks[track_id]
-            self.lost_tracks[track_id] = (box, frames_lost + 1)
-            
-            # Remove old lost tracks
-            if frames_lost > self.max_lost_frames:
-                del self.lost_tracks[track_id]
-                if track_id in self.track_history:
-                    del self.track_history[track_id]
-        
-        self.last_positions = new_positions
-        return matches
\ No newline at end of file
+    def remove_tracks(self, slots):
+        """Delete tracks, free their slots and drop everything kept for their IDs"""
+        for track_id in self.track_ids[slots]:
+            for state in (self.slots, self.id_colors):
+                state.pop(int(track_id), None)
+        self.states[slots] = FREE
+        self.track_ids[slots] = -1
+        self.trail_lengths[slots] = 0
+    
+    def recover_tracks(self, frame, bboxes, classes, unmatched_dets):
+        """Give unmatched detections the ID of a lost or deleted track they look like
+
+        Lost tracks restart their motion model at the detection; deleted tracks
+        still in the gallery are revived in a free slot. Returns the detections
+        left unmatched and the recovered (detections, slots).
+        """
+        empty = np.empty(0, dtype=int)
+        lost = np.flatnonzero(self.states == LOST)
+        candidates = set(self.track_ids[lost].tolist()) | (self.reid.ids() - set(self.slots))
+        if not candidates:
+            return unmatched_dets, empty, empty
+        
+        classes = np.zeros(len(bboxes), dtype=np.int64) if classes is None else np.asarray(classes)
+        embeddings = self.reid.embed(frame, bboxes[unmatched_dets])
+        pairs = self.reid.match(embeddings, classes[unmatched_dets], candidates, bboxes[unmatched_dets],
+                                self.frame_index)
+        if not pairs:
+            return unmatched_dets, empty, empty
+        
+        dets = unmatched_dets[[query for query, _ in pairs]]
+        slots = np.array([self.slots.get(track_id, -1) for _, track_id in pairs], dtype=int)
+        live = slots >= 0
+        lost_slots, lost_dets = slots[live], dets[live]
+        self.means[lost_slots], self.covariances[lost_slots] = self.kalman.initiate(xyxy_to_xyah(bboxes[lost_dets]))
+        self.states[lost_slots] = CONFIRMED
+        self.hits[lost_slots] += 1
+        self.time_since_update[lost_slots] = 0
+        
+        revived_ids = [track_id for (_, track_id), is_live in zip(pairs, live) if not is_live]
+        revived_slots = self.add_tracks(bboxes[dets[~live]], track_ids=revived_ids)
+        revived_dets = dets[~live][:len(revived_slots)]
+        
+        recovered_dets = np.concatenate([lost_dets, revived_dets]).astype(int)
+        self.reid.recovered += len(recovered_dets)
+        return (
+            np.setdiff1d(unmatched_dets, recovered_dets),
+            recovered_dets,
+            np.concatenate([lost_slots, revived_slots]).astype(int),
+        )
+    
+    def sample_appearance(self, frame, bboxes, classes, det_idx, slots):
+        """Every few frames, store the appearance of each confirmed track in the gallery
+
+        Only keyframes reach here, so the interval is measured from the last
+        sample rather than as a multiple of frame_index, which keyframes at a
+        fixed detect interval might never hit.
+        """
+        self.reid.expire(self.frame_index)
+        if self.last_reid_sample is not None and self.frame_index - self.last_reid_sample < self.reid.sample_interval:
+            return
+        self.last_reid_sample = self.frame_index
+        confirmed = self.states[slots] == CONFIRMED
+        det_idx, slots = det_idx[confirmed], slots[confirmed]
+        classes = np.zeros(len(bboxes), dtype=np.int64) if classes is None else np.asarray(classes)
+        self.reid.add(self.track_ids[slots], classes[det_idx], self.reid.embed(frame, bboxes[det_idx]), self.frame_index,
+                      bboxes[det_idx])
+    
+    def update_boxes(self, bboxes, classes=None, confidences=None, frame=None):
+        """Predict, match, correct and manage track states for one frame of xyxy boxes
+
+        With a re-ID gallery and the frame, unmatched detections are first
+        compared by appearance with lost and recently deleted tracks. Returns
+        an array with the track ID of each detection, -1 for detections that
+        do not belong to a confirmed track.
+        """
+        self.frame_index += 1
+        self.frames_since_detection = 0
+        bboxes = np.asarray(bboxes, dtype=np.float64).reshape(-1, 4)
+        
+        # Predict every track to this frame and match against the predictions
+        self.predict_live()
+        pairs, unmatched_dets = self.assign(bboxes)
+        det_idx, slots = pairs[:, 0], pairs[:, 1]
+        
+        # Correct matched tracks in one batch
+        self.means[slots], self.covariances[slots] = self.kalman.update(
+            self.means[slots], self.covariances[slots], xyxy_to_xyah(bboxes[det_idx])
+        )
+        live = self.states != FREE
+        matched = np.zeros(self.max_tracks, dtype=bool)
+        matched[slots] = True
+        missed = live & ~matched
+        self.hits[matched] += 1
+        self.time_since_update[missed] += 1
+        self.time_since_update[matched] = 0
+        
+        # tentative -> confirmed after n_init hits, confirmed -> lost when missed,
+        # lost -> confirmed when matched again, deleted when tentative and missed
+        # or lost for more than max_lost_frames
+        promote = matched & ((self.states == LOST) | ((self.states == TENTATIVE) & (self.hits >= self.n_init)))
+        self.states[promote] = CONFIRMED
+        self.states[missed & (self.states == CONFIRMED)] = LOST
+        deleted = missed & ((self.states == TENTATIVE) | (self.time_since_update > self.max_lost_frames))
+        self.remove_tracks(np.flatnonzero(deleted))
+        
+        reid = self.reid is not None and frame is not None
+        if reid and len(unmatched_dets):
+            unmatched_dets, recovered_dets, recovered_slots = self.recover_tracks(frame, bboxes, classes, unmatched_dets)
+            det_idx = np.concatenate([det_idx, recovered_dets]).astype(int)
+            slots = np.concatenate([slots, recovered_slots]).astype(int)
+        
+        # Unmatched detections start new tracks in free slots
+        new_slots = self.add_tracks(bboxes[unmatched_dets])
+        det_idx = np.concatenate([det_idx, unmatched_dets[:len(new_slots)]]).astype(int)
+        slots = np.concatenate([slots, new_slots]).astype(int)
+        self.add_to_trails(slots, bboxes[det_idx])
+        if classes is not None:
+            self.classes[slots] = np.asarray(classes)[det_idx]
+        if confidences is not None:
+            self.confidences[slots] = np.asarray(confidences)[det_idx]
+        if reid:
+            self.sample_appearance(frame, bboxes, classes, det_idx, slots)
+        
+        track_ids = np.full(len(bboxes), -1, dtype=np.int64)
+        confirmed = self.states[slots] == CONFIRMED
+        track_ids[det_idx[confirmed]] = self.track_ids[slots[confirmed]]
+        return track_ids
+    
+    def update(self, detections, frame=None):
+        """Update tracks with a frame's Detections and fill in their track IDs
+
+        The frame is only needed for re-identification and must be the
+        undrawn frame the detections' coordinates refer to.
+        """
+        self.names = detections.names
+        detections.track_ids = self.update_boxes(detections.xyxy, detections.cls, detections.conf, frame)
+        return detections
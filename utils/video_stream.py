@@ -1,19 +1,70 @@
+import json
+import os
+import threading
+import time
+
 import cv2
 
+CAMERA_CACHE = "runs/cameras.json"
+
 
 class Camera:
 
     @staticmethod
-    def get_available_cameras():
-        """Get list of available camera indices"""
-        camera_indices = []
-        for i in range(5):  # Check first 5 possible camera indices
-            cap = cv2.VideoCapture(i)
-            if cap is not None and cap.isOpened():
-                camera_indices.append(str(i))
-                cap.release()
+    def probe_camera(index, found):
+        # Each probe only writes its own element, so a late thread cannot disturb the caller reading the list
+        cap = cv2.VideoCapture(index)
+        if cap is not None and cap.isOpened():
+            found[index] = True
+        if cap is not None:
+            cap.release()
+    
+    @staticmethod
+    def get_available_cameras(max_index=5, timeout=2.0, cache_path=CAMERA_CACHE):
+        """Get list of available camera indices, probing all of them in parallel
+
+        Devices that have not answered within `timeout` seconds are left out;
+        their probe threads are daemons so a hung driver never blocks exit.
+        The result is written to cache_path for cached_cameras().
+        """
+        found = [False] * max_index
+        threads = [
+            threading.Thread(target=Camera.probe_camera, args=(i, found), daemon=True)
+            for i in range(max_index)  # Check the first few possible camera indices
+        ]
+        for thread in threads:
+            thread.start()
+        deadline = time.monotonic() + timeout
+        for thread in threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        
+        camera_indices = [str(i) for i, opened in enumerate(found) if opened]
+        if cache_path:
+            try:
+                os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+                with open(cache_path, "w") as f:
+                    json.dump(camera_indices, f)
+            except OSError as e:
+                print(f"Could not cache camera list: {e}")
         return camera_indices if camera_indices else ["0"]
     
+    @staticmethod
+    def cached_cameras(cache_path=CAMERA_CACHE):
+        """Camera indices found by the last probe, without opening any device"""
+        try:
+            with open(cache_path) as f:
+                camera_indices = json.load(f)
+        except (OSError, ValueError):
+            camera_indices = []
+        return camera_indices if camera_indices else ["0"]
+    
+    @staticmethod
+    def parse_source(source):
+        """Turn a camera index string into an int, leave file paths and URLs as is"""
+        if isinstance(source, str) and source.isdigit():
+            return int(source)
+        return source
+    
     @staticmethod
     def load_camera(camera_index):
         camera = cv2.VideoCapture(camera_index)
@@ -1,83 +1,141 @@
 # utils/visualization.py
+from collections import OrderedDict
+
 import cv2
 import numpy as np
 
+from utils.profiling import profiler
+
+LABEL_HEIGHT = 25
+DETAIL_LEVELS = ("full", "labels", "boxes")
+
 class Visualizer:
-    def __init__(self, tracker):
+    def __init__(self, tracker, label_cache_size=1024):
         self.tracker = tracker
+        self.label_cache_size = label_cache_size
+        self.label_cache = OrderedDict()  # (class, track_id, confidence) -> label image
+        self.show_labels = True
+        self.show_trails = True
     
-    def draw_detection(self, frame, box, track_id, class_name, confidence):
-        """Draw a single detection with its track ID and trail"""
-        x1, y1, x2, y2 = map(int, box)
-        color = self.tracker.get_color(track_id)
-        
-        # Draw bounding box
-        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2, cv2.LINE_AA)
-        
-        # Prepare label
+    def set_detail(self, detail):
+        """'full' draws boxes, labels and trails, 'labels' drops trails, 'boxes' draws boxes only"""
+        if detail not in DETAIL_LEVELS:
+            raise ValueError(f"Unknown detail level '{detail}', expected one of {DETAIL_LEVELS}")
+        self.show_labels = detail != "boxes"
+        self.show_trails = detail == "full"
+    
+    def render_label(self, class_name, track_id, confidence, color):
+        """Label text on its background color as a small image"""
         label = f"{class_name} ID:{track_id} {confidence:.2f}"
         label_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 2)[0]
-        
-        # Draw label background
-        cv2.rectangle(
-            frame,
-            (x1, y1 - 25),
-            (x1 + label_size[0], y1),
-            color,
-            -1
-        )
-        
-        # Draw label text
+        patch = np.empty((LABEL_HEIGHT, max(label_size[0], 1), 3), dtype=np.uint8)
+        patch[:] = color
         cv2.putText(
-            frame,
+            patch,
             label,
-            (x1, y1 - 10),
+            (0, LABEL_HEIGHT - 10),
             cv2.FONT_HERSHEY_SIMPLEX,
             0.5,
             (255, 255, 255),
             2,
             cv2.LINE_AA
         )
+        return patch
+    
+    def get_label(self, class_name, track_id, confidence, color):
+        """Cached label image, keyed by the values shown in it (LRU eviction)"""
+        key = (class_name, track_id, round(confidence, 2))
+        patch = self.label_cache.get(key)
+        if patch is not None:
+            self.label_cache.move_to_end(key)
+            return patch
+        
+        patch = self.render_label(class_name, track_id, confidence, color)
+        if self.label_cache_size > 0:
+            self.label_cache[key] = patch
+            if len(self.label_cache) > self.label_cache_size:
+                self.label_cache.popitem(last=False)
+        return patch
+    
+    def paste_label(self, frame, patch, x1, y1):
+        """Copy a label image above the box, clipped to the frame"""
+        top, left = y1 - LABEL_HEIGHT, x1
+        bottom, right = top + patch.shape[0], left + patch.shape[1]
+        frame_top, frame_left = max(top, 0), max(left, 0)
+        frame_bottom, frame_right = min(bottom, frame.shape[0]), min(right, frame.shape[1])
+        if frame_top >= frame_bottom or frame_left >= frame_right:
+            return
+        frame[frame_top:frame_bottom, frame_left:frame_right] = patch[
+            frame_top - top:frame_bottom - top,
+            frame_left - left:frame_right - left
+        ]
+    
+    def draw_trail(self, frame, track_id, color):
+        """Draw the trail straight from the tracker's ring buffer, without copying it"""
+        segments = self.tracker.get_trail_segments(track_id)
+        if not segments:
+            return
+        cv2.polylines(frame, segments, False, color, 2, cv2.LINE_AA)
+        if len(segments) == 2:
+            # Join the wrapped-around part of the ring buffer
+            cv2.line(frame, tuple(segments[0][-1].tolist()), tuple(segments[1][0].tolist()), color, 2, cv2.LINE_AA)
+    
+    def draw_detection(self, frame, box, track_id, class_name, confidence):
+        """Draw a single detection with its track ID and trail"""
+        x1, y1, x2, y2 = map(int, box)
+        color = self.tracker.get_color(track_id)
+        
+        # Draw bounding box
+        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2, cv2.LINE_AA)
+        
+        # Draw label
+        self.paste_label(frame, self.get_label(class_name, track_id, confidence, color), x1, y1)
         
         # Draw trail if available
-        if track_id in self.tracker.track_history:
-            points = np.array(self.tracker.track_history[track_id], np.int32)
-            cv2.polylines(
-                frame,
-                [points],
-                False,
-                color,
-                2,
-                cv2.LINE_AA
-            )
+        self.draw_trail(frame, track_id, color)
         
         return frame
     
-    def draw_detections(self, frame, results, track_matches):
-        """Draw all detections and their trails"""
-        if results and len(results) > 0:
-            result = results[0]
-            boxes = result.boxes
-            
-            for i, box in enumerate(boxes):
-                # Get tracking ID
-                track_id = track_matches.get(i)
-                if track_id is None:
-                    continue
-                
-                # Get detection info
-                bbox = box.xyxy[0].cpu().numpy()
-                cls = int(box.cls[0].item())
-                conf = float(box.conf[0].item())
-                class_name = result.names[cls]
-                
-                # Draw detection
-                frame = self.draw_detection(
-                    frame,
-                    bbox,
-                    track_id,
-                    class_name,
-                    conf
-                )
+    @profiler.timed("draw.batch")
+    def draw_batch(self, frame, boxes, track_ids, class_names, confidences):
+        """Draw many boxes in one pass: boxes, then labels, then trails"""
+        boxes = np.asarray(boxes).astype(np.int32).tolist()
+        colors = [self.tracker.get_color(track_id) for track_id in track_ids]
         
-        return frame
\ No newline at end of file
+        for (x1, y1, x2, y2), color in zip(boxes, colors):
+            cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2, cv2.LINE_AA)
+        
+        if self.show_labels:
+            for (x1, y1, _, _), track_id, class_name, conf, color in zip(
+                boxes, track_ids, class_names, confidences, colors
+            ):
+                self.paste_label(frame, self.get_label(class_name, track_id, conf, color), x1, y1)
+        
+        if self.show_trails:
+            for track_id, color in zip(track_ids, colors):
+                self.draw_trail(frame, track_id, color)
+        
+        return frame
+    
+    def draw_detections(self, frame, detections):
+        """Draw all tracked detections and their trails"""
+        tracked = detections.tracked()
+        names = detections.names
+        class_names = [names.get(cls, "") for cls in tracked.cls.tolist()]
+        return self.draw_batch(
+            frame, tracked.xyxy, tracked.track_ids.tolist(), class_names, tracked.conf.tolist()
+        )
+    
+    def draw_tracks(self, frame, tracks):
+        """Draw predicted track boxes on frames where detection was skipped"""
+        if not tracks:
+            return frame
+        track_ids = list(tracks.keys())
+        labels = [self.tracker.get_label(track_id) for track_id in track_ids]
+        return self.draw_batch(
+            frame,
+            np.array(list(tracks.values())),
+            track_ids,
+            [class_name for class_name, _ in labels],
+            [conf for _, conf in labels]
+        )